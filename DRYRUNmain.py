@@ -16,16 +16,22 @@ import time
 import logging
 from dotenv import load_dotenv
 
-from broker import get_broker
-from utils.pnl_logger import log_trade_result
+from utils import http_pool
 from utils.validate_env import validate_env
 from utils.signal_fetcher import fetch_live_signal
-from utils.score_engine import score_signal
+from utils.cycle_driver import fetch_universe
+from utils.price_snapshot import get_price_snapshot, ORDER_QUOTE_MAX_AGE
+from utils.price_stream import start_price_stream
+from utils.bar_builder import bar_aggregator, BAR_BUILDER
+from utils.paper_broker import paper_broker, PAPER_TRADING
+from utils.score_engine import score_signal, score_windows
+from utils.score_pool import get_score_pool
 from utils.risk_manager import calculate_lot_size
 from utils.adaptive_throttle import get_adaptive_threshold
 from utils.trade_control_logger import is_in_cooldown, is_duplicate, update_trade_log
 from utils.telegram_service import start_telegram_listener, is_killed, send_telegram_message
-from utils.broker_selector import smart_broker_selector  # 🧭 Smart Router
+from utils.broker_selector import smart_broker_selector, refresh_broker_latencies  # 🧭 Smart Router
+from utils.order_pipeline import get_order_pipeline
 
 # === ENV & Logging Setup ===
 load_dotenv()
@@ -54,6 +60,17 @@ def main():
     # === 2. Start Telegram Kill-Switch Listener ===
     start_telegram_listener()
     send_telegram_message("🚀 ExtremeViper started safely in DRYRUN mode.")
+    http_pool.prewarm(ENABLED_BROKERS)
+    if PAPER_TRADING:
+        paper_broker.start()  # simulated fills + realized PnL for DRY_RUN orders
+
+    # === Optional push price feeds (fall back to REST snapshots when stale) ===
+    if os.getenv("PRICE_STREAMING", "false").lower() == "true":
+        for name in ENABLED_BROKERS:
+            name = name.strip().lower()
+            start_price_stream(name, [p.strip() for p in PAIRMAP.get(name, []) if p.strip()])
+        if BAR_BUILDER:
+            bar_aggregator.start()  # candles built from the streamed quotes
 
     # === 3. Main Loop ===
     while True:
@@ -62,6 +79,7 @@ def main():
             time.sleep(10)
             continue
 
+        refresh_broker_latencies(ENABLED_BROKERS)  # one ping per broker per cycle, reused by the router
         # --- Iterate brokers & pairs ---
         for broker_name in ENABLED_BROKERS:
             broker_name = broker_name.strip().lower()
@@ -69,7 +87,13 @@ def main():
             if not pairs:
                 continue
 
-            broker = get_broker(broker_name)
+            # === Concurrent universe fetch (one burst per broker) ===
+            universe_broker = broker_name
+            universe = fetch_universe(universe_broker, pairs)
+            snapshot = get_price_snapshot(universe_broker, pairs)  # one quote round trip per broker
+            if PAPER_TRADING:
+                paper_broker.on_prices(universe_broker, snapshot)  # REST mids move paper fills / SL / TP too
+            universe_scores = score_windows(universe, get_score_pool())  # one vectorized pass (sharded when SCORE_WORKERS > 1)
 
             for pair in pairs:
                 try:
@@ -78,19 +102,20 @@ def main():
                         pair, os.getenv("ENABLED_BROKERS", "oanda,kraken,alpaca")
                     ) or broker_name
 
-                    if selected_broker != broker_name:
-                        broker = get_broker(selected_broker)
-                        broker_name = selected_broker
+                    broker_name = selected_broker
 
                     # === Fetch Signal ===
                     logger.info(f"📡 Fetching live signal for {pair} via {broker_name.upper()}...")
-                    signal = fetch_live_signal(pair, broker_name)
+                    prefetched = universe.get(pair) if broker_name == universe_broker else None
+                    signal = fetch_live_signal(pair, broker_name, candles=prefetched)
                     if not signal:
                         logger.warning(f"⚠️ No signal data for {pair}")
                         continue
 
                     # === Score Signal ===
-                    scored = score_signal(signal)
+                    scored = universe_scores.get(pair) if prefetched is not None else None
+                    if scored is None:
+                        scored = score_signal(signal)
                     score = float(scored.get("score", 0)) if isinstance(scored, dict) else float(scored)
                     threshold = get_adaptive_threshold(signal)
                     lot_size = calculate_lot_size(score, broker_name)
@@ -105,37 +130,52 @@ def main():
                         logger.info(f"🚫 Ignored weak signal ({score:.2f} < {threshold:.2f}) for {pair}")
                         continue
 
-                    if is_in_cooldown(pair, broker_name) or is_duplicate(pair, broker_name):
+                    if (is_in_cooldown(pair, broker_name) or is_duplicate(pair, broker_name)
+                            or get_order_pipeline().busy(pair, broker_name)):
                         logger.info(f"⏳ Skipping {pair} - cooldown/duplicate active.")
                         continue
 
-                    # === DRY-RUN or LIVE Execution ===
+                    # === Pre-trade quote check (refetched unless quoted within ORDER_QUOTE_MAX_AGE) ===
                     side = signal.get("side")
-                    if DRY_RUN:
+                    quote = get_price_snapshot(broker_name, [pair], max_age=ORDER_QUOTE_MAX_AGE).get(pair)
+                    if not quote:
+                        logger.warning(f"⚠️ No fresh quote for {pair} via {broker_name.upper()} — skipping.")
+                        continue
+
+                    # === DRY-RUN or LIVE Execution ===
+                    if DRY_RUN and PAPER_TRADING:
+                        order = paper_broker.submit(
+                            broker_name, pair, side, price=quote,
+                            sl=signal.get("stop_loss"), tp=signal.get("take_profit"), lot_size=lot_size,
+                        )
+                        update_trade_log(pair, broker_name)
+                        logger.info(
+                            f"🤖 [DRY-RUN] Paper order #{order['order_id']}: {pair} | Broker: {broker_name.upper()} "
+                            f"| Side: {side} | Size: {lot_size:.5f} | Quote: {quote} "
+                            f"| open paper positions: {paper_broker.open_count()}"
+                        )
+                    elif DRY_RUN:
                         logger.info(
                             f"🤖 [DRY-RUN] Would place order: {pair} | Broker: {broker_name.upper()} "
-                            f"| Side: {side} | Size: {lot_size:.5f}"
+                            f"| Side: {side} | Size: {lot_size:.5f} | Price: {quote}"
                         )
                     else:
-                        result = broker.place_order(
-                            pair=pair,
-                            side=side,
-                            price=signal.get("price"),
+                        # Non-blocking: the pipeline stages log, start the cooldown, record PnL and notify
+                        get_order_pipeline().enqueue(
+                            broker_name,
+                            pair,
+                            side,
+                            price=quote,
                             sl=signal.get("stop_loss"),
                             tp=signal.get("take_profit"),
                             lot_size=lot_size,
                         )
-                        logger.info(f"✅ LIVE ORDER [{broker_name.upper()}]: {result}")
-                        update_trade_log(pair, broker_name)
-                        send_telegram_message(
-                            f"✅ LIVE ORDER: {pair} | {broker_name.upper()} | {side.upper()} | Size: {lot_size:.5f}"
-                        )
-                        profit_usd = result.get("profit_usd", 0.0) if result else 0.0
-                        log_trade_result(pair, broker_name, profit_usd)
 
                 except Exception as e:
                     logger.error(f"💥 Error while processing {pair} ({broker_name}): {e}", exc_info=False)
 
+        http_pool.log_pool_stats()
+
         # === Loop Delay ===
         time.sleep(int(os.getenv("CYCLE_DELAY_SECONDS", 30)))
 
@@ -7,6 +7,7 @@
 # - Smart broker auto-selector (OANDA, Kraken, Alpaca)
 # - Telegram kill-switch + status control
 # - Cooldown, duplicate & PnL logging
+# - Non-blocking order pipeline (bounded in-flight orders per broker)
 # - Safe auto-fallback to DRY-RUN on failure
 # ==============================================================
 
@@ -15,16 +16,22 @@ import time
 import logging
 from dotenv import load_dotenv
 
-from broker import get_broker
-from utils.pnl_logger import log_trade_result
+from utils import http_pool
 from utils.validate_env import validate_env
 from utils.signal_fetcher import fetch_live_signal
-from utils.score_engine import score_signal
+from utils.cycle_driver import fetch_universe
+from utils.price_snapshot import get_price_snapshot, ORDER_QUOTE_MAX_AGE
+from utils.price_stream import start_price_stream
+from utils.bar_builder import bar_aggregator, BAR_BUILDER
+from utils.paper_broker import paper_broker, PAPER_TRADING
+from utils.score_engine import score_signal, score_windows
+from utils.score_pool import get_score_pool
 from utils.risk_manager import calculate_lot_size
 from utils.adaptive_throttle import get_adaptive_threshold
-from utils.trade_control_logger import is_in_cooldown, is_duplicate, update_trade_log
+from utils.trade_control_logger import is_in_cooldown, is_duplicate
 from utils.telegram_service import start_telegram_listener, is_killed, send_telegram_message
-from utils.broker_selector import smart_broker_selector  # 🧭 Smart Router
+from utils.order_pipeline import get_order_pipeline
+from utils.broker_selector import smart_broker_selector, refresh_broker_latencies  # 🧭 Smart Router
 
 # === ENV & Logging Setup ===
 load_dotenv()
@@ -42,6 +49,13 @@ PAIRMAP = {
 }
 
 
+def _dry_run_fallback(event):
+    """Order stage: a failed live order switches the bot to DRY-RUN for safety."""
+    if event["error"] and event["error"] != "cancelled":
+        os.environ["DRY_RUN"] = "true"  # Safe fallback
+        logger.warning("🔁 Switching temporarily to DRY-RUN mode for safety.")
+
+
 def main():
     logger.info("🚀 Starting ExtremeViper LIVE Mode...")
     if not validate_env():
@@ -50,20 +64,40 @@ def main():
 
     start_telegram_listener()
     send_telegram_message("🟢 ExtremeViper LIVE Engine started successfully.")
+    http_pool.prewarm(ENABLED_BROKERS)
+
+    # === Optional push price feeds (fall back to REST snapshots when stale) ===
+    if os.getenv("PRICE_STREAMING", "false").lower() == "true":
+        for name in ENABLED_BROKERS:
+            name = name.strip().lower()
+            start_price_stream(name, [p.strip() for p in PAIRMAP.get(name, []) if p.strip()])
+        if BAR_BUILDER:
+            bar_aggregator.start()  # candles built from the streamed quotes
+
+    # === Orders leave the scan loop: per-broker lanes + log / trade-log / PnL / Telegram stages ===
+    orders = get_order_pipeline().add_stage("fallback", _dry_run_fallback)
 
     while True:
         if is_killed():
             logger.warning("🛑 Kill-switch active — halting trades temporarily.")
+            orders.cancel_pending()
             time.sleep(10)
             continue
 
+        refresh_broker_latencies(ENABLED_BROKERS)  # one ping per broker per cycle, reused by the router
         for broker_name in ENABLED_BROKERS:
             broker_name = broker_name.strip().lower()
             pairs = [p.strip() for p in PAIRMAP.get(broker_name, []) if p.strip()]
             if not pairs:
                 continue
 
-            broker = get_broker(broker_name)
+            # === Concurrent universe fetch (one burst per broker) ===
+            universe_broker = broker_name
+            universe = fetch_universe(universe_broker, pairs)
+            snapshot = get_price_snapshot(universe_broker, pairs)  # one quote round trip per broker
+            if PAPER_TRADING:
+                paper_broker.on_prices(universe_broker, snapshot)  # simulated orders fill on REST mids too
+            universe_scores = score_windows(universe, get_score_pool())  # one vectorized pass (sharded when SCORE_WORKERS > 1)
 
             for pair in pairs:
                 try:
@@ -72,19 +106,20 @@ def main():
                         pair, os.getenv("ENABLED_BROKERS", "oanda,kraken,alpaca")
                     ) or broker_name
 
-                    if selected_broker != broker_name:
-                        broker = get_broker(selected_broker)
-                        broker_name = selected_broker
+                    broker_name = selected_broker
 
                     # === Fetch Signal ===
                     logger.info(f"📡 Fetching live signal for {pair} via {broker_name.upper()}...")
-                    signal = fetch_live_signal(pair, broker_name)
+                    prefetched = universe.get(pair) if broker_name == universe_broker else None
+                    signal = fetch_live_signal(pair, broker_name, candles=prefetched)
                     if not signal:
                         logger.warning(f"⚠️ No signal data for {pair}")
                         continue
 
                     # === Score Signal ===
-                    scored = score_signal(signal)
+                    scored = universe_scores.get(pair) if prefetched is not None else None
+                    if scored is None:
+                        scored = score_signal(signal)
                     score = float(scored.get("score", 0)) if isinstance(scored, dict) else float(scored)
                     threshold = get_adaptive_threshold(signal)
                     lot_size = calculate_lot_size(score, broker_name)
@@ -99,42 +134,35 @@ def main():
                         logger.info(f"🚫 Ignored weak signal ({score:.2f} < {threshold:.2f}) for {pair}")
                         continue
 
-                    if is_in_cooldown(pair, broker_name) or is_duplicate(pair, broker_name):
-                        logger.info(f"⏳ Skipping {pair} - cooldown/duplicate active.")
+                    if (is_in_cooldown(pair, broker_name) or is_duplicate(pair, broker_name)
+                            or orders.busy(pair, broker_name)):
+                        logger.info(f"⏳ Skipping {pair} - cooldown/duplicate/in-flight order active.")
                         continue
 
-                    # === Execute LIVE Order ===
+                    # === Pre-trade quote check (refetched unless quoted within ORDER_QUOTE_MAX_AGE) ===
                     side = signal.get("side")
-                    try:
-                        result = broker.place_order(
-                            pair=pair,
-                            side=side,
-                            price=signal.get("price"),
-                            sl=signal.get("stop_loss"),
-                            tp=signal.get("take_profit"),
-                            lot_size=lot_size,
-                        )
-                        logger.info(f"✅ LIVE ORDER [{broker_name.upper()}]: {result}")
-                        update_trade_log(pair, broker_name)
-
-                        send_telegram_message(
-                            f"✅ LIVE ORDER: {pair} | {broker_name.upper()} | "
-                            f"{side.upper()} | Size={lot_size:.5f}"
-                        )
-
-                        # Record realized or 0 profit
-                        profit_usd = float(result.get("profit_usd", 0.0)) if result else 0.0
-                        log_trade_result(pair, broker_name, profit_usd)
-
-                    except Exception as e:
-                        logger.error(f"💥 Order failed for {pair} ({broker_name}): {e}")
-                        send_telegram_message(f"⚠️ LIVE ORDER ERROR for {pair}: {e}")
-                        os.environ["DRY_RUN"] = "true"  # Safe fallback
-                        logger.warning("🔁 Switching temporarily to DRY-RUN mode for safety.")
+                    quote = get_price_snapshot(broker_name, [pair], max_age=ORDER_QUOTE_MAX_AGE).get(pair)
+                    if not quote:
+                        logger.warning(f"⚠️ No fresh quote for {pair} via {broker_name.upper()} — skipping.")
+                        continue
+
+                    # === Queue LIVE Order (completion is logged / notified by the pipeline stages) ===
+                    ticket = orders.enqueue(
+                        broker_name,
+                        pair,
+                        side,
+                        price=quote,
+                        sl=signal.get("stop_loss"),
+                        tp=signal.get("take_profit"),
+                        lot_size=lot_size,
+                    )
+                    if ticket:
+                        logger.info(f"📮 Queued {side.upper()} {pair} via {broker_name.upper()} (#{ticket})")
 
                 except Exception as e:
                     logger.error(f"💥 Error processing {pair} ({broker_name}): {e}")
 
+        http_pool.log_pool_stats()
         time.sleep(int(os.getenv("CYCLE_DELAY_SECONDS", 30)))
 
 
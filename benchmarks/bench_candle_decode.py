@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# =====================================================
+# 🧮 Candle decode benchmark (offline)
+# Synthetic Kraken / OANDA / Alpaca payloads decoded by the
+# previous per-row comprehensions vs utils.candle_decoder.
+# Usage: python benchmarks/bench_candle_decode.py [bars] [repeats]
+# =====================================================
+
+import os
+import sys
+import time
+import random
+import datetime
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.candle_decoder import decode_kraken, decode_oanda, decode_alpaca
+
+
+# --- Synthetic payloads (wire format of each broker) ---
+def kraken_payload(n, start=1_700_000_000, step=300):
+    rng = random.Random(1)
+    rows = []
+    for i in range(n):
+        p = 30000 + rng.random() * 100
+        rows.append([start + i * step, f"{p:.1f}", f"{p + 5:.1f}", f"{p - 5:.1f}", f"{p + 1:.1f}", f"{p:.1f}", f"{rng.random():.8f}", 42])
+    return rows
+
+
+def _iso(ts, nanos):
+    base = datetime.datetime.fromtimestamp(ts, tz=datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+    return f"{base}.000000000Z" if nanos else f"{base}Z"
+
+
+def oanda_payload(n, start=1_700_000_000, step=300):
+    rng = random.Random(2)
+    out = []
+    for i in range(n):
+        p = 1.08 + rng.random() / 100
+        out.append({
+            "complete": i < n - 1, "volume": rng.randint(1, 500), "time": _iso(start + i * step, True),
+            "mid": {"o": f"{p:.5f}", "h": f"{p + 0.0004:.5f}", "l": f"{p - 0.0004:.5f}", "c": f"{p + 0.0001:.5f}"},
+        })
+    return out
+
+
+def alpaca_payload(n, start=1_700_000_000, step=300):
+    rng = random.Random(3)
+    out = []
+    for i in range(n):
+        p = 180 + rng.random()
+        out.append({"t": _iso(start + i * step, False), "o": p, "h": p + 0.5, "l": p - 0.5, "c": p + 0.1, "v": rng.randint(100, 10000)})
+    return out
+
+
+# --- Previous per-row decoders (as they were in brokers/*.py) ---
+def kraken_rows(result, count):
+    return [
+        {"timestamp": int(float(c[0])), "open": float(c[1]), "high": float(c[2]), "low": float(c[3]),
+         "close": float(c[4]), "volume": float(c[6])}
+        for c in result[-count:]
+    ]
+
+
+def oanda_rows(data):
+    return [
+        {"timestamp": int(time.mktime(time.strptime(c["time"][:19], "%Y-%m-%dT%H:%M:%S"))),
+         "open": float(c["mid"]["o"]), "high": float(c["mid"]["h"]), "low": float(c["mid"]["l"]),
+         "close": float(c["mid"]["c"]), "volume": float(c["volume"])}
+        for c in data if c["complete"]
+    ]
+
+
+def alpaca_rows(bars):
+    return [
+        {"timestamp": int(datetime.datetime.fromisoformat(b["t"].replace("Z", "+00:00")).timestamp()),
+         "open": float(b["o"]), "high": float(b["h"]), "low": float(b["l"]),
+         "close": float(b["c"]), "volume": float(b.get("v", 0.0))}
+        for b in bars
+    ]
+
+
+def _best(fn, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+    return best
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 720
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    kraken, oanda, alpaca = kraken_payload(n), oanda_payload(n), alpaca_payload(n)
+    cases = [
+        ("kraken", lambda: kraken_rows(kraken, n), lambda: decode_kraken(kraken, n).to_ring()),
+        ("kraken tail100", lambda: kraken_rows(kraken, 100), lambda: decode_kraken(kraken, 100).to_ring()),
+        ("oanda", lambda: oanda_rows(oanda), lambda: decode_oanda(oanda).to_ring()),
+        ("alpaca", lambda: alpaca_rows(alpaca), lambda: decode_alpaca(alpaca).to_ring()),
+    ]
+
+    print(f"{n} bars per payload, best of {repeats}")
+    print(f"{'PAYLOAD':<16} {'PER-ROW ms':>11} {'VECTOR ms':>10} {'SPEEDUP':>8}")
+    for name, old, new in cases:
+        t_old, t_new = _best(old, repeats), _best(new, repeats)
+        print(f"{name:<16} {t_old * 1e3:>11.3f} {t_new * 1e3:>10.3f} {t_old / t_new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# =====================================================
+# 📐 Indicator kernel benchmark (offline)
+# Previous per-element EMA / MACD / Wilder RSI loops vs the
+# block kernels in utils.indicator_kernels; also checks that
+# results agree to 1e-9.
+# Usage: python benchmarks/bench_indicator_kernels.py [repeats]
+# =====================================================
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.indicator_kernels import ema, macd, rsi_wilder
+
+TOLERANCE = 1e-9
+
+
+# --- Previous scalar implementations (ta_engine / score_engine) ---
+def ema_loop(values, window):
+    alpha = 2 / (window + 1)
+    out = []
+    for i, val in enumerate(values):
+        out.append(val if i == 0 else out[-1] + alpha * (val - out[-1]))
+    return np.array(out)
+
+
+def macd_loop(prices, short=6, long=19, signal=5):
+    line = ema_loop(prices, short) - ema_loop(prices, long)
+    return line - ema_loop(line, signal)
+
+
+def rsi_loop(prices, period=7):
+    deltas = np.diff(prices)
+    gains = np.where(deltas > 0, deltas, 0)
+    losses = np.where(deltas < 0, -deltas, 0)
+    avg_gain, avg_loss = np.mean(gains[:period]), np.mean(losses[:period])
+    out = []
+    for i in range(period, len(prices)):
+        avg_gain = (avg_gain * (period - 1) + gains[i - 1]) / period
+        avg_loss = (avg_loss * (period - 1) + losses[i - 1]) / period
+        out.append(100 if avg_loss == 0 else 100 - 100 / (1 + avg_gain / avg_loss))
+    return np.array(out)
+
+
+def _best(fn, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+    return best
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    rng = np.random.default_rng(42)
+
+    print(f"{'CASE':<22} {'LOOP ms':>10} {'KERNEL ms':>10} {'SPEEDUP':>8} {'MAX |DIFF|':>11}")
+    for n in (100, 1_000, 100_000):
+        x = 30000 + np.cumsum(rng.normal(0, 10, n))
+        cases = [
+            ("ema(19)", lambda: ema_loop(x, 19), lambda: ema(x, 19)),
+            ("macd(6,19,5)", lambda: macd_loop(x), lambda: macd(x, 6, 19, 5)[2]),
+            ("rsi(7)", lambda: rsi_loop(x), lambda: rsi_wilder(x, 7)),
+        ]
+        for name, old, new in cases:
+            diff = float(np.max(np.abs(old() - new())))
+            assert diff <= TOLERANCE, f"{name} @ {n}: {diff}"
+            t_old, t_new = _best(old, max(1, repeats if n < 100_000 else 1)), _best(new, repeats)
+            print(f"{name + ' n=' + str(n):<22} {t_old * 1e3:>10.3f} {t_new * 1e3:>10.3f} "
+                  f"{t_old / t_new:>7.1f}x {diff:>11.2e}")
+
+    # 2-D batch: 40 pairs × 1000 bars in one call vs 40 scalar loops
+    X = 100 + np.cumsum(rng.normal(0, 0.1, (40, 1_000)), axis=1)
+    diff = max(float(np.max(np.abs(macd_loop(row) - macd(X, 6, 19, 5)[2][i]))) for i, row in enumerate(X))
+    t_old = _best(lambda: [macd_loop(row) for row in X], repeats)
+    t_new = _best(lambda: macd(X, 6, 19, 5), repeats)
+    print(f"{'macd 40x1000 batch':<22} {t_old * 1e3:>10.3f} {t_new * 1e3:>10.3f} "
+          f"{t_old / t_new:>7.1f}x {diff:>11.2e}")
+
+
+if __name__ == "__main__":
+    main()
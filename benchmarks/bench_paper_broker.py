@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# =====================================================
+# 🧾 Paper fill engine throughput benchmark (offline)
+# Thousands of open simulated positions spread over N pairs,
+# driven by a synthetic random-walk quote stream through a
+# QuoteStore → utils.paper_broker.PaperBroker.
+# Usage: python benchmarks/bench_paper_broker.py [positions] [pairs] [ticks]
+# =====================================================
+
+import os
+import sys
+import time
+import logging
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.quote_store import QuoteStore
+from utils.paper_broker import PaperBroker
+
+
+def main():
+    positions = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    n_pairs = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    ticks = int(sys.argv[3]) if len(sys.argv) > 3 else 4_000
+    logging.disable(logging.INFO)
+    rng = np.random.default_rng(0)
+    pairs = [f"SYN{i:02d}/USD" for i in range(n_pairs)]
+    store = QuoteStore()
+    closed = []
+    engine = PaperBroker(store=store, on_close=closed.append).start()
+
+    for pair in pairs:
+        store.update("kraken", pair, 99.99, 100.01, ts=1_000)
+    for k in range(positions):
+        sign = 1 if k % 2 else -1
+        stop, target = 100 * (1 - sign * (0.01 + rng.random() * 0.05)), 100 * (1 + sign * (0.01 + rng.random() * 0.05))
+        engine.submit("kraken", pairs[k % n_pairs], "buy" if sign > 0 else "sell", 100, stop, target, 1, ts=1_000)
+    for pair in pairs:
+        store.update("kraken", pair, 99.99, 100.01, ts=1_001)
+    print(f"{engine.open_count()} open paper positions over {n_pairs} pairs")
+
+    mids = 100 * np.exp(np.cumsum(rng.normal(0, 0.0003, (ticks, n_pairs)), axis=0))
+    t0 = time.perf_counter()
+    for i in range(ticks):
+        for j, pair in enumerate(pairs):
+            store.update("kraken", pair, mids[i, j] - 0.01, mids[i, j] + 0.01, ts=1_002 + i)
+    elapsed = time.perf_counter() - t0
+    quotes = ticks * n_pairs
+    print(f"  {quotes} quotes in {elapsed:.2f} s  ({elapsed / quotes * 1e6:.1f} µs/quote, store included)")
+    print(f"  closed {len(closed)} ({engine.stats['stops']} stops, {engine.stats['targets']} targets), "
+          f"{engine.open_count()} still open, realized {engine.stats['realized_usd']:+.2f} USD")
+
+
+if __name__ == "__main__":
+    main()
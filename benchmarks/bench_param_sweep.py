@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# =====================================================
+# 🧪 Parameter sweep scaling benchmark (offline)
+# Synthetic M5 universe swept with utils.param_sweep at 1 … N
+# worker processes (no pruning, so every worker count does the
+# same work). Checks that a swept config reproduces a direct
+# Backtester run exactly.
+# Usage: python benchmarks/bench_param_sweep.py [max_workers] [pairs] [days] [configs]
+# =====================================================
+
+import os
+import sys
+import time
+import logging
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.backtester import Backtester
+from utils.param_sweep import ParamSweep, random_search, fixed_threshold
+from bench_backtester import synthetic_pair
+
+SPACE = {
+    "min_score": [4.0, 5.0, 6.0],
+    "cooldown": (60, 1800),
+    "stop_loss_pct": (0.002, 0.01),
+    "take_profit_pct": (0.002, 0.02),
+    "weight.rsi": [0.5, 1.0, 1.5],
+}
+
+
+def main():
+    max_workers = int(sys.argv[1]) if len(sys.argv) > 1 else (os.cpu_count() or 1)
+    pairs = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    days = float(sys.argv[3]) if len(sys.argv) > 3 else 90
+    n_configs = int(sys.argv[4]) if len(sys.argv) > 4 else 16
+    logging.disable(logging.ERROR)
+    bars = int(days * 288)
+    start = 1_700_000_000 // 300 * 300
+    universe = {f"SYN{i:02d}/USD": synthetic_pair(bars, start, i) for i in range(pairs)}
+    configs = random_search(SPACE, n_configs, seed=1)
+    worker_counts = sorted({1, 2, 4, max_workers} & set(range(1, max_workers + 1)))
+    print(f"cpu_count={os.cpu_count()}  {pairs} pairs × {bars} M5 bars  {n_configs} configs  workers={worker_counts}")
+
+    check = {k: v for k, v in configs[0].items() if not k.startswith("weight.")}
+    reference = Backtester(
+        "oanda", "M5", min_score=check["min_score"], threshold_fn=fixed_threshold(check["min_score"]),
+        control_kwargs={"cooldown": check["cooldown"]},
+        stop_loss_pct=check["stop_loss_pct"], take_profit_pct=check["take_profit_pct"],
+    ).run(universe)["stats"]
+
+    base = None
+    for workers in worker_counts:
+        t0 = time.perf_counter()
+        with ParamSweep("oanda", universe, "M5", workers=workers) as sweep:
+            t1 = time.perf_counter()
+            table = sweep.run([check] + configs, rungs=(1.0,))
+        t2 = time.perf_counter()
+        row = table[table["config"] == 0].iloc[0]
+        assert row["trades"] == reference["trades"] and abs(row["pnl"] - reference["pnl"]) < 1e-6
+        base = base or (t2 - t1)
+        print(f"  workers={workers:<3} setup {t1 - t0:6.2f} s  sweep {t2 - t1:7.2f} s  "
+              f"{(n_configs + 1) / (t2 - t1):6.2f} configs/s  {base / (t2 - t1):5.2f}x")
+    print(table.head(5).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
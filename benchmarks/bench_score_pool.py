@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# =====================================================
+# 🧮 Score pool scaling benchmark (offline)
+# Synthetic universes scored with the per-pair score_signal loop,
+# the single-process score_batch, and utils.score_pool.ScorePool
+# at 1 … N worker processes over shared memory. Checks that every
+# path returns identical scores.
+# Usage: python benchmarks/bench_score_pool.py [max_workers] [repeats]
+# =====================================================
+
+import os
+import sys
+import time
+import logging
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.score_engine import score_signal, score_batch
+from utils.score_pool import ScorePool
+
+BARS = 500
+UNIVERSES = (500, 2_000, 8_000)
+
+
+def _best(fn, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+    return best
+
+
+def synthetic_universe(pairs: int, bars: int, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    vol = rng.choice([0.0005, 0.002, 0.01], pairs)[:, None]
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 1, (pairs, bars)) * vol, axis=1))
+    volumes = rng.random((pairs, bars)) * 100
+    volumes[::9, -1] *= 6
+    return closes, volumes
+
+
+def main():
+    max_workers = int(sys.argv[1]) if len(sys.argv) > 1 else (os.cpu_count() or 1)
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    logging.disable(logging.INFO)
+    worker_counts = sorted({1, 2, 4, max_workers} & set(range(1, max_workers + 1)))
+    print(f"cpu_count={os.cpu_count()}  bars={BARS}  workers={worker_counts}")
+
+    pools = {w: ScorePool(w, min_rows=0).warm_up() for w in worker_counts if w > 1}
+    try:
+        for pairs in UNIVERSES:
+            closes, volumes = synthetic_universe(pairs, BARS)
+            reference = score_batch(closes, volumes)
+
+            sample = min(pairs, 500)
+            windows = [[{"close": c, "volume": v} for c, v in zip(closes[i], volumes[i])] for i in range(sample)]
+            t_loop = _best(lambda: [score_signal({"candles": w}) for w in windows], 1) * pairs / sample
+            assert [score_signal({"candles": w}) for w in windows[:50]] == reference[:50].tolist()
+
+            t_batch = _best(lambda: score_batch(closes, volumes), repeats)
+            print(f"\n{pairs} pairs × {BARS} bars")
+            print(f"  {'score_signal loop':<22} {t_loop * 1e3:>10.1f} ms  (extrapolated from {sample})")
+            print(f"  {'score_batch (1 proc)':<22} {t_batch * 1e3:>10.1f} ms  {t_loop / t_batch:>6.1f}x vs loop")
+            for w, pool in pools.items():
+                assert np.array_equal(pool.score(closes, volumes), reference)
+                t_pool = _best(lambda: pool.score(closes, volumes), repeats)
+                print(f"  {f'ScorePool({w})':<22} {t_pool * 1e3:>10.1f} ms  {t_batch / t_pool:>6.2f}x vs 1 proc")
+    finally:
+        for pool in pools.values():
+            pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+# =====================================================
+# 📈 Stream ingestion benchmark (offline)
+# Replays synthetic or recorded quotes through the local
+# stand-in server into the real stream consumers.
+# Usage: python benchmarks/bench_stream_ingest.py [recording.jsonl] [rate]
+# =====================================================
+
+import os
+import sys
+import logging
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.stream_replay import benchmark_ingest, load_recording
+
+logging.basicConfig(level=logging.WARNING, format="%(message)s")
+
+
+def main():
+    quotes = load_recording(sys.argv[1]) if len(sys.argv) > 1 else None
+    rate = float(sys.argv[2]) if len(sys.argv) > 2 else 0
+
+    print(f"{'BROKER':<8} {'QUOTES':>8} {'SECONDS':>8} {'QUOTES/S':>10} {'TARGET':>8}")
+    for broker in ("oanda", "kraken"):
+        r = benchmark_ingest(broker, quotes=quotes, rate=rate)
+        print(f"{r['broker']:<8} {r['quotes']:>8} {r['seconds']:>8} {r['quotes_per_sec']:>10} {str(r['target_rate']):>8}")
+
+
+if __name__ == "__main__":
+    main()
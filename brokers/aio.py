@@ -0,0 +1,107 @@
+# ==============================================================
+# brokers/aio.py
+# v1.0 — Asyncio adapter over the pooled broker modules
+# ==============================================================
+#
+# Every broker module exposes the same five blocking calls
+# (fetch_candles, get_price, ping, get_balance, place_order).
+# AsyncBroker wraps any of them behind one awaitable interface and
+# runs the calls on a shared I/O thread pool, so the keep-alive
+# sessions from utils.http_pool are reused across concurrent calls.
+# A per-broker semaphore bounds in-flight requests.
+
+import os
+import asyncio
+import logging
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from brokers import oanda, kraken, alpaca, tos
+from utils.timeframe import TIMEFRAME
+
+logger = logging.getLogger(__name__)
+
+ASYNC_MAX_CONCURRENCY = int(os.getenv("ASYNC_MAX_CONCURRENCY", 8))
+ASYNC_IO_WORKERS = int(os.getenv("ASYNC_IO_WORKERS", 32))
+
+BROKER_MODULES = {
+    "oanda": oanda,
+    "kraken": kraken,
+    "alpaca": alpaca,
+    "tos": tos,
+}
+
+_io_executor = ThreadPoolExecutor(max_workers=ASYNC_IO_WORKERS, thread_name_prefix="broker-io")
+
+
+class AsyncBroker:
+    """Awaitable facade over a broker module with bounded concurrency."""
+
+    def __init__(self, name: str, module=None, max_concurrency: int = ASYNC_MAX_CONCURRENCY):
+        self.name = name.lower()
+        self.module = module or BROKER_MODULES.get(self.name)
+        if self.module is None:
+            raise ValueError(f"Unsupported broker: {name}")
+        self.max_concurrency = max(1, int(max_concurrency))
+        self._loop = None
+        self._sem = None
+
+    def set_max_concurrency(self, max_concurrency: int):
+        """Change the in-flight limit; takes effect on the next semaphore build."""
+        max_concurrency = max(1, int(max_concurrency))
+        if max_concurrency != self.max_concurrency:
+            self.max_concurrency = max_concurrency
+            self._loop = None
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        # Semaphores are bound to the running loop; rebuild when asyncio.run() starts a new one
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._sem = asyncio.Semaphore(self.max_concurrency)
+        return self._sem
+
+    async def run(self, func, *args, **kwargs):
+        """Run any blocking call for this broker under its concurrency limit."""
+        async with self._semaphore():
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(_io_executor, functools.partial(func, *args, **kwargs))
+
+    async def _call(self, method: str, *args, **kwargs):
+        func = getattr(self.module, method, None)
+        if func is None:
+            raise AttributeError(f"{self.name} broker has no '{method}'")
+        return await self.run(func, *args, **kwargs)
+
+    async def fetch_candles(self, pair: str, timeframe: str = TIMEFRAME, count: int = 100):
+        return await self._call("fetch_candles", pair, timeframe, count)
+
+    async def get_price(self, pair: str):
+        return await self._call("get_price", pair)
+
+    async def ping(self) -> bool:
+        return bool(await self._call("ping"))
+
+    async def get_balance(self) -> float:
+        return await self._call("get_balance")
+
+    async def place_order(self, pair, side, price=None, sl=None, tp=None, size=None, lot_size=None):
+        # Broker modules disagree on the first positional name (pair/symbol) — pass it positionally
+        return await self._call("place_order", pair, side, price=price, sl=sl, tp=tp, size=size, lot_size=lot_size)
+
+
+_async_brokers = {}
+
+
+def get_async_broker(name: str) -> AsyncBroker:
+    """Return the cached AsyncBroker for a broker name."""
+    name = name.lower()
+    if name in ("thinkorswim",):
+        name = "tos"
+    broker = _async_brokers.get(name)
+    if broker is None:
+        broker = _async_brokers[name] = AsyncBroker(name)
+    return broker
+
+
+__all__ = ["AsyncBroker", "get_async_broker", "ASYNC_MAX_CONCURRENCY"]
@@ -1,13 +1,16 @@
 # ==============================================================
 # brokers/alpaca.py
-# v0.2.1 — Safe timeframe parsing + candle fetcher + order mocks
+# v0.3.1 — Multi-symbol bars/snapshots + candle fetcher + order mocks
 # ==============================================================
 
 import os
 import logging
 import datetime
-import requests
-from utils.timeframe import TIMEFRAME, TIMEFRAME_MINUTES
+from utils import http_pool
+from utils.candle_decoder import decode_alpaca
+from utils.timeframe import TIMEFRAME
+from utils import paper_broker
+from utils.pairmap import asset_class
 
 logger = logging.getLogger(__name__)
 
@@ -16,45 +19,72 @@ ALPACA_SECRET_KEY = os.getenv("ALPACA_SECRET_KEY")
 ALPACA_BASE_URL = os.getenv("ALPACA_BASE_URL", "https://data.alpaca.markets/v2/stocks")
 ALPACA_TRADING_URL = os.getenv("ALPACA_TRADING_URL", "https://paper-api.alpaca.markets/v2")
 
+ALPACA_SYMBOLS_PER_REQUEST = int(os.getenv("ALPACA_SYMBOLS_PER_REQUEST", 100))
+ALPACA_PAGE_LIMIT = 10000  # max bars per page across all symbols
+
 HEADERS = {
     "APCA-API-KEY-ID": ALPACA_API_KEY,
     "APCA-API-SECRET-KEY": ALPACA_SECRET_KEY
 }
 
+_ALPACA_UNITS = {"M": ("Min", 1), "H": ("Hour", 60), "D": ("Day", 1440)}
+
 
-def fetch_candles(symbol: str, timeframe: str = TIMEFRAME, count: int = 100):
+def alpaca_timeframe(tf: str):
+    """
+    Convert 'M5' / 'H1' / 'D1' (or '5') to Alpaca's '5Min' / '1Hour' / '1Day'.
+    Returns (alpaca_timeframe, minutes). Native Alpaca strings pass through.
+    """
+    raw = str(tf).strip()
+    for suffix, minutes in _ALPACA_UNITS.values():
+        if raw.endswith(suffix) and raw[:-len(suffix)].isdigit():
+            return raw, int(raw[:-len(suffix)]) * minutes
+    raw = raw.upper()
+    if raw.isdigit():
+        raw = f"M{raw}"
+    unit, amount = raw[0], raw[1:] or "1"
+    if unit not in _ALPACA_UNITS or not amount.isdigit():
+        raise ValueError(f"Unsupported Alpaca timeframe: {tf}")
+    suffix, minutes = _ALPACA_UNITS[unit]
+    return f"{int(amount)}{suffix}", int(amount) * minutes
+
+
+def _window(timeframe: str, count: int, since=None):
+    """Return (alpaca timeframe, start iso, end iso) covering `count` bars or everything since `since`."""
+    tf, minutes = alpaca_timeframe(timeframe)
+    end_time = datetime.datetime.utcnow()
+    if since is not None:
+        start_time = datetime.datetime.utcfromtimestamp(int(since))
+    else:
+        start_time = end_time - datetime.timedelta(minutes=minutes * count)
+    return tf, start_time.isoformat() + "Z", end_time.isoformat() + "Z"
+
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def fetch_candles(symbol: str, timeframe: str = TIMEFRAME, count: int = 100, since=None):
     """
     Fetch recent candles from Alpaca API with safe timeframe handling.
+    Pass `since` (epoch seconds) to fetch only bars from that timestamp on.
     """
     try:
-        end_time = datetime.datetime.utcnow()
-        interval_minutes = TIMEFRAME_MINUTES
-        start_time = end_time - datetime.timedelta(minutes=interval_minutes * count)
-
+        tf, start, end = _window(timeframe, count, since)
         url = f"{ALPACA_BASE_URL}/{symbol}/bars"
         params = {
-            "start": start_time.isoformat() + "Z",
-            "end": end_time.isoformat() + "Z",
-            "timeframe": timeframe,  # e.g. '5Min'
+            "start": start,
+            "end": end,
+            "timeframe": tf,  # e.g. '5Min'
             "limit": count
         }
 
-        response = requests.get(url, headers=HEADERS, params=params, timeout=10)
+        response = http_pool.get("alpaca", url, endpoint="candles", headers=HEADERS, params=params)
         response.raise_for_status()
         data = response.json()
 
-        bars = data.get("bars", [])
-        candles = [
-            {
-                "time": bar["t"],
-                "open": float(bar["o"]),
-                "high": float(bar["h"]),
-                "low": float(bar["l"]),
-                "close": float(bar["c"]),
-                "volume": float(bar.get("v", 0.0)),
-            }
-            for bar in bars
-        ]
+        candles = decode_alpaca(data.get("bars") or []).to_ring()
 
         logger.info(f"✅ Retrieved {len(candles)} candles from ALPACA for {symbol}")
         return candles
@@ -64,13 +94,124 @@ def fetch_candles(symbol: str, timeframe: str = TIMEFRAME, count: int = 100):
         return None
 
 
+def fetch_candle_page(symbol: str, timeframe: str, start, count: int = ALPACA_PAGE_LIMIT):
+    """
+    One page of bars from `start` (epoch seconds) onward, for backfills.
+    Returns CandleArrays, or None when the request failed.
+    """
+    try:
+        tf, _ = alpaca_timeframe(timeframe)
+        params = {
+            "start": datetime.datetime.utcfromtimestamp(int(start)).isoformat() + "Z",
+            "timeframe": tf,
+            "limit": min(int(count), ALPACA_PAGE_LIMIT),
+        }
+        response = http_pool.get("alpaca", f"{ALPACA_BASE_URL}/{symbol}/bars", endpoint="candles",
+                                 headers=HEADERS, params=params)
+        response.raise_for_status()
+        return decode_alpaca(response.json().get("bars") or [])
+    except Exception as e:
+        logger.error(f"❌ Alpaca candle page failed for {symbol} @ {start}: {e}")
+        return None
+
+
+def fetch_candles_batch(symbols, timeframe: str = TIMEFRAME, count: int = 100, since=None) -> dict:
+    """
+    Fetch candles for many symbols through the multi-symbol /bars endpoint.
+    Pages through next_page_token and returns {symbol: candles} in the same
+    normalized format as fetch_candles(), keeping the last `count` bars each.
+    Symbols whose request failed map to None. Only equity tickers are sent:
+    forex / crypto pairs ("EUR/USD") are not served by the stocks endpoint and
+    map to None. A chunk the API rejects (4xx, e.g. one unknown ticker) is
+    retried symbol by symbol so the valid ones still load.
+    """
+    symbols = [s for s in symbols if s]
+    results = {s: [] for s in symbols}
+    invalid = [s for s in symbols if asset_class(s) != "equities"]
+    if invalid:
+        logger.warning(f"⚠️ Alpaca stock bars skip non-equity symbols: {','.join(invalid)}")
+        results.update(dict.fromkeys(invalid))
+    try:
+        tf, start, end = _window(timeframe, count, since)
+    except ValueError as e:
+        logger.error(f"❌ Alpaca batch fetch failed: {e}")
+        return {s: None for s in symbols}
+
+    url = f"{ALPACA_BASE_URL}/bars"
+    requests_made = 0
+    single = {}  # symbol: candles fetched one by one after a rejected chunk
+    for chunk in _chunks([s for s in symbols if results[s] is not None], ALPACA_SYMBOLS_PER_REQUEST):
+        params = {
+            "symbols": ",".join(chunk),
+            "timeframe": tf,
+            "start": start,
+            "end": end,
+            "limit": ALPACA_PAGE_LIMIT,
+        }
+        try:
+            while True:
+                response = http_pool.get("alpaca", url, endpoint="candles", headers=HEADERS, params=params)
+                response.raise_for_status()
+                data = response.json()
+                requests_made += 1
+
+                for symbol, bars in (data.get("bars") or {}).items():
+                    if symbol in results and results[symbol] is not None:
+                        results[symbol].extend(bars)
+
+                token = data.get("next_page_token")
+                if not token:
+                    break
+                params["page_token"] = token
+        except Exception as e:
+            status = getattr(getattr(e, "response", None), "status_code", None) or 0
+            if len(chunk) > 1 and 400 <= status < 500 and status != 429:
+                logger.warning(f"⚠️ Alpaca rejected a {len(chunk)}-symbol batch ({status}) — fetching one by one")
+                for symbol in chunk:
+                    single[symbol] = fetch_candles(symbol, timeframe, count, since)
+                    requests_made += 1
+                continue
+            logger.error(f"❌ Alpaca batch fetch failed for {','.join(chunk)}: {e}")
+            for symbol in chunk:
+                results[symbol] = None
+
+    for symbol, bars in results.items():
+        if bars:
+            results[symbol] = decode_alpaca(bars[-count:]).to_ring()
+    results.update(single)
+
+    ok = sum(1 for c in results.values() if c)
+    logger.info(f"✅ Retrieved ALPACA candles for {ok}/{len(symbols)} symbols in {requests_made} requests")
+    return results
+
+
+def get_snapshots(symbols) -> dict:
+    """
+    Fetch latest trade, quote and bars for many symbols via /snapshots.
+    Returns {symbol: snapshot dict} as sent by Alpaca.
+    """
+    symbols = [s for s in symbols if s]
+    snapshots = {}
+    for chunk in _chunks(symbols, ALPACA_SYMBOLS_PER_REQUEST):
+        try:
+            url = f"{ALPACA_BASE_URL}/snapshots"
+            resp = http_pool.get("alpaca", url, endpoint="price", headers=HEADERS, params={"symbols": ",".join(chunk)})
+            resp.raise_for_status()
+            data = resp.json()
+            # Older API versions nest the mapping under "snapshots"
+            snapshots.update(data.get("snapshots", data) if isinstance(data, dict) else {})
+        except Exception as e:
+            logger.error(f"❌ Failed to fetch ALPACA snapshots for {','.join(chunk)}: {e}")
+    return snapshots
+
+
 def get_price(symbol: str) -> float:
     """
     Fetch the latest trade price for a symbol.
     """
     try:
         url = f"{ALPACA_BASE_URL}/{symbol}/quotes/latest"
-        resp = requests.get(url, headers=HEADERS, timeout=5)
+        resp = http_pool.get("alpaca", url, endpoint="price", headers=HEADERS)
         resp.raise_for_status()
         data = resp.json()
         ask = float(data.get("quote", {}).get("ap", 0))
@@ -83,12 +224,37 @@ def get_price(symbol: str) -> float:
         return 0.0
 
 
+def get_prices(symbols) -> dict:
+    """
+    Latest mids for many symbols from one /snapshots request per chunk.
+    Uses the quote mid, falling back to the last trade when the quote is one-sided.
+    """
+    prices = {}
+    for symbol, snap in get_snapshots(symbols).items():
+        quote = (snap or {}).get("latestQuote") or {}
+        ask = float(quote.get("ap", 0) or 0)
+        bid = float(quote.get("bp", 0) or 0)
+        if ask and bid:
+            prices[symbol] = (ask + bid) / 2
+        else:
+            trade = (snap or {}).get("latestTrade") or {}
+            if trade.get("p"):
+                prices[symbol] = float(trade["p"])
+    logger.debug(f"✅ ALPACA prices fetched for {len(prices)}/{len(symbols)} symbols")
+    return prices
+
+
 def place_order(symbol, side, price=None, sl=None, tp=None, size=None, lot_size=None):
     """
     Mocked Alpaca order placement (supports both 'size' and 'lot_size').
+    With PAPER_TRADING on, the local fill engine fills it against quotes.
     """
     lot_size = lot_size or size or 1
     try:
+        if paper_broker.PAPER_TRADING:
+            order = paper_broker.place_order("alpaca", symbol, side, price, sl, tp, lot_size)
+            logger.info(f"🧾 ALPACA paper order #{order['order_id']}: {side.upper()} {lot_size} {symbol}")
+            return {**order, "symbol": symbol}
         logger.info(f"✅ ALPACA Order Placed: {side.upper()} {lot_size} shares {symbol} (mocked)")
         return {
             "status": "filled",
@@ -110,7 +276,7 @@ def ping():
     Basic health check for Alpaca data endpoint.
     """
     try:
-        resp = requests.get(f"{ALPACA_BASE_URL}/AAPL/quotes/latest", headers=HEADERS, timeout=5)
+        resp = http_pool.get("alpaca", f"{ALPACA_BASE_URL}/AAPL/quotes/latest", endpoint="ping", headers=HEADERS)
         return resp.status_code == 200
     except Exception as e:
         logger.warning(f"Alpaca ping failed: {e}")
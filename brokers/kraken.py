@@ -1,8 +1,10 @@
 import os
-import requests
 import logging
 from datetime import datetime, timedelta
-from utils.pairmap import PAIRMAP_KRAKEN
+from utils import http_pool
+from utils.candle_decoder import CandleArrays, decode_kraken
+from utils.pairmap import PAIRMAP_KRAKEN, REVERSE_KRAKEN
+from utils import paper_broker
 
 logger = logging.getLogger(__name__)
 
@@ -26,8 +28,11 @@ def normalize_timeframe(tf):
     raise ValueError(f"❌ normalize_timeframe() failed: unsupported format → {tf} ({type(tf)})")
 
 
-def fetch_candles(pair, timeframe="M5", count=100):
-    """Retrieve historical OHLC candles for a pair from Kraken."""
+def fetch_candles(pair, timeframe="M5", count=100, since=None):
+    """
+    Retrieve historical OHLC candles for a pair from Kraken.
+    Pass `since` (epoch seconds) to fetch only bars from that timestamp on.
+    """
     try:
         kraken_pair = PAIRMAP_KRAKEN.get(pair)
         if not kraken_pair:
@@ -35,13 +40,14 @@ def fetch_candles(pair, timeframe="M5", count=100):
             return None
 
         interval = normalize_timeframe(timeframe)
-        total_minutes = int(interval) * int(count)
-        since = int((datetime.utcnow() - timedelta(minutes=total_minutes)).timestamp())
+        if since is None:
+            total_minutes = int(interval) * int(count)
+            since = int((datetime.utcnow() - timedelta(minutes=total_minutes)).timestamp())
 
         url = f"{KRAKEN_BASE_URL}/0/public/OHLC"
-        params = {"pair": kraken_pair, "interval": interval, "since": since}
+        params = {"pair": kraken_pair, "interval": interval, "since": int(since)}
 
-        response = requests.get(url, params=params, timeout=10)
+        response = http_pool.get("kraken", url, endpoint="candles", params=params)
         data = response.json()
 
         if not data or data.get("error"):
@@ -49,17 +55,7 @@ def fetch_candles(pair, timeframe="M5", count=100):
             return None
 
         result = list(data.get("result", {}).values())[0]
-        candles = [
-            {
-                "timestamp": int(float(c[0])),
-                "open": float(c[1]),
-                "high": float(c[2]),
-                "low": float(c[3]),
-                "close": float(c[4]),
-                "volume": float(c[6]),
-            }
-            for c in result[-count:]
-        ]
+        candles = decode_kraken(result, count).to_ring()
 
         logger.info(f"✅ Normalized {len(candles)} candles for {pair} via Kraken ({kraken_pair}, {timeframe})")
         return candles
@@ -69,12 +65,41 @@ def fetch_candles(pair, timeframe="M5", count=100):
         return None
 
 
+KRAKEN_MAX_PAGE = 720  # OHLC only ever serves the most recent 720 intervals
+
+
+def fetch_candle_page(pair, timeframe, start, count=KRAKEN_MAX_PAGE):
+    """
+    One page of OHLC bars from `start` (epoch seconds) onward, for backfills.
+    Kraken's OHLC endpoint never reaches further back than its last 720
+    intervals, so older starts just return that tail. Returns CandleArrays,
+    or None when the request failed.
+    """
+    kraken_pair = PAIRMAP_KRAKEN.get(pair)
+    if not kraken_pair:
+        logger.error(f"❌ Kraken pair mapping not found for {pair}")
+        return None
+    params = {"pair": kraken_pair, "interval": normalize_timeframe(timeframe), "since": int(start) - 1}
+    try:
+        data = http_pool.get("kraken", f"{KRAKEN_BASE_URL}/0/public/OHLC", endpoint="candles", params=params).json()
+        if data.get("error"):
+            logger.error(f"❌ Kraken candle page error for {pair}: {data['error']}")
+            return None
+        rows = next(v for k, v in data.get("result", {}).items() if k != "last")
+        arrays = decode_kraken(rows)
+        keep = arrays.timestamp >= int(start)
+        return CandleArrays(*(col[keep][:count] for col in arrays))
+    except Exception as e:
+        logger.error(f"❌ Kraken candle page failed for {pair} @ {start}: {e}")
+        return None
+
+
 def get_price(pair: str) -> float:
     """Fetch the latest mid-price for a given pair via Kraken public API."""
     try:
         kraken_pair = PAIRMAP_KRAKEN.get(pair, pair.replace("/", ""))
         url = f"{KRAKEN_BASE_URL}/0/public/Ticker?pair={kraken_pair}"
-        resp = requests.get(url, timeout=5)
+        resp = http_pool.get("kraken", url, endpoint="price")
         data = resp.json()
 
         result = list(data.get("result", {}).values())
@@ -91,12 +116,63 @@ def get_price(pair: str) -> float:
         return 0.0
 
 
+def _ticker_key_to_pair(key: str, requested: dict):
+    """
+    Map a Ticker result key back to our canonical pair name.
+    Kraken answers with legacy names (XXBTZUSD, XETHZUSD) for some assets.
+    """
+    candidates = [key]
+    if len(key) == 8 and key[0] in "XZ" and key[4] in "XZ":
+        candidates.append(key[1:4] + key[5:])
+    for name in candidates:
+        if name in requested:
+            return requested[name]
+        if name in REVERSE_KRAKEN:
+            return REVERSE_KRAKEN[name]
+    return None
+
+
+def get_prices(pairs) -> dict:
+    """
+    Fetch mid-prices for many pairs in one Ticker request.
+    Returns {canonical pair: mid} — pairs Kraken did not quote are omitted.
+    """
+    requested = {PAIRMAP_KRAKEN.get(p, p.replace("/", "")): p for p in pairs if p}
+    if not requested:
+        return {}
+    try:
+        url = f"{KRAKEN_BASE_URL}/0/public/Ticker"
+        resp = http_pool.get("kraken", url, endpoint="price", params={"pair": ",".join(requested)})
+        data = resp.json()
+        if data.get("error"):
+            logger.warning(f"⚠️ Kraken ticker warnings: {data.get('error')}")
+
+        prices = {}
+        for key, quote in data.get("result", {}).items():
+            pair = _ticker_key_to_pair(key, requested)
+            if not pair:
+                logger.debug(f"Kraken ticker key not mapped: {key}")
+                continue
+            prices[pair] = (float(quote["a"][0]) + float(quote["b"][0])) / 2
+
+        logger.debug(f"✅ Kraken prices fetched for {len(prices)}/{len(requested)} pairs")
+        return prices
+    except Exception as e:
+        logger.error(f"❌ Kraken bulk price fetch failed: {e}")
+        return {}
+
+
 def place_order(pair, side, price=None, sl=None, tp=None, size=None, lot_size=None):
     """
     Mocked market order placement (supports both 'size' and 'lot_size').
+    With PAPER_TRADING on, the local fill engine fills it against quotes.
     """
     lot_size = lot_size or size or 0.01
     try:
+        if paper_broker.PAPER_TRADING:
+            order = paper_broker.place_order("kraken", pair, side, price, sl, tp, lot_size)
+            logger.info(f"🧾 Kraken paper order #{order['order_id']}: {side.upper()} {lot_size} {pair}")
+            return order
         logger.info(f"✅ Kraken Order Placed: {side.upper()} {lot_size} lot {pair} (mocked)")
         return {
             "status": "filled",
@@ -116,7 +192,7 @@ def place_order(pair, side, price=None, sl=None, tp=None, size=None, lot_size=No
 def ping():
     """Simple health check to confirm Kraken API responsiveness."""
     try:
-        r = requests.get(f"{KRAKEN_BASE_URL}/0/public/Time", timeout=5)
+        r = http_pool.get("kraken", f"{KRAKEN_BASE_URL}/0/public/Time", endpoint="ping")
         return r.status_code == 200
     except Exception as e:
         logger.warning(f"Kraken ping failed: {e}")
@@ -1,11 +1,13 @@
 import os
 import time
-import requests
 import logging
 
 from oandapyV20 import API
 from oandapyV20.endpoints.orders import OrderCreate
-from utils.pairmap import PAIRMAP_OANDA
+from utils import http_pool
+from utils.candle_decoder import decode_oanda
+from utils.pairmap import PAIRMAP_OANDA, REVERSE_OANDA
+from utils import paper_broker
 
 logger = logging.getLogger(__name__)
 
@@ -26,15 +28,25 @@ def normalize_oanda_pair(pair):
     return PAIRMAP_OANDA.get(pair.upper(), pair.replace("/", "_"))
 
 
-def fetch_candles(pair, timeframe="5m", count=100):
+def oanda_granularity(timeframe: str) -> str:
+    """'5m' / 'M5' → 'M5' (OANDA granularity)."""
+    granularity = timeframe.upper()
+    if granularity.endswith("M"):
+        granularity = "M" + granularity[:-1]
+    return granularity
+
+
+OANDA_MAX_PAGE = 5000  # max candles per /candles request
+
+
+def fetch_candles(pair, timeframe="5m", count=100, since=None):
     """
     Fetch OHLC candle data from OANDA.
     Timeframes: S5, S10, M1, M5, M15, M30, H1, H4, D, W, M
+    Pass `since` (epoch seconds) to fetch only bars from that timestamp on.
     """
     symbol = normalize_oanda_pair(pair)
-    granularity = timeframe.upper()
-    if granularity.endswith("M"):
-        granularity = "M" + granularity[:-1]
+    granularity = oanda_granularity(timeframe)
 
     url = f"{OANDA_BASE_URL}/instruments/{symbol}/candles"
     params = {
@@ -42,22 +54,13 @@ def fetch_candles(pair, timeframe="5m", count=100):
         "granularity": granularity,
         "price": "M"  # Midpoint price
     }
+    if since is not None:
+        params["from"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(int(since)))
 
     try:
-        res = requests.get(url, headers=HEADERS, params=params, timeout=10)
+        res = http_pool.get("oanda", url, endpoint="candles", headers=HEADERS, params=params)
         res.raise_for_status()
-        data = res.json()["candles"]
-        candles = [
-            {
-                "timestamp": int(time.mktime(time.strptime(c["time"][:19], "%Y-%m-%dT%H:%M:%S"))),
-                "open": float(c["mid"]["o"]),
-                "high": float(c["mid"]["h"]),
-                "low": float(c["mid"]["l"]),
-                "close": float(c["mid"]["c"]),
-                "volume": float(c["volume"]),
-            }
-            for c in data if c["complete"]
-        ]
+        candles = decode_oanda(res.json()["candles"]).to_ring()
         logger.info(f"✅ Normalized {len(candles)} candles for {pair} via OANDA ({symbol}, {granularity})")
         return candles
     except Exception as e:
@@ -65,6 +68,28 @@ def fetch_candles(pair, timeframe="5m", count=100):
         return []
 
 
+def fetch_candle_page(pair, timeframe, start, count=OANDA_MAX_PAGE):
+    """
+    One page of completed candles from `start` (epoch seconds) onward, for backfills.
+    Returns CandleArrays, or None when the request failed.
+    """
+    symbol = normalize_oanda_pair(pair)
+    params = {
+        "from": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(int(start))),
+        "count": min(int(count), OANDA_MAX_PAGE),
+        "granularity": oanda_granularity(timeframe),
+        "price": "M",
+    }
+    try:
+        res = http_pool.get("oanda", f"{OANDA_BASE_URL}/instruments/{symbol}/candles",
+                            endpoint="candles", headers=HEADERS, params=params)
+        res.raise_for_status()
+        return decode_oanda(res.json()["candles"])
+    except Exception as e:
+        logger.error(f"❌ OANDA candle page failed for {pair} @ {start} → {e}")
+        return None
+
+
 def get_price(pair):
     """Get latest bid/ask price and return midpoint"""
     symbol = normalize_oanda_pair(pair)
@@ -72,7 +97,7 @@ def get_price(pair):
     params = {"instruments": symbol}
 
     try:
-        res = requests.get(url, headers=HEADERS, params=params, timeout=10)
+        res = http_pool.get("oanda", url, endpoint="price", headers=HEADERS, params=params)
         res.raise_for_status()
         prices = res.json()["prices"][0]
         bid = float(prices["bids"][0]["price"])
@@ -85,12 +110,44 @@ def get_price(pair):
         return None
 
 
+def get_prices(pairs) -> dict:
+    """
+    Fetch mid-prices for many instruments in one /pricing request.
+    Returns {canonical pair: mid} — unlike get_price(), values are plain floats.
+    """
+    symbols = [normalize_oanda_pair(p) for p in pairs if p]
+    if not symbols:
+        return {}
+    url = f"{OANDA_BASE_URL}/accounts/{OANDA_ACCOUNT_ID}/pricing"
+    params = {"instruments": ",".join(symbols)}
+
+    try:
+        res = http_pool.get("oanda", url, endpoint="price", headers=HEADERS, params=params)
+        res.raise_for_status()
+        prices = {}
+        for quote in res.json().get("prices", []):
+            instrument = quote["instrument"]
+            bid = float(quote["bids"][0]["price"])
+            ask = float(quote["asks"][0]["price"])
+            prices[REVERSE_OANDA.get(instrument, instrument.replace("_", "/"))] = (bid + ask) / 2
+        logger.debug(f"OANDA prices fetched for {len(prices)}/{len(symbols)} instruments")
+        return prices
+    except Exception as e:
+        logger.error(f"❌ OANDA bulk price fetch failed → {e}")
+        return {}
+
+
 def place_order(pair, side, price=None, sl=None, tp=None, size=None, lot_size=None):
     """
     Simulated OANDA order (for DRY_RUN). Accepts both 'size' and 'lot_size'.
+    With PAPER_TRADING on, the local fill engine fills it against quotes.
     """
     lot_size = lot_size or size or 0.01
     try:
+        if paper_broker.PAPER_TRADING:
+            order = paper_broker.place_order("oanda", pair, side, price, sl, tp, lot_size)
+            logger.info(f"🧾 OANDA paper order #{order['order_id']}: {side.upper()} {lot_size} {pair}")
+            return {**order, "lot": lot_size}
         logger.info(f"✅ OANDA Order Placed: {side.upper()} {lot_size} lot {pair} (mocked)")
         return {
             "status": "filled",
@@ -117,7 +174,7 @@ def check_connection():
 
 
 # Exported for use in execute_trade()
-__all__ = ["fetch_candles", "get_price", "place_order", "oanda_api", "OrderCreate"]
+__all__ = ["fetch_candles", "fetch_candle_page", "get_price", "get_prices", "place_order", "oanda_api", "OrderCreate"]
 
 
 def ping():
@@ -127,7 +184,7 @@ def ping():
     """
     try:
         url = f"{OANDA_BASE_URL}/accounts/{OANDA_ACCOUNT_ID}/instruments"
-        res = requests.get(url, headers=HEADERS, timeout=5)
+        res = http_pool.get("oanda", url, endpoint="ping", headers=HEADERS)
         return res.status_code == 200
     except Exception as e:
         logger.warning(f"⚠️ OANDA ping failed: {e}")
@@ -38,9 +38,26 @@ def get_price(symbol: str) -> float:
         return 0.0
 
 
+# === Get Latest Prices (many symbols) ===
+def get_prices(symbols) -> dict:
+    """
+    Latest prices for many symbols → {symbol: price}.
+    tos_api has no multi-quote call yet, so this still costs one request per symbol.
+    """
+    prices = {}
+    for symbol in symbols:
+        price = get_price(symbol)
+        if price:
+            prices[symbol] = price
+    return prices
+
+
 # === Fetch Historical Candles ===
-def fetch_candles(symbol: str, timeframe: str = "5m", count: int = 100):
-    """Retrieve historical candles from Schwab/TD; fallback returns empty."""
+def fetch_candles(symbol: str, timeframe: str = "5m", count: int = 100, since=None):
+    """
+    Retrieve historical candles from Schwab/TD; fallback returns empty.
+    `since` is accepted for interface parity; the full window is always returned.
+    """
     try:
         candles = tos_api.fetch_candles(symbol, timeframe, count)
         logger.info(f"✅ Retrieved {len(candles)} candles from TOS for {symbol}")
@@ -111,4 +128,4 @@ def place_order(symbol, side, price=None, sl=None, tp=None,
 
 
 # === Exports ===
-__all__ = ["fetch_candles", "get_price", "place_order", "ping", "get_balance"]
+__all__ = ["fetch_candles", "get_price", "get_prices", "place_order", "ping", "get_balance"]
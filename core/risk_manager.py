@@ -1,9 +1,9 @@
 import logging
 import os
+import time
 
 MAX_TRADES_PER_HOUR = int(os.getenv("MAX_TRADES_PER_HOUR",60))
 
-from datetime import datetime, timedelta
 log = logging.getLogger(__name__)
 
 MAX_TRADES_PER_HOUR = 60
@@ -11,54 +11,82 @@ COOLDOWN_SECS = 180
 MAX_CONSECUTIVE_LOSSES = 3
 MAX_DAILY_DRAWDOWN_PCT = 0.10
 
-_trade_log, _last_trade_time = [], {}
-_consecutive_losses = 0
-_daily_start_balance = None
-_last_balance = None
+class RiskManager:
+    """Throttle, pair cooldown, loss streak and daily drawdown; `clock` gives epoch seconds (virtual in backtests)."""
 
-def init_daily_balance(balance):
-    global _daily_start_balance, _last_balance, _consecutive_losses
-    if _daily_start_balance is None:
-        _daily_start_balance = balance
-        _last_balance = balance
-        _consecutive_losses = 0
+    def __init__(self, clock=time.time, max_trades_per_hour=MAX_TRADES_PER_HOUR, cooldown_secs=COOLDOWN_SECS,
+                 max_consecutive_losses=MAX_CONSECUTIVE_LOSSES, max_daily_drawdown_pct=MAX_DAILY_DRAWDOWN_PCT):
+        self.clock = clock
+        self.max_trades_per_hour = max_trades_per_hour
+        self.cooldown_secs = cooldown_secs
+        self.max_consecutive_losses = max_consecutive_losses
+        self.max_daily_drawdown_pct = max_daily_drawdown_pct
+        self.trade_log, self.last_trade_time = [], {}
+        self.consecutive_losses = 0
+        self.daily_start_balance = None
+        self.last_balance = None
+
+    def init_daily_balance(self, balance):
+        if self.daily_start_balance is None:
+            self.new_day(balance)
+
+    def new_day(self, balance):
+        self.daily_start_balance = balance
+        self.last_balance = balance
+        self.consecutive_losses = 0
         log.info(f"[RiskManager] Daily baseline set at {balance:.2f}")
 
+    def can_trade(self):
+        now = self.clock()
+        self.trade_log = [t for t in self.trade_log if t > now - 3600]
+        if len(self.trade_log) >= self.max_trades_per_hour:
+            log.warning(f"[Throttle] Max {self.max_trades_per_hour}/hour reached.")
+            return False
+        self.trade_log.append(now)
+        return True
+
+    def can_trade_pair(self, pair):
+        now = self.clock()
+        if pair in self.last_trade_time:
+            delta = now - self.last_trade_time[pair]
+            if delta < self.cooldown_secs:
+                log.warning(f"[Cooldown] {pair} cooling down ({int(delta)}s/{self.cooldown_secs}s).")
+                return False
+        self.last_trade_time[pair] = now
+        return True
+
+    def record_trade_result(self, balance, previous_balance):
+        if previous_balance is None: self.last_balance = balance; return
+        if balance < previous_balance: self.consecutive_losses += 1
+        else: self.consecutive_losses = 0
+        self.last_balance = balance
+        if self.consecutive_losses >= self.max_consecutive_losses:
+            log.error(f"🛑 Trading paused — {self.consecutive_losses} consecutive losses.")
+            return False
+        return True
+
+    def check_daily_drawdown(self, balance):
+        if not self.daily_start_balance: return True
+        drawdown = 1 - (balance / self.daily_start_balance)
+        if drawdown >= self.max_daily_drawdown_pct:
+            log.error(f"🛑 Max daily drawdown reached ({drawdown:.2%}). Trading disabled.")
+            return False
+        return True
+
+# Live state (wall clock)
+_risk = RiskManager()
+
+def init_daily_balance(balance):
+    _risk.init_daily_balance(balance)
+
 def can_trade():
-    now = datetime.utcnow()
-    window = now - timedelta(hours=1)
-    recent = [t for t in _trade_log if t > window]
-    if len(recent) >= MAX_TRADES_PER_HOUR:
-        log.warning(f"[Throttle] Max {MAX_TRADES_PER_HOUR}/hour reached.")
-        return False
-    _trade_log.append(now)
-    return True
+    return _risk.can_trade()
 
 def can_trade_pair(pair):
-    now = datetime.utcnow()
-    if pair in _last_trade_time:
-        delta = (now - _last_trade_time[pair]).total_seconds()
-        if delta < COOLDOWN_SECS:
-            log.warning(f"[Cooldown] {pair} cooling down ({int(delta)}s/{COOLDOWN_SECS}s).")
-            return False
-    _last_trade_time[pair] = now
-    return True
+    return _risk.can_trade_pair(pair)
 
 def record_trade_result(balance, previous_balance):
-    global _consecutive_losses, _last_balance
-    if previous_balance is None: _last_balance = balance; return
-    if balance < previous_balance: _consecutive_losses += 1
-    else: _consecutive_losses = 0
-    _last_balance = balance
-    if _consecutive_losses >= MAX_CONSECUTIVE_LOSSES:
-        log.error(f"🛑 Trading paused — {_consecutive_losses} consecutive losses.")
-        return False
-    return True
+    return _risk.record_trade_result(balance, previous_balance)
 
 def check_daily_drawdown(balance):
-    if not _daily_start_balance: return True
-    drawdown = 1 - (balance / _daily_start_balance)
-    if drawdown >= MAX_DAILY_DRAWDOWN_PCT:
-        log.error(f"🛑 Max daily drawdown reached ({drawdown:.2%}). Trading disabled.")
-        return False
-    return True
+    return _risk.check_daily_drawdown(balance)
@@ -21,6 +21,9 @@ from core.risk_manager import (
     record_trade_result
 )
 from notify.notify import send_telegram
+from utils import http_pool
+from utils.price_snapshot import get_price_snapshot
+from utils import shm_quote_book
 from utils.safe_main_wrapper import run_safe
 from utils.score_engine import score_signal   # ← corrected
 
@@ -48,6 +51,8 @@ broker_name = sys.argv[1] if len(sys.argv) > 1 else os.getenv("DEFAULT_BROKER",
 broker = get_broker(broker_name)
 logger.info(f"🔄 Broker module loaded: {broker_name}")
 logger.info(f"🚀 ExtremeViper started | Broker={broker_name} | DRY_RUN={run_mode.upper() != 'LIVE'}")
+http_pool.prewarm([broker_name])
+shm_quote_book.get_writer(broker_name)  # this process is the broker's single quote writer
 
 # === Kill Switch (Always On) ===
 def kill_switch_monitor():
@@ -99,6 +104,8 @@ def generate_mock_signal():
         "volume_spike": volume_spike,
     }
 
+UNIVERSE = ["EUR/USD", "BTC/USD", "ETH/USD", "XAU/USD"]
+
 # === Core Trading Loop ===
 def main():
     balance = broker.get_balance()
@@ -108,9 +115,14 @@ def main():
         try:
             signal = generate_mock_signal()
             score = score_signal(signal)
-            pair = random.choice(["EUR/USD", "BTC/USD", "ETH/USD", "XAU/USD"])
+            pair = random.choice(UNIVERSE)
             side = "buy" if signal["rsi"] < 50 else "sell"
-            price = broker.get_price(pair)
+            # One bulk quote request per snapshot TTL instead of one per pair
+            price = get_price_snapshot(broker_name, UNIVERSE).get(pair)
+            if not price:
+                logger.warning(f"⚠️ No quote for {pair} via {broker_name.upper()}")
+                time.sleep(3)
+                continue
             tp = price * (1.002 if side == "buy" else 0.998)
             sl = price * (0.998 if side == "buy" else 1.002)
 
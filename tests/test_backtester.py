@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+from utils.backtester import Backtester
+
+START = 1_700_000_000 // 300 * 300
+
+
+def _walk(n=3_000, seed=3):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 2e-3, n)))
+    open_ = np.r_[close[0], close[:-1]]
+    spread = np.abs(rng.normal(0, 1e-3, n)) * close
+    return pd.DataFrame({
+        "timestamp": START + 300 * np.arange(n), "open": open_,
+        "high": np.maximum(open_, close) + spread, "low": np.minimum(open_, close) - spread,
+        "close": close, "volume": rng.lognormal(0, 0.5, n),
+    })
+
+
+def _tester(**kwargs):
+    return Backtester("oanda", "M5", window=60, balance=1_000, min_score=0, threshold_fn=lambda s: 0,
+                      control_kwargs={"cooldown": 0}, risk_kwargs={"max_daily_drawdown_pct": 10.0,
+                                                                   "max_consecutive_losses": 10_000},
+                      **kwargs)
+
+
+def test_blown_account_stops_trading():
+    result = _tester(lot_fn=lambda score, broker: 2_000).run({"SYN/USD": _walk()})
+    stats, trades = result["stats"], result["trades"]
+    assert stats["blown"]
+    blown_at = trades.loc[trades["reason"] == "blown", "exit_time"]
+    last_close = blown_at.iloc[0] if len(blown_at) else trades["exit_time"].max()
+    assert (trades["entry_time"] <= last_close).all()          # nothing entered after the blow-up
+    assert trades["exit_time"].max() == last_close
+
+
+def test_small_account_is_not_blown():
+    stats = _tester(lot_fn=lambda score, broker: 1).run({"SYN/USD": _walk()})["stats"]
+    assert stats["trades"] and not stats["blown"]
+    assert 0 <= stats["max_drawdown"] < 1
+
+
+def test_cross_pnl_is_converted_to_usd():
+    walk = _walk()
+    jpy = walk.copy()
+    for col in ("open", "high", "low", "close"):
+        jpy[col] = walk[col] * 1.5      # EUR/JPY around 150
+    usdjpy = walk.copy()
+    for col in ("open", "high", "low", "close"):
+        usdjpy[col] = 150.0
+    trades = _tester(lot_fn=lambda score, broker: 1).run({"EUR/JPY": jpy, "USD/JPY": usdjpy})["trades"]
+    cross = trades[trades["pair"] == "EUR/JPY"].iloc[0]
+    sign = 1 if cross["side"] == "buy" else -1
+    assert np.isclose(cross["pnl"], (cross["exit"] - cross["entry"]) * sign / 150.0)
@@ -0,0 +1,46 @@
+import math
+
+from utils.bar_builder import BarBuilder
+from utils.candle_store import CandleRing
+from utils.score_engine import score_signal
+
+BAR = 300  # M5, Kraken buckets are anchored at UTC midnight
+T0 = 1_700_000_000 // BAR * BAR
+
+
+def _broker_ring(n, volume=1_000.0):
+    ring = CandleRing(100)
+    for i in range(n):
+        ring.append_bar(T0 + i * BAR, 1.0, 1.0, 1.0, 1.0 + i * 1e-4, volume)
+    return ring
+
+
+def test_local_bars_keep_ticks_apart_from_volume():
+    builder = BarBuilder("kraken", "XBT/USD", "M5", capacity=100)
+    for k in range(5):
+        builder.on_quote(1.0 + k * 1e-4, T0 + k)
+    closed = builder.on_quote(1.1, T0 + BAR)
+    assert len(closed) == 1
+    assert math.isnan(builder.window.volumes[-1])
+    assert list(builder.ticks) == [(T0, 5)]
+
+
+def test_mixed_window_has_no_volume_spike_until_reconciled():
+    builder = BarBuilder("kraken", "XBT/USD", "M5", capacity=100)
+    builder.reconcile(_broker_ring(40))
+    # A burst of ticks on the next bar would be a "spike" against broker units
+    for k in range(5_000):
+        builder.on_quote(1.004, T0 + 40 * BAR + k % BAR)
+    builder.on_quote(1.004, T0 + 41 * BAR)
+    window = builder.window
+    assert math.isnan(window.volumes[-1]) and not math.isnan(window.volumes[-2])
+
+    # Scores as if no volume spike: same as the window with flat volumes
+    flat = [{**c, "volume": 1.0} for c in window]
+    expected = score_signal({"pair": "XBT/USD", "candles": flat})
+    assert score_signal({"pair": "XBT/USD", "candles": list(window)}) == expected
+    assert score_signal({"pair": "XBT/USD", "candles": window}) == expected
+
+    # Broker candles replace the local bar, volume included
+    builder.reconcile(_broker_ring(41))
+    assert builder.window.volumes[-1] == 1_000.0
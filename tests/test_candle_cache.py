@@ -0,0 +1,45 @@
+import time
+
+from utils import candle_cache as cc
+
+
+class FakeBroker:
+    def __init__(self, bars):
+        self.bars = bars
+        self.reply = None
+
+    def fetch_candles(self, pair, timeframe, count, since=None):
+        if since is None:
+            return self.bars
+        return self.reply
+
+    def fetch_candles_batch(self, pairs, timeframe, count, since=None):
+        return {pair: self.fetch_candles(pair, timeframe, count, since) for pair in pairs}
+
+
+def _bars(last_ts, n=5):
+    return [{"timestamp": last_ts - 300 * (n - 1 - i), "open": 1.0, "high": 1.0, "low": 1.0,
+             "close": 1.0, "volume": 1.0} for i in range(n)]
+
+
+def _cache(monkeypatch, last_ts):
+    broker = FakeBroker(_bars(last_ts))
+    monkeypatch.setattr(cc, "get_broker", lambda name: broker)
+    cache = cc.CandleCache(window=10, history=None)
+    cache.fetch("oanda", "EUR/USD", "M5")
+    return cache, broker
+
+
+def test_empty_refresh_is_stale_when_a_bar_is_due(monkeypatch):
+    cache, broker = _cache(monkeypatch, int(time.time()) // 300 * 300 - 600)
+    broker.reply = []
+    cache.fetch("oanda", "EUR/USD", "M5")
+    cache.fetch_batch("oanda", ["EUR/USD"], "M5")
+    assert cache.stats["stale"] == 2 and cache.stats["incremental"] == 0
+
+
+def test_empty_refresh_inside_the_open_bar_is_not_a_failure(monkeypatch):
+    cache, broker = _cache(monkeypatch, int(time.time()))
+    broker.reply = []
+    cache.fetch("oanda", "EUR/USD", "M5")
+    assert cache.stats["stale"] == 0 and cache.stats["incremental"] == 1
@@ -0,0 +1,19 @@
+from utils.indicator_cache import IndicatorCache
+
+BAR = 300  # M5
+
+
+def test_open_bar_feed_expires_at_bar_close():
+    # Kraken-style: the newest candle is still forming
+    cache = IndicatorCache()
+    cache.put("kraken", "XBT/USD", "M5", 1_000 * BAR, "sig", now=1_000 * BAR + 60)
+    assert cache.current("kraken", "XBT/USD", "M5", now=1_000 * BAR + 299) == "sig"
+    assert cache.current("kraken", "XBT/USD", "M5", now=1_001 * BAR) is None
+
+
+def test_closed_bar_feed_is_served_until_next_close():
+    # OANDA-style: only complete candles, so the newest one closed at bar_ts + 1 bar
+    cache = IndicatorCache()
+    cache.put("oanda", "EUR_USD", "M5", 1_000 * BAR, "sig", now=1_001 * BAR + 5)
+    assert cache.current("oanda", "EUR_USD", "M5", now=1_001 * BAR + 200) == "sig"
+    assert cache.current("oanda", "EUR_USD", "M5", now=1_002 * BAR) is None
@@ -0,0 +1,139 @@
+import time
+import types
+import threading
+
+from utils.order_pipeline import OrderPipeline
+from utils.trade_control_logger import TradeControl
+
+
+class GatedBroker:
+    """place_order blocks until released and records how many calls overlap."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.lock = threading.Lock()
+        self.running = self.peak = 0
+        self.started = threading.Semaphore(0)
+
+    def place_order(self, symbol, side, price=None, sl=None, tp=None, size=None, lot_size=None):
+        with self.lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        self.started.release()
+        self.release.wait(5)
+        with self.lock:
+            self.running -= 1
+        return {"symbol": symbol, "side": side, "lot_size": lot_size}
+
+
+def _pipeline(broker, **kwargs):
+    control = TradeControl(cooldown=60, log_path=None)
+    pipeline = OrderPipeline(resolve=lambda name: broker, control=control, **kwargs)
+    return pipeline, control
+
+
+def test_place_order_gets_pair_and_side_positionally():
+    # Alpaca / TOS name the first argument `symbol`, not `pair`
+    def place_order(symbol, side, price=None, sl=None, tp=None, size=None, lot_size=None):
+        return {"symbol": symbol, "side": side, "lot_size": lot_size}
+
+    events = []
+    pipeline, _ = _pipeline(types.SimpleNamespace(place_order=place_order))
+    pipeline.add_stage("collect", events.append)
+    assert pipeline.enqueue("alpaca", "AAPL", "buy", price=100.0, lot_size=2) is not None
+    pipeline.close(timeout=5)
+
+    assert events[0]["error"] is None
+    assert events[0]["result"] == {"symbol": "AAPL", "side": "buy", "lot_size": 2}
+
+
+class _WatchedActive(dict):
+    """_active that records, at release time, whether the pair was already cooling down."""
+
+    def __init__(self, control):
+        super().__init__()
+        self.control = control
+        self.cooling_at_release = []
+
+    def pop(self, key, default=None):
+        broker, pair = key
+        self.cooling_at_release.append(self.control.is_in_cooldown(pair, broker))
+        return super().pop(key, default)
+
+
+def test_pair_is_in_cooldown_before_it_stops_being_busy():
+    broker = GatedBroker()
+    pipeline, control = _pipeline(broker)
+    pipeline._active = watched = _WatchedActive(control)
+    stage_gate = threading.Event()
+    pipeline.add_stage("trade_log", lambda event: stage_gate.wait(5))   # backed-up stage
+
+    assert pipeline.enqueue("kraken", "XBT/USD", "buy", lot_size=1) is not None
+    assert pipeline.busy("XBT/USD", "kraken")
+    assert not control.is_in_cooldown("XBT/USD", "kraken")
+    broker.release.set()
+    for _ in range(500):
+        if not pipeline.busy("XBT/USD", "kraken"):
+            break
+        time.sleep(0.01)
+
+    assert watched.cooling_at_release == [True]
+    assert control.is_in_cooldown("XBT/USD", "kraken")   # the stage has not run yet
+    stage_gate.set()
+    pipeline.close(timeout=5)
+
+
+def test_second_order_for_a_busy_pair_is_rejected():
+    broker = GatedBroker()
+    pipeline, _ = _pipeline(broker)
+    assert pipeline.enqueue("kraken", "XBT/USD", "buy") is not None
+    assert pipeline.enqueue("kraken", "XBT/USD", "sell") is None
+    assert pipeline.stats["rejected"] == 1
+    broker.release.set()
+    pipeline.close(timeout=5)
+
+
+def test_backlog_is_capped_per_broker():
+    broker = GatedBroker()
+    pipeline, _ = _pipeline(broker, max_in_flight=1, queue_max=2)
+    assert pipeline.enqueue("kraken", "A", "buy") is not None
+    assert pipeline.enqueue("kraken", "B", "buy") is not None
+    assert pipeline.enqueue("kraken", "C", "buy") is None          # kraken backlog full
+    assert pipeline.enqueue("oanda", "EUR_USD", "buy") is not None  # other brokers unaffected
+    assert pipeline.pending() == 3
+    broker.release.set()
+    pipeline.close(timeout=5)
+    assert pipeline.pending() == 0 and pipeline.stats["filled"] == 3
+
+
+def test_in_flight_limit_per_broker(monkeypatch):
+    monkeypatch.setenv("ORDER_MAX_IN_FLIGHT_KRAKEN", "2")
+    broker = GatedBroker()
+    pipeline, _ = _pipeline(broker, max_in_flight=4)
+    for pair in ("A", "B", "C", "D", "E"):
+        pipeline.enqueue("kraken", pair, "buy")
+    assert broker.started.acquire(timeout=5) and broker.started.acquire(timeout=5)
+    assert not broker.started.acquire(timeout=0.2)    # a third call waits for a free slot
+    assert broker.running == 2
+    broker.release.set()
+    pipeline.close(timeout=5)
+    assert broker.peak == 2 and pipeline.stats["filled"] == 5
+
+
+def test_cancel_pending_drops_queued_orders_only():
+    broker = GatedBroker()
+    pipeline, control = _pipeline(broker, max_in_flight=1)
+    events = []
+    pipeline.add_stage("collect", events.append)
+    pipeline.enqueue("kraken", "A", "buy")
+    assert broker.started.acquire(timeout=5)          # A reached the broker
+    pipeline.enqueue("kraken", "B", "buy")
+    pipeline.enqueue("kraken", "C", "buy")
+
+    assert pipeline.cancel_pending() == 2
+    assert not pipeline.busy("B", "kraken") and not control.is_in_cooldown("B", "kraken")
+    broker.release.set()
+    pipeline.close(timeout=5)
+    outcome = {e["pair"]: e["error"] for e in events}
+    assert outcome == {"A": None, "B": "cancelled", "C": "cancelled"}
+    assert pipeline.stats["cancelled"] == 2 and pipeline.stats["filled"] == 1
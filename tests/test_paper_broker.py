@@ -0,0 +1,60 @@
+# tests/test_paper_broker.py
+# Paper fill engine: side-oriented SL / TP (signals always carry low = stop_loss, high = take_profit)
+
+from utils.quote_store import QuoteStore
+from utils.paper_broker import PaperBroker
+
+
+def _engine():
+    store, closed = QuoteStore(), []
+    engine = PaperBroker(store=store, spread_bps=0, slippage_bps=0, latency_ms=0, on_close=closed.append).start()
+    return store, engine, closed
+
+
+def test_short_is_not_stopped_on_its_own_fill():
+    store, engine, closed = _engine()
+    store.update("oanda", "EUR/USD", 1.0999, 1.1001, ts=1)
+    order = engine.submit("oanda", "EUR/USD", "sell", 1.1, sl=1.0990, tp=1.1020, lot_size=1000, ts=1)
+
+    assert (order["sl"], order["tp"]) == (1.1020, 1.0990)   # stop above, target below for a sell
+    assert engine.open_count() == 1 and not closed
+
+
+def test_short_closes_at_target_below_and_stop_above():
+    store, engine, closed = _engine()
+    store.update("oanda", "EUR/USD", 1.0999, 1.1001, ts=1)
+    engine.submit("oanda", "EUR/USD", "sell", 1.1, sl=1.0990, tp=1.1020, lot_size=1000, ts=1)
+    store.update("oanda", "EUR/USD", 1.0985, 1.0987, ts=2)
+    assert closed[-1]["reason"] == "target" and closed[-1]["profit_usd"] > 0
+
+    engine.submit("oanda", "EUR/USD", "sell", 1.0986, sl=1.0970, tp=1.1000, lot_size=1000, ts=2)
+    store.update("oanda", "EUR/USD", 1.1001, 1.1003, ts=4)
+    assert closed[-1]["reason"] == "stop" and closed[-1]["profit_usd"] < 0
+
+
+def test_level_on_wrong_side_of_fill_is_ignored():
+    store, engine, closed = _engine()
+    store.update("oanda", "EUR/USD", 1.0999, 1.1001, ts=1)
+    engine.submit("oanda", "EUR/USD", "buy", 1.1, sl=1.1010, lot_size=1000, ts=1)
+    assert engine.open_count() == 1 and not closed
+    assert engine.open_positions()[0]["sl"] != engine.open_positions()[0]["sl"]   # NaN → never triggers
+
+
+def _yen_target(store, engine):
+    store.update("oanda", "EUR/JPY", 159.99, 160.01, ts=1)
+    engine.submit("oanda", "EUR/JPY", "buy", 160.0, sl=159.0, tp=161.0, lot_size=1000, ts=1)
+    store.update("oanda", "EUR/JPY", 161.5, 161.52, ts=2)     # ask 160.01 → bid 161.5: +1490 JPY
+
+
+def test_cross_pnl_uses_the_conversion_quote():
+    store, engine, closed = _engine()
+    store.update("oanda", "USD/JPY", 149.99, 150.01, ts=1)
+    _yen_target(store, engine)
+    assert closed[-1]["profit_usd"] == 9.93                   # 1490 / 150
+
+
+def test_cross_pnl_without_conversion_quote_is_not_booked_as_usd(monkeypatch):
+    monkeypatch.setenv("USD_RATE_JPY", "0.0064")
+    store, engine, closed = _engine()
+    _yen_target(store, engine)
+    assert closed[-1]["profit_usd"] == 9.54                   # static rate, not 1490 "USD"
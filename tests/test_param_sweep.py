@@ -0,0 +1,21 @@
+from utils.param_sweep import Leaderboard, prune
+
+
+def _stats(pnl, drawdown, blown=False):
+    return {"trades": 10, "pnl": pnl, "max_drawdown": drawdown, "blown": blown}
+
+
+def test_prune_drops_blown_configs():
+    stats = {0: _stats(900.0, 1.92, blown=True), 1: _stats(50.0, 0.2), 2: _stats(10.0, 0.3), 3: _stats(5.0, 1.0)}
+    assert prune(stats, keep=0.25) == [1]
+    assert prune({0: _stats(900.0, 1.2, blown=True)}, keep=1.0) == []
+
+
+def test_leaderboard_ranks_blown_configs_last():
+    board = Leaderboard()
+    board.add(0, {"min_score": 4}, 0, _stats(900.0, 1.92, blown=True))
+    board.add(1, {"min_score": 5}, 0, _stats(50.0, 0.2))
+    board.add(2, {"min_score": 6}, 0, _stats(80.0, 0.4))
+    table = board.table()
+    assert table["config"].tolist() == [2, 1, 0]
+    assert table["feasible"].tolist() == [True, True, False]
@@ -0,0 +1,18 @@
+import numpy as np
+
+from utils.candle_store import CandleRing
+from utils.score_engine import score_signal
+
+
+def test_ring_score_matches_list_score_while_the_ring_slides():
+    rng = np.random.default_rng(7)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 2e-3, 600)))
+    volumes = rng.lognormal(0, 0.6, 600)
+    ring = CandleRing(100)
+    for i, (c, v) in enumerate(zip(closes, volumes)):
+        ring.append_bar(1_700_000_000 + i * 300, c, c * 1.001, c * 0.999, c, v)
+        if i >= 30:
+            candles = list(ring)
+            assert score_signal({"pair": "EUR_USD", "candles": ring}) == score_signal(
+                {"pair": "EUR_USD", "candles": candles}
+            ), f"bar {i}"
@@ -1,3 +1,5 @@
+import numpy as np
+
 from utils.timeframe import TIMEFRAME_MINUTES
 
 def get_adaptive_score_threshold(signal: dict) -> float:
@@ -5,10 +7,13 @@ def get_adaptive_score_threshold(signal: dict) -> float:
     Dynamically adjust score threshold based on volume spike, time of day, and other metrics.
     """
     vol = signal.get("volume_spike", 1.0)
-    hour = int(signal.get("timestamp", 0)) % 24 if signal.get("timestamp") else 0
+    # Epoch seconds → UTC hour of day
+    hour = int(signal.get("timestamp", 0)) // 3600 % 24 if signal.get("timestamp") else 0
     base = 5.5
 
-    if vol > 2.0:
+    # A ratio (> 2.0 is a spike) or score_engine's already-thresholded flag
+    spike = bool(vol) if isinstance(vol, (bool, np.bool_)) else vol > 2.0
+    if spike:
         base -= 0.2
     if 7 <= hour <= 11 or 13 <= hour <= 16:
         base -= 0.2
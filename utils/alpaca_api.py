@@ -1,4 +1,5 @@
-import os, requests, time, logging
+import os, time, logging
+from utils import http_pool
 
 ALPACA_KEY = os.getenv("ALPACA_API_KEY")
 ALPACA_SECRET = os.getenv("ALPACA_SECRET_KEY")
@@ -18,7 +19,7 @@ def get_price(pair):
     try:
         symbol = normalize_symbol(pair)
         url = f"{ALPACA_BASE_URL}/{symbol}/quotes/latest"
-        r = requests.get(url, headers=HEADERS, timeout=10)
+        r = http_pool.get("alpaca", url, endpoint="price", headers=HEADERS)
 
         if r.status_code == 429:
             logging.warning("⏳ Alpaca rate limit hit, sleeping 5s...")
@@ -0,0 +1,182 @@
+# =====================================================
+# utils/backfill.py
+# v1.0 — Parallel historical candle downloader → Parquet archive
+# =====================================================
+#
+# Pages each broker's candle endpoint (brokers.<name>.fetch_candle_page) from a
+# start time forward, one worker per pair, with a shared per-broker rate
+# limit. Ranges already in the archive are skipped: only the head, the tail
+# and interior gaps are requested. Overlapping pages are deduplicated when
+# written. Gaps that are still open after the fill are reported (weekends and
+# market holidays on OANDA/Alpaca stay open by nature).
+#
+# Usage:
+#   python -m utils.backfill --broker oanda --timeframe M5 --days 30 [--pairs EUR/USD,GBP/USD]
+
+import os
+import time
+import logging
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+from broker import get_broker
+from utils.pairmap import PAIRMAP_OANDA, PAIRMAP_KRAKEN, PAIRMAP_ALPACA
+from utils.timeframe import parse_timeframe_minutes
+from utils.candle_archive import candle_archive, frame_from_arrays, find_gaps, normalize_frame
+
+logger = logging.getLogger(__name__)
+
+# Requests per second per broker (OANDA allows ~100/s, Kraken public ~1/s, Alpaca 200/min)
+BACKFILL_RATE = {
+    "oanda": float(os.getenv("BACKFILL_RATE_OANDA", 20)),
+    "kraken": float(os.getenv("BACKFILL_RATE_KRAKEN", 1)),
+    "alpaca": float(os.getenv("BACKFILL_RATE_ALPACA", 3)),
+}
+BACKFILL_WORKERS = int(os.getenv("BACKFILL_WORKERS", 8))
+BACKFILL_PAGE_SIZE = {"oanda": 5000, "kraken": 720, "alpaca": 10000}
+
+BROKER_PAIRS = {"oanda": PAIRMAP_OANDA, "kraken": PAIRMAP_KRAKEN, "alpaca": PAIRMAP_ALPACA}
+
+
+class RateLimiter:
+    """Thread-safe pacing: at most `rate` acquisitions per second across all workers."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next, now)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def missing_ranges(existing_ts, start: int, end: int, bar_seconds: int) -> list:
+    """[(from, to)] spans of [start, end] not covered by the archived timestamps."""
+    ts = [t for t in existing_ts if start <= t <= end]
+    if not ts:
+        return [(start, end)]
+    ranges = []
+    if ts[0] - start >= bar_seconds:
+        ranges.append((start, ts[0] - 1))
+    ranges += [(a, b - 1) for a, b in find_gaps(ts, bar_seconds)]
+    if end - ts[-1] >= bar_seconds:
+        ranges.append((ts[-1] + bar_seconds, end))
+    return ranges
+
+
+def _fetch_range(module, broker, pair, timeframe, start, end, bar_seconds, limiter, page_size):
+    """Page forward from start until end (or the broker runs out); returns (frames, requests)."""
+    frames, cursor, requests_made = [], start, 0
+    while cursor <= end:
+        # Never ask for more bars than the span holds; small interior gaps stay cheap
+        want = min(page_size, (end - cursor) // bar_seconds + 1)
+        limiter.acquire()
+        page = module.fetch_candle_page(pair, timeframe, cursor, want)
+        requests_made += 1
+        if page is None:
+            raise RuntimeError(f"{broker.upper()} page request failed for {pair} @ {cursor}")
+        if not len(page):
+            break
+        frames.append(frame_from_arrays(page))
+        last = int(page.timestamp[-1])
+        if last < cursor:
+            break
+        cursor = last + bar_seconds
+    return frames, requests_made
+
+
+def backfill_pair(broker: str, pair: str, timeframe: str, start: int, end: int,
+                  limiter: RateLimiter = None, archive=candle_archive) -> dict:
+    """Download whatever the archive lacks for one pair in [start, end] and write it."""
+    broker = broker.lower()
+    module = get_broker(broker)
+    bar_seconds = parse_timeframe_minutes(timeframe) * 60
+    limiter = limiter or RateLimiter(BACKFILL_RATE.get(broker, 1))
+    page_size = BACKFILL_PAGE_SIZE.get(broker, 1000)
+
+    existing = archive.load(broker, pair, timeframe, start, end, columns=[])["timestamp"].tolist()
+    ranges = missing_ranges(existing, start, end, bar_seconds)
+
+    frames, requests_made = [], 0
+    for lo, hi in ranges:
+        got, n = _fetch_range(module, broker, pair, timeframe, lo, hi, bar_seconds, limiter, page_size)
+        frames += got
+        requests_made += n
+
+    added = 0
+    if frames:
+        df = normalize_frame(pd.concat(frames, ignore_index=True))
+        df = df[(df["timestamp"] >= start) & (df["timestamp"] <= end)]
+        added = archive.write(broker, pair, timeframe, df)
+
+    final = archive.load(broker, pair, timeframe, start, end, columns=[])["timestamp"]
+    gaps = find_gaps(final, bar_seconds)
+    return {
+        "pair": pair,
+        "ranges": len(ranges),
+        "requests": requests_made,
+        "added": added,
+        "bars": len(final),
+        "open_gaps": len(gaps),
+    }
+
+
+def backfill(broker: str, pairs=None, timeframe: str = "M5", start: int = None, end: int = None,
+             days: float = 30, workers: int = BACKFILL_WORKERS, archive=candle_archive) -> list:
+    """
+    Backfill many pairs in parallel for one broker. All workers share the
+    broker's rate limiter. Returns one result dict per pair; failed pairs
+    carry an "error" key.
+    """
+    broker = broker.lower()
+    pairs = list(pairs or BROKER_PAIRS.get(broker, {}))
+    end = int(end or time.time())
+    start = int(start or end - days * 86400)
+    limiter = RateLimiter(BACKFILL_RATE.get(broker, 1))
+
+    logger.info(f"📥 Backfilling {len(pairs)} {broker.upper()} pairs {timeframe} "
+                f"{pd.Timestamp(start, unit='s')} → {pd.Timestamp(end, unit='s')} ({workers} workers)")
+    results = []
+    began = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix=f"backfill-{broker}") as pool:
+        futures = {pool.submit(backfill_pair, broker, p, timeframe, start, end, limiter, archive): p for p in pairs}
+        for fut in as_completed(futures):
+            pair = futures[fut]
+            try:
+                r = fut.result()
+                logger.info(f"✅ {pair}: +{r['added']} bars ({r['bars']} total, {r['requests']} requests, "
+                            f"{r['open_gaps']} open gaps)")
+            except Exception as e:
+                r = {"pair": pair, "error": str(e)}
+                logger.error(f"❌ Backfill failed for {pair}: {e}")
+            results.append(r)
+    logger.info(f"📦 Backfill done in {time.perf_counter() - began:.1f}s")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill historical candles into the Parquet archive")
+    parser.add_argument("--broker", required=True, choices=sorted(BROKER_PAIRS))
+    parser.add_argument("--pairs", help="comma-separated pairs (default: every mapped pair)")
+    parser.add_argument("--timeframe", default="M5")
+    parser.add_argument("--days", type=float, default=30)
+    parser.add_argument("--workers", type=int, default=BACKFILL_WORKERS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    pairs = args.pairs.split(",") if args.pairs else None
+    backfill(args.broker, pairs, args.timeframe, days=args.days, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,390 @@
+# =====================================================
+# utils/backtester.py
+# v1.0 — Backtests over archived candles with the live decision code
+# =====================================================
+#
+# Two stages:
+#   1. Vectorized signals: every bar of every pair is scored with
+#      score_engine.score_series, i.e. score_batch on the CANDLE_WINDOW bars
+#      ending at that bar. That is the same window, rule table and
+#      thresholds the cycle loops score. Side and SL/TP levels follow
+#      signal_fetcher (side from the last close change, levels from the 5-bar
+#      low/high range). The stop goes on the adverse side of that range, or
+#      at a fixed stop_loss_pct / take_profit_pct from entry when those are set.
+#      The rule-table features are kept per bar, so rescore() can re-score a
+#      pair under other weights without recomputing any indicator.
+#   2. Event-driven fills: candidates are replayed in time order on a virtual
+#      clock through the live gates: get_adaptive_score_threshold (given the
+#      bar's volume-spike flag and the decision time, so its volume and
+#      session adjustments apply), calculate_lot_size,
+#      trade_control_logger.TradeControl (cooldown, duplicate) and
+#      core.risk_manager.RiskManager (loss streak, daily drawdown, reset at
+#      each UTC day; a loss streak or the drawdown limit pauses entries until
+#      the next day). An accepted trade enters at the signal bar's close and
+#      is resolved bar by bar over the next BACKTEST_MAX_HOLD_BARS. It exits
+#      at the stop or target (gaps fill at the open; the stop wins when both
+#      are hit in one bar) or at the last close on timeout. Balance changes
+#      when exits are reached on the clock. PnL is converted from the quote
+#      currency to USD at the exit (pairmap.quote_to_usd, using the
+#      conversion pair's close from the same universe, else the static rate).
+#      Risk checks use equity: balance plus the open positions marked at the
+#      last closed bar. Once equity falls to BACKTEST_MIN_EQUITY (default 0)
+#      the account is blown: open trades are closed at that mark (reason
+#      "blown", like a margin closeout), the run stops, and the stats report
+#      blown=True. max_drawdown is measured on that equity.
+#
+# One position per pair at a time. Results: trade list, equity curve, stats.
+#
+# Usage:
+#   python -m utils.backtester --broker oanda --timeframe M5 --days 365 [--pairs EUR/USD,GBP/USD]
+
+import os
+import heapq
+import logging
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from utils.timeframe import TIMEFRAME, parse_timeframe_minutes
+from utils.candle_cache import CANDLE_WINDOW
+from utils.candle_archive import candle_archive
+from utils.pairmap import asset_class, quote_to_usd
+from utils.score_engine import series_features
+from utils.scoring_rules import rule_book
+from utils.adaptive_throttle import get_adaptive_score_threshold
+from utils.risk_manager import calculate_lot_size
+from utils.trade_control_logger import TradeControl
+from core.risk_manager import RiskManager
+
+logger = logging.getLogger(__name__)
+
+BACKTEST_BALANCE = float(os.getenv("BACKTEST_BALANCE", 10_000))
+BACKTEST_MAX_HOLD_BARS = int(os.getenv("BACKTEST_MAX_HOLD_BARS", 288))
+BACKTEST_MIN_SCORE = float(os.getenv("BACKTEST_MIN_SCORE", 3.5))   # floor of the adaptive threshold
+BACKTEST_MIN_EQUITY = float(os.getenv("BACKTEST_MIN_EQUITY", 0.0))  # account blown at or below this
+SLTP_LOOKBACK = 5
+FEATURES = ("rsi", "macd_hist", "ema_slope", "volume_spike")
+
+
+class VirtualClock:
+    """Epoch seconds set by the replay loop; passed to the live gates as their clock."""
+
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _arrays(candles) -> dict:
+    """DataFrame / CandleRing / dict of columns → dict of NumPy columns sorted by time."""
+    if isinstance(candles, pd.DataFrame):
+        candles = candles.sort_values("timestamp")
+        return {k: candles[k].to_numpy() for k in ("timestamp", "open", "high", "low", "close", "volume")}
+    if hasattr(candles, "timestamps"):
+        o, h, l, c, v = candles.columns()
+        return {"timestamp": candles.timestamps, "open": o, "high": h, "low": l, "close": c, "volume": v}
+    return {k: np.asarray(v) for k, v in candles.items()}
+
+
+def rescore(sig: dict, window: int, table=None) -> np.ndarray:
+    """Per-bar scores from a signal dict's feature columns (`table`: a scoring_rules.CompiledTable)."""
+    features = {name: sig[name] for name in FEATURES}
+    score = (table or rule_book.table(asset_class(sig.get("pair")))).evaluate(features)
+    score = np.array(score, dtype=np.float64, ndmin=1)
+    score[:window - 1] = 0.0    # no full window yet
+    return score
+
+
+def signal_arrays(candles, window: int = CANDLE_WINDOW, pair: str = None, table=None) -> dict:
+    """Per-bar features, score, side (+1 buy / -1 sell), stop and target for one pair."""
+    bars = _arrays(candles)
+    close, high, low = (np.asarray(bars[k], dtype=np.float64) for k in ("close", "high", "low"))
+    n = len(close)
+    features = {name: np.zeros(n) for name in FEATURES}
+    for name, values in series_features(close, bars["volume"], window).items():
+        features[name][window - 1:] = values
+    sig = {**bars, **features, "pair": pair}
+    score = rescore(sig, window, table) if n else np.zeros(0)
+    side = np.where(np.r_[False, close[1:] > close[:-1]], 1, -1)
+    lo = np.full(n, np.nan)
+    hi = np.full(n, np.nan)
+    if n >= SLTP_LOOKBACK:
+        lo[SLTP_LOOKBACK - 1:] = np.lib.stride_tricks.sliding_window_view(low, SLTP_LOOKBACK).min(axis=1)
+        hi[SLTP_LOOKBACK - 1:] = np.lib.stride_tricks.sliding_window_view(high, SLTP_LOOKBACK).max(axis=1)
+    return {
+        **bars,
+        **features,
+        "score": score,
+        "side": side,
+        "stop": np.where(side > 0, lo, hi),
+        "target": np.where(side > 0, hi, lo),
+        "sl": lo,
+        "tp": hi,
+    }
+
+
+def resolve_exit(bars: dict, i: int, side: int, stop: float, target: float, max_hold: int):
+    """(exit bar index, exit price, reason) for a trade entered at bar i's close."""
+    end = min(len(bars["close"]), i + 1 + max_hold)
+    if end <= i + 1:
+        return i, float(bars["close"][i]), "end"
+    o, h, l = bars["open"][i + 1:end], bars["high"][i + 1:end], bars["low"][i + 1:end]
+    if side > 0:
+        hit_stop, hit_target = l <= stop, h >= target
+    else:
+        hit_stop, hit_target = h >= stop, l <= target
+    hits = hit_stop | hit_target
+    if not hits.any():
+        return end - 1, float(bars["close"][end - 1]), "timeout" if end - i - 1 == max_hold else "end"
+    k = int(hits.argmax())
+    open_k = float(o[k])
+    if hit_stop[k]:
+        gapped = open_k <= stop if side > 0 else open_k >= stop
+        return i + 1 + k, open_k if gapped else float(stop), "stop"
+    gapped = open_k >= target if side > 0 else open_k <= target
+    return i + 1 + k, open_k if gapped else float(target), "target"
+
+
+class Backtester:
+    """Replays archived candles for one broker through the live scoring, sizing and risk gates."""
+
+    def __init__(self, broker: str, timeframe: str = TIMEFRAME, window: int = CANDLE_WINDOW,
+                 balance: float = BACKTEST_BALANCE, max_hold_bars: int = BACKTEST_MAX_HOLD_BARS,
+                 min_score: float = BACKTEST_MIN_SCORE, threshold_fn=get_adaptive_score_threshold,
+                 lot_fn=calculate_lot_size, control_kwargs: dict = None, risk_kwargs: dict = None,
+                 stop_loss_pct: float = None, take_profit_pct: float = None,
+                 min_equity: float = BACKTEST_MIN_EQUITY):
+        self.broker = broker.lower()
+        self.timeframe = timeframe
+        self.bar_seconds = parse_timeframe_minutes(timeframe) * 60
+        self.window = window
+        self.balance = balance
+        self.max_hold_bars = max_hold_bars
+        self.min_score = min_score
+        self.threshold_fn = threshold_fn
+        self.lot_fn = lot_fn
+        self.control_kwargs = control_kwargs or {}
+        self.risk_kwargs = risk_kwargs or {}
+        self.stop_loss_pct = stop_loss_pct        # fixed % levels instead of the 5-bar range
+        self.take_profit_pct = take_profit_pct
+        self.min_equity = min_equity
+
+    def _close_at(self, sigs: dict, pair: str, t: float):
+        """Close of `pair`'s last bar that had closed by time t (None if not in the universe)."""
+        s = sigs.get(pair)
+        if s is None:
+            return None
+        k = int(np.searchsorted(s["timestamp"], t - self.bar_seconds, side="right")) - 1
+        return float(s["close"][k]) if k >= 0 else None
+
+    def _to_usd(self, sigs: dict, pair: str, amount: float, price: float, t: float):
+        """Quote-currency amount → USD at time t; None when no rate is known."""
+        usd, source = quote_to_usd(pair, amount, price, lambda p: self._close_at(sigs, p, t))
+        if source in ("static", None) and pair not in self._fx_warned:
+            self._fx_warned.add(pair)
+            if source == "static":
+                logger.warning(f"⚠️ No conversion pair for {pair} in the universe — PnL at the static USD rate")
+            else:
+                logger.warning(f"⚠️ No USD rate for {pair} — its trades are skipped")
+        return usd
+
+    def signals(self, universe: dict) -> dict:
+        """{pair: candles} → {pair: signal arrays} (stage 1, fully vectorized)."""
+        return {pair: signal_arrays(c, self.window, pair) for pair, c in universe.items() if len(_arrays(c)["close"])}
+
+    def _candidates(self, sigs: dict):
+        """All (time, pair index, bar index) above min_score, in time order."""
+        pairs = list(sigs)
+        ts, who, idx = [], [], []
+        for p, s in enumerate(sigs.values()):
+            i = np.flatnonzero((s["score"] >= self.min_score) & ~np.isnan(s["stop"]))
+            ts.append(s["timestamp"][i].astype(np.int64))
+            who.append(np.full(len(i), p))
+            idx.append(i)
+        if not ts:
+            return pairs, np.empty(0, np.int64), np.empty(0, int), np.empty(0, int)
+        ts, who, idx = np.concatenate(ts), np.concatenate(who), np.concatenate(idx)
+        order = np.lexsort((who, ts))
+        return pairs, ts[order], who[order], idx[order]
+
+    def run(self, universe: dict = None, sigs: dict = None) -> dict:
+        """
+        Backtest {pair: candles}, or precomputed {pair: signal_arrays} via
+        `sigs` (a parameter sweep scores them once); returns {"trades", "equity", "stats"}.
+        """
+        sigs = self.signals(universe) if sigs is None else sigs
+        pairs, cand_ts, cand_pair, cand_idx = self._candidates(sigs)
+        self._fx_warned = set()
+
+        clock = VirtualClock()
+        control = TradeControl(clock=clock, log_path=None, **self.control_kwargs)
+        risk = RiskManager(clock=clock, **self.risk_kwargs)
+        balance = self.balance
+        busy_until = np.full(len(pairs), -1, dtype=np.int64)
+        exits = []                       # heap of (exit_time, seq, trade)
+        trades, equity = [], [(int(cand_ts[0]) if len(cand_ts) else 0, balance)]
+        day, paused, blown = None, False, False
+        peak, max_drawdown = balance, 0.0
+
+        def mark(now):
+            """Balance plus open positions at their last closed bar (USD), tracking the drawdown."""
+            nonlocal peak, max_drawdown
+            value = balance
+            for _, _, trade in exits:
+                price = self._close_at(sigs, trade["pair"], now)
+                if price is not None:
+                    sign = 1 if trade["side"] == "buy" else -1
+                    value += self._to_usd(sigs, trade["pair"], (price - trade["entry"]) * sign * trade["units"],
+                                          price, now) or 0.0
+            peak = max(peak, value)
+            if peak > 0:
+                max_drawdown = max(max_drawdown, 1 - value / peak)
+            return value
+
+        def settle(until):
+            nonlocal balance, paused
+            while exits and exits[0][0] <= until:
+                exit_time, _, trade = heapq.heappop(exits)
+                clock.now = exit_time
+                previous = balance
+                balance += trade["pnl"]
+                trade["balance"] = balance
+                trades.append(trade)
+                equity.append((exit_time, balance))
+                if risk.record_trade_result(balance, previous) is False:
+                    paused = True
+
+        for t, p, i in zip(cand_ts.tolist(), cand_pair.tolist(), cand_idx.tolist()):
+            now = t + self.bar_seconds    # decisions happen at the signal bar's close
+            if now < busy_until[p]:
+                continue
+            settle(now)
+            clock.now = now
+            equity_now = mark(now)
+            if equity_now <= self.min_equity:
+                blown = True
+                logger.warning(f"💀 Backtest account blown at {now}: equity {equity_now:.2f} "
+                               f"≤ {self.min_equity:.2f} — open trades closed, run stopped")
+                for _, _, trade in exits:
+                    price = self._close_at(sigs, trade["pair"], now)
+                    if price is None:
+                        continue
+                    sign = 1 if trade["side"] == "buy" else -1
+                    trade.update(exit_time=now, exit=price, reason="blown", pnl=self._to_usd(
+                        sigs, trade["pair"], (price - trade["entry"]) * sign * trade["units"], price, now) or 0.0)
+                exits[:] = [(trade["exit_time"], seq, trade) for _, seq, trade in exits]
+                heapq.heapify(exits)
+                break
+            if day != now // 86400:
+                day = now // 86400
+                risk.new_day(equity_now)
+                paused = False
+            if paused or not risk.check_daily_drawdown(equity_now):
+                paused = True
+                continue
+
+            s = sigs[pairs[p]]
+            pair, score = pairs[p], float(s["score"][i])
+            side = "buy" if s["side"][i] > 0 else "sell"
+            signal = {
+                "pair": pair, "broker": self.broker, "price": float(s["close"][i]), "side": side,
+                "sl": float(s["sl"][i]), "tp": float(s["tp"][i]),
+                "stop_loss": float(s["sl"][i]), "take_profit": float(s["tp"][i]),
+                "volume_spike": bool(s["volume_spike"][i]), "timestamp": now,
+            }
+            if score < self.threshold_fn(signal):
+                continue
+            if control.is_in_cooldown(pair, self.broker) or control.is_duplicate(pair, self.broker):
+                continue
+
+            entry, stop, target = signal["price"], float(s["stop"][i]), float(s["target"][i])
+            sign = 1 if side == "buy" else -1
+            if self.stop_loss_pct is not None:
+                stop = entry * (1 - sign * self.stop_loss_pct)
+            if self.take_profit_pct is not None:
+                target = entry * (1 + sign * self.take_profit_pct)
+            if stop == entry or target == entry:
+                continue   # no room between entry and the 5-bar range
+            units = float(self.lot_fn(score, self.broker))
+            j, exit_price, reason = resolve_exit(s, i, sign, stop, target, self.max_hold_bars)
+            exit_time = int(s["timestamp"][j]) + self.bar_seconds
+            pnl = self._to_usd(sigs, pair, (exit_price - entry) * sign * units, exit_price, exit_time)
+            if pnl is None:
+                continue
+            control.update_trade_log(pair, self.broker)
+            busy_until[p] = exit_time
+            heapq.heappush(exits, (exit_time, len(trades) + len(exits), {
+                "pair": pair, "side": side, "score": score, "units": units,
+                "entry_time": now, "entry": entry, "stop": stop, "target": target,
+                "exit_time": exit_time, "exit": exit_price, "reason": reason,
+                "bars": j - i, "pnl": pnl,
+            }))
+        settle(float("inf"))
+
+        trades = pd.DataFrame(trades)
+        equity = pd.DataFrame(equity, columns=["timestamp", "balance"])
+        stats = summarize(trades, equity, self.balance, max_drawdown, blown)
+        return {"trades": trades, "equity": equity, "stats": stats}
+
+
+def summarize(trades: pd.DataFrame, equity: pd.DataFrame, start_balance: float,
+              open_drawdown: float = 0.0, blown: bool = False) -> dict:
+    """Stats of a run; max_drawdown is the larger of the realized and the marked-to-market one."""
+    if trades.empty:
+        return {"trades": 0, "pnl": 0.0, "win_rate": 0.0, "profit_factor": 0.0, "max_drawdown": 0.0,
+                "final_balance": start_balance, "blown": blown}
+    pnl = trades["pnl"]
+    curve = equity["balance"].to_numpy()
+    peak = np.maximum.accumulate(curve)
+    gross_loss = -pnl[pnl < 0].sum()
+    return {
+        "trades": int(len(trades)),
+        "pnl": float(pnl.sum()),
+        "win_rate": float((pnl > 0).mean()),
+        "profit_factor": float(pnl[pnl > 0].sum() / gross_loss) if gross_loss else float("inf"),
+        "max_drawdown": float(max(np.max(1 - curve / peak), open_drawdown)),
+        "final_balance": float(curve[-1]),
+        "blown": blown,
+        "exits": trades["reason"].value_counts().to_dict(),
+    }
+
+
+def load_universe(broker: str, pairs, timeframe: str, start: int, end: int, archive=candle_archive) -> dict:
+    """{pair: DataFrame} from the Parquet candle archive."""
+    universe = {}
+    for pair in pairs:
+        df = archive.load(broker, pair, timeframe, start, end)
+        if len(df):
+            universe[pair] = df
+        else:
+            logger.warning(f"⚠️ No archived {timeframe} candles for {pair} ({broker.upper()})")
+    return universe
+
+
+def main():
+    from utils.backfill import BROKER_PAIRS
+
+    parser = argparse.ArgumentParser(description="Backtest the live scoring + risk rules on archived candles")
+    parser.add_argument("--broker", required=True, choices=sorted(BROKER_PAIRS))
+    parser.add_argument("--pairs", help="comma-separated pairs (default: every mapped pair)")
+    parser.add_argument("--timeframe", default=TIMEFRAME)
+    parser.add_argument("--days", type=float, default=365)
+    parser.add_argument("--balance", type=float, default=BACKTEST_BALANCE)
+    parser.add_argument("--trades-out", help="write the trade list to this CSV")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s [%(levelname)s] %(message)s")
+    pairs = args.pairs.split(",") if args.pairs else list(BROKER_PAIRS[args.broker])
+    end = int(pd.Timestamp.utcnow().timestamp())
+    universe = load_universe(args.broker, pairs, args.timeframe, int(end - args.days * 86400), end)
+    result = Backtester(args.broker, args.timeframe, balance=args.balance).run(universe)
+    for key, value in result["stats"].items():
+        print(f"{key:>14}: {value}")
+    if args.trades_out:
+        result["trades"].to_csv(args.trades_out, index=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+# =====================================================
+# utils/bar_builder.py
+# v1.0 — Candles built locally from streamed / polled quotes
+# =====================================================
+#
+# BarAggregator listens on utils.quote_store. Every quote's mid price updates
+# the forming bar of each (broker, pair, timeframe) it tracks:
+#     open = first mid, high / low = extremes, close = last mid
+# Quote ticks are not broker volume (Kraken reports base-currency units, OANDA
+# its own tick count), so a locally closed bar keeps its tick count in
+# BarBuilder.ticks and stores volume = NaN. Until reconciliation brings the
+# broker's volume, score_signal's volume spike sees NaN and stays off instead
+# of comparing ticks against broker units in the same window.
+# When a quote lands past the forming bar's end, or flush() runs after the
+# boundary on a quiet pair, the bar closes into a CandleRing window and
+# on_bar_close listeners fire right at the boundary. Bars are aligned like
+# utils.resampler (broker session anchors).
+#
+# Quiet periods: buckets with no quotes are filled with flat bars (last close,
+# NaN volume, zero ticks), up to BAR_GAP_FILL_MAX bars. Longer silences (weekends,
+# market closes) are left as gaps, the same way the brokers' candles have them.
+#
+# Reconciliation: every BAR_RECONCILE_SECONDS a key's closed bars are replaced
+# by the broker's own candles (one incremental candle_cache request), which
+# fixes missed ticks and broker-side volume. Local windows are only served
+# while quotes keep arriving (BAR_STALE_SECONDS), so a dead stream falls back
+# to REST candles in utils.cycle_driver.
+#
+# Wiring: with BAR_BUILDER=true the drivers start bar_aggregator on the
+# streamed quotes, and utils.cycle_driver.fetch_universe serves its live
+# windows in place of REST candles. on_bar_close is an optional hook for
+# boundary-triggered scoring; the cycle drivers do not register one.
+
+import os
+import time
+import logging
+import threading
+from collections import deque
+
+import numpy as np
+
+from utils.timeframe import TIMEFRAME, parse_timeframe_minutes
+from utils.candle_store import CandleRing
+from utils.candle_cache import candle_cache, CANDLE_WINDOW
+from utils.quote_store import quote_store
+from utils.resampler import bucket_starts
+
+logger = logging.getLogger(__name__)
+
+BAR_BUILDER = os.getenv("BAR_BUILDER", "false").lower() == "true"
+BAR_GAP_FILL_MAX = int(os.getenv("BAR_GAP_FILL_MAX", 12))
+BAR_RECONCILE_SECONDS = float(os.getenv("BAR_RECONCILE_SECONDS", 900))
+BAR_STALE_SECONDS = float(os.getenv("BAR_STALE_SECONDS", 30))
+
+
+class BarBuilder:
+    """Forming + closed bars for one (broker, pair, timeframe)."""
+
+    def __init__(self, broker: str, pair: str, timeframe: str = TIMEFRAME, capacity: int = CANDLE_WINDOW):
+        self.broker = broker.lower()
+        self.pair = pair
+        self.timeframe = timeframe
+        self.seconds = parse_timeframe_minutes(timeframe) * 60
+        self.window = CandleRing(capacity)
+        self.forming = None          # [start, open, high, low, close, ticks]
+        self.ticks = deque(maxlen=capacity)   # (start, ticks) of locally closed bars
+        self._end = None             # forming bar end (exclusive)
+        self.last_quote = None       # wall-clock time of the newest quote
+        self.reconciled = None       # wall-clock time of the last reconcile
+        self.stats = {"ticks": 0, "late": 0, "closed": 0, "filled": 0, "corrected": 0}
+
+    def _bucket(self, ts: float) -> int:
+        return int(bucket_starts([int(ts)], self.timeframe, self.broker)[0])
+
+    def on_quote(self, price: float, ts: float) -> list:
+        """Apply one quote; returns the bars it closed (oldest first)."""
+        self.last_quote = time.time()
+        bar = self.forming
+        if bar is not None and ts < self._end:
+            if ts < bar[0]:
+                self.stats["late"] += 1
+                return []
+            bar[2] = max(bar[2], price)
+            bar[3] = min(bar[3], price)
+            bar[4] = price
+            bar[5] += 1
+            self.stats["ticks"] += 1
+            return []
+
+        start = self._bucket(ts)
+        if self.window and start <= int(self.window.timestamps[-1]):
+            self.stats["late"] += 1     # belongs to a bar that is already closed
+            return []
+        closed = self._close_until(start)
+        self.forming = [start, price, price, price, price, 1]
+        # Next bucket start (shorter than `seconds` on DST days for session-anchored frames)
+        self._end = self._bucket(start + self.seconds)
+        if self._end <= start:
+            self._end = start + self.seconds
+        self.stats["ticks"] += 1
+        return closed
+
+    def flush(self, now: float = None) -> list:
+        """Close the forming bar once its end has passed (quiet pairs close on time too)."""
+        now = time.time() if now is None else now
+        if self.forming is None or now < self._end:
+            return []
+        closed = self._close_until(self._bucket(now))
+        self.forming, self._end = None, None
+        return closed
+
+    def _close_until(self, next_start: int) -> list:
+        """Close the forming bar and gap-fill flat bars up to (not including) next_start."""
+        closed = []
+        bar = self.forming
+        if bar is not None:
+            self.window.append_bar(bar[0], bar[1], bar[2], bar[3], bar[4], np.nan)
+            self.ticks.append((bar[0], bar[5]))
+            closed.append(self.window[-1])
+            self.stats["closed"] += 1
+            fill_from, last_close = self._end, bar[4]
+        elif self.window:
+            fill_from, last_close = int(self.window.timestamps[-1]) + self.seconds, float(self.window.closes[-1])
+        else:
+            return closed
+
+        missing = (next_start - fill_from) // self.seconds
+        if 0 < missing <= BAR_GAP_FILL_MAX:
+            for ts in range(fill_from, next_start, self.seconds):
+                self.window.append_bar(ts, last_close, last_close, last_close, last_close, np.nan)
+                self.ticks.append((ts, 0))
+                closed.append(self.window[-1])
+            self.stats["filled"] += missing
+        return closed
+
+    def reconcile(self, candles) -> int:
+        """
+        Overwrite closed bars with the broker's candles (authoritative OHLCV,
+        including the volume that local bars leave NaN).
+        Broker bars at or after the current bucket are still forming and are
+        ignored. Returns how many local closed bars changed.
+        """
+        now = time.time()
+        self.reconciled = now
+        if candles is None or not len(candles):
+            return 0
+        fresh = candles if isinstance(candles, CandleRing) else CandleRing.from_candles(candles)
+        ts = fresh.timestamps
+        limit = self.forming[0] if self.forming is not None else self._bucket(now)
+        keep = int(np.searchsorted(ts, limit))
+        if not keep:
+            return 0
+        fresh_ts = ts[:keep]
+        cols = [c[:keep] for c in fresh.columns()]
+
+        old_ts = self.window.timestamps
+        old = (old_ts,) + self.window.columns()
+        head = int(np.searchsorted(old_ts, fresh_ts[0]))
+        tail = int(np.searchsorted(old_ts, fresh_ts[-1], side="right"))
+        covered = old_ts[head:tail]
+        overlap = np.isin(covered, fresh_ts)
+        changed = int((~overlap).sum())   # local bars the broker does not have (e.g. gap fills)
+        if overlap.any():
+            idx = np.searchsorted(fresh_ts, covered[overlap])
+            changed += int((~np.isclose(self.window.closes[head:tail][overlap], cols[3][idx])).sum())
+
+        rebuilt = CandleRing(self.window.capacity, self.window.dtype)
+        rebuilt.extend_arrays(*(c[:head].copy() for c in old))
+        rebuilt.extend_arrays(fresh_ts, *cols)
+        rebuilt.extend_arrays(*(c[tail:].copy() for c in old))
+        self.window = rebuilt
+        self.stats["corrected"] += changed
+        return changed
+
+
+class BarAggregator:
+    """Quote-store listener that keeps a BarBuilder per (broker, pair, timeframe)."""
+
+    def __init__(self, timeframes=(TIMEFRAME,), store=quote_store, cache=candle_cache,
+                 capacity: int = CANDLE_WINDOW):
+        self.timeframes = tuple(timeframes)
+        self.store = store
+        self.cache = cache
+        self.capacity = capacity
+        self._builders = {}
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._attached = False
+
+    # --- Lifecycle ---
+    def start(self):
+        if not self._attached:
+            self.store.add_listener(self._on_quote)
+            self._attached = True
+            logger.info(f"🕯️ Local bar builder on ({', '.join(self.timeframes)})")
+        return self
+
+    def stop(self):
+        if self._attached:
+            self.store.remove_listener(self._on_quote)
+            self._attached = False
+
+    def on_bar_close(self, callback):
+        """Register callback(broker, pair, timeframe, window) for every closed bar."""
+        self._listeners.append(callback)
+
+    # --- Ingest ---
+    def _builder(self, broker: str, pair: str, timeframe: str) -> BarBuilder:
+        key = (broker, pair, timeframe)
+        builder = self._builders.get(key)
+        if builder is None:
+            builder = self._builders[key] = BarBuilder(broker, pair, timeframe, self.capacity)
+            seed = self.cache.get(broker, pair, timeframe) if self.cache is not None else None
+            if seed:
+                builder.reconcile(seed)   # start from the already fetched history
+        return builder
+
+    def _emit(self, builder: BarBuilder, closed: list):
+        if not closed:
+            return
+        for callback in self._listeners:
+            try:
+                callback(builder.broker, builder.pair, builder.timeframe, builder.window)
+            except Exception as e:
+                logger.error(f"❌ Bar-close listener failed for {builder.pair}: {e}")
+
+    def _on_quote(self, broker: str, pair: str, quote: dict):
+        broker = broker.lower()
+        for timeframe in self.timeframes:
+            with self._lock:
+                builder = self._builder(broker, pair, timeframe)
+                closed = builder.on_quote(quote["mid"], quote["ts"])
+            self._emit(builder, closed)
+
+    def flush(self, now: float = None):
+        """Close every bar whose end has passed (call from the cycle loop or a timer)."""
+        for builder in list(self._builders.values()):
+            with self._lock:
+                closed = builder.flush(now)
+            self._emit(builder, closed)
+
+    # --- Read side ---
+    def get(self, broker: str, pair: str, timeframe: str = TIMEFRAME):
+        builder = self._builders.get((broker.lower(), pair, timeframe))
+        return builder.window if builder is not None else None
+
+    def windows(self, broker: str, pairs, timeframe: str = TIMEFRAME) -> dict:
+        """
+        {pair: closed-bar window} for pairs whose quotes are live. Keys due for
+        reconciliation are refreshed through the candle cache first. Pairs
+        that are missing or stale are left out (fetch them over REST).
+        """
+        broker = broker.lower()
+        now = time.time()
+        self.flush(now)
+        out = {}
+        for pair in pairs:
+            builder = self._builders.get((broker, pair, timeframe))
+            if builder is None or builder.last_quote is None or now - builder.last_quote > BAR_STALE_SECONDS:
+                continue
+            if builder.reconciled is None or now - builder.reconciled >= BAR_RECONCILE_SECONDS:
+                try:
+                    fresh = self.cache.fetch(broker, pair, timeframe)
+                    with self._lock:
+                        changed = builder.reconcile(fresh)
+                    if changed:
+                        logger.info(f"🕯️ {broker.upper()} {pair} {timeframe}: {changed} local bars corrected by broker candles")
+                except Exception as e:
+                    logger.warning(f"⚠️ Bar reconcile failed for {pair} ({broker.upper()}): {e}")
+            if builder.window:
+                out[pair] = builder.window
+        return out
+
+
+# === Process-wide aggregator (started by the cycle drivers when BAR_BUILDER=true) ===
+bar_aggregator = BarAggregator()
@@ -5,16 +5,20 @@
 import os
 import time
 import logging
-import requests
 from statistics import mean
+from utils import http_pool
 from utils.trade_control_logger import get_last_success_time
+from utils.price_snapshot import peek_snapshot
 
 logger = logging.getLogger(__name__)
 
 # Memory stores
 _broker_health = {}
 _last_failure = {}
+_latencies = {}  # broker → (measured at, ms)
 FAILURE_TIMEOUT = 180  # seconds before retry
+ROUTER_SNAPSHOT_MAX_AGE = float(os.getenv("ROUTER_SNAPSHOT_MAX_AGE", 120))  # seconds
+ROUTER_PING_MAX_AGE = float(os.getenv("ROUTER_PING_MAX_AGE", 120))  # reuse a broker's ping this long
 BROKER_ROTATION_ORDER = ["kraken", "oanda", "alpaca", "tos"]
 
 # Optional broker ping endpoints (lightweight public URLs)
@@ -53,7 +57,7 @@ def _ping_broker(broker: str) -> float:
 
     start = time.time()
     try:
-        res = requests.get(url, timeout=2)
+        res = http_pool.get(broker, url, endpoint="ping")
         if res.status_code == 200:
             latency = (time.time() - start) * 1000
             return round(latency, 2)
@@ -62,7 +66,29 @@ def _ping_broker(broker: str) -> float:
     return 9999
 
 
-def get_smart_broker(pair: str) -> str:
+def _latency(broker: str) -> float:
+    """Cached ping latency; pings only when the last measurement is older than ROUTER_PING_MAX_AGE."""
+    cached = _latencies.get(broker)
+    if cached and time.time() - cached[0] <= ROUTER_PING_MAX_AGE:
+        return cached[1]
+    latency = _ping_broker(broker)
+    _latencies[broker] = (time.time(), latency)
+    return latency
+
+
+def refresh_broker_latencies(enabled=None) -> dict:
+    """Ping every enabled broker once (call at the start of each cycle)."""
+    if isinstance(enabled, str):
+        enabled = enabled.split(",")
+    if enabled is None:
+        enabled = os.getenv("ENABLED_BROKERS", "kraken,oanda,alpaca,tos").split(",")
+    now = time.time()
+    for b in (b.strip().lower() for b in enabled if b.strip()):
+        _latencies[b] = (now, _ping_broker(b))
+    return {b: ms for b, (_, ms) in _latencies.items()}
+
+
+def get_smart_broker(pair: str, enabled=None) -> str:
     """
     Dynamically choose best broker based on:
       • Recent success timestamps
@@ -70,7 +96,8 @@ def get_smart_broker(pair: str) -> str:
       • Latency (ping time)
       • Enabled brokers list
     """
-    enabled = os.getenv("ENABLED_BROKERS", "kraken,oanda,alpaca,tos").split(",")
+    if enabled is None:
+        enabled = os.getenv("ENABLED_BROKERS", "kraken,oanda,alpaca,tos").split(",")
     enabled = [b.strip().lower() for b in enabled if b.strip()]
 
     # Step 1 — Filter by health
@@ -80,8 +107,8 @@ def get_smart_broker(pair: str) -> str:
         logger.warning(f"⚠️ No healthy brokers, falling back to {fallback.upper()}")
         return fallback
 
-    # Step 2 — Measure latency
-    latencies = {b: _ping_broker(b) for b in healthy}
+    # Step 2 — Latency (pinged once per cycle, see refresh_broker_latencies)
+    latencies = {b: _latency(b) for b in healthy}
     best_latency = min(latencies.values())
     fast_brokers = [b for b, l in latencies.items() if l == best_latency]
 
@@ -103,6 +130,30 @@ def get_smart_broker(pair: str) -> str:
     return broker
 
 
+def smart_broker_selector(pair: str, enabled=None) -> str:
+    """
+    Route a pair to the best broker that actually quotes it.
+    Uses the cycle's cached price snapshots (no extra requests) to drop brokers
+    whose snapshot lacks the pair, then ranks the rest like get_smart_broker().
+    """
+    if isinstance(enabled, str):
+        enabled = enabled.split(",")
+    if enabled is None:
+        enabled = os.getenv("ENABLED_BROKERS", "kraken,oanda,alpaca,tos").split(",")
+    enabled = [b.strip().lower() for b in enabled if b.strip()]
+
+    quoting = []
+    for b in enabled:
+        prices = peek_snapshot(b, max_age=ROUTER_SNAPSHOT_MAX_AGE)
+        if prices is None or pair in prices:  # no snapshot yet → keep as candidate
+            quoting.append(b)
+
+    if not quoting:
+        logger.debug(f"🧭 SmartRouter: no broker snapshot quotes {pair}")
+        return None
+    return get_smart_broker(pair, quoting)
+
+
 def report_broker_result(broker: str, success: bool):
     """Called after each order/fetch to update broker health memory."""
     if success:
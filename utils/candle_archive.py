@@ -0,0 +1,161 @@
+# =====================================================
+# utils/candle_archive.py
+# v1.0 — Parquet cold archive for historical candles
+# =====================================================
+#
+# Layout (hive-style, partitioned by month):
+#   <CANDLE_ARCHIVE_DIR>/<broker>/<TF>/month=YYYY-MM/<PAIR>.parquet
+# Columns: timestamp (int64 epoch seconds), open, high, low, close, volume
+# (float64). Each file is sorted by timestamp and holds no duplicates.
+#
+# Loading a month for the whole universe reads one partition directory, and
+# columns= restricts it to the columns you need. Parquet I/O goes through
+# pandas on the pyarrow engine (in requirements.txt; fastparquet also works).
+
+import os
+import glob
+import logging
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+CANDLE_ARCHIVE_DIR = os.getenv("CANDLE_ARCHIVE_DIR", "data/candles")
+
+COLUMNS = ["timestamp", "open", "high", "low", "close", "volume"]
+
+
+def _pair_file(pair: str) -> str:
+    return f"{pair.replace('/', '_').upper()}.parquet"
+
+
+def _file_pair(filename: str) -> str:
+    return os.path.basename(filename)[:-len(".parquet")].replace("_", "/")
+
+
+def _month(ts: int) -> str:
+    return datetime.fromtimestamp(int(ts), tz=timezone.utc).strftime("%Y-%m")
+
+
+def _months(start: int, end: int) -> list:
+    """Every YYYY-MM from start to end (epoch seconds, inclusive)."""
+    first = datetime.fromtimestamp(int(start), tz=timezone.utc)
+    last = datetime.fromtimestamp(int(end), tz=timezone.utc)
+    out, y, m = [], first.year, first.month
+    while (y, m) <= (last.year, last.month):
+        out.append(f"{y:04d}-{m:02d}")
+        y, m = (y + 1, 1) if m == 12 else (y, m + 1)
+    return out
+
+
+def normalize_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Typed, timestamp-sorted frame with overlapping bars deduplicated (latest copy wins)."""
+    df = df[COLUMNS].astype({"timestamp": "int64", "open": "float64", "high": "float64",
+                             "low": "float64", "close": "float64", "volume": "float64"})
+    return df.drop_duplicates("timestamp", keep="last").sort_values("timestamp", ignore_index=True)
+
+
+def frame_from_arrays(arrays) -> pd.DataFrame:
+    """utils.candle_decoder.CandleArrays → archive frame."""
+    return pd.DataFrame(dict(zip(COLUMNS, arrays)))
+
+
+def find_gaps(timestamps, bar_seconds: int) -> list:
+    """[(first_missing_ts, next_present_ts), ...] wherever consecutive bars are more than one bar apart."""
+    ts = np.asarray(timestamps, dtype=np.int64)
+    if len(ts) < 2:
+        return []
+    idx = np.flatnonzero(np.diff(ts) > bar_seconds)
+    return [(int(ts[i]) + bar_seconds, int(ts[i + 1])) for i in idx]
+
+
+class CandleArchive:
+    """Month-partitioned Parquet store keyed by (broker, timeframe, pair)."""
+
+    def __init__(self, root: str = CANDLE_ARCHIVE_DIR):
+        self.root = root
+
+    def _dir(self, broker: str, timeframe: str, month: str) -> str:
+        return os.path.join(self.root, broker.lower(), timeframe, f"month={month}")
+
+    def path(self, broker: str, pair: str, timeframe: str, month: str) -> str:
+        return os.path.join(self._dir(broker, timeframe, month), _pair_file(pair))
+
+    # --- Writes ---
+    def write(self, broker: str, pair: str, timeframe: str, df: pd.DataFrame) -> int:
+        """
+        Merge bars into their month partitions (existing rows are kept unless
+        overwritten by the same timestamp). Each file is replaced atomically.
+        Returns the number of new bars.
+        """
+        if df is None or df.empty:
+            return 0
+        df = normalize_frame(df)
+        months = pd.to_datetime(df["timestamp"], unit="s", utc=True).dt.strftime("%Y-%m")
+        added = 0
+        for month, part in df.groupby(months.values, sort=True):
+            path = self.path(broker, pair, timeframe, month)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            before = 0
+            if os.path.exists(path):
+                existing = pd.read_parquet(path)
+                before = len(existing)
+                part = normalize_frame(pd.concat([existing, part], ignore_index=True))
+            tmp = f"{path}.tmp"
+            part.to_parquet(tmp, index=False)
+            os.replace(tmp, path)
+            added += len(part) - before
+        return added
+
+    # --- Reads ---
+    def load(self, broker: str, pair: str, timeframe: str, start: int = None, end: int = None,
+             columns=None) -> pd.DataFrame:
+        """Bars for one pair within [start, end] (epoch seconds, either open-ended)."""
+        pattern = self.path(broker, pair, timeframe, "*")
+        files = sorted(glob.glob(pattern))
+        if start is not None or end is not None:
+            lo = _month(start) if start is not None else ""
+            hi = _month(end) if end is not None else "9999-99"
+            files = [f for f in files if lo <= f.split("month=")[1][:7] <= hi]
+        cols = None if columns is None else list(dict.fromkeys(["timestamp", *columns]))
+        if not files:
+            return pd.DataFrame(columns=cols or COLUMNS)
+        df = pd.concat([pd.read_parquet(f, columns=cols) for f in files], ignore_index=True)
+        if start is not None:
+            df = df[df["timestamp"] >= int(start)]
+        if end is not None:
+            df = df[df["timestamp"] <= int(end)]
+        return df.reset_index(drop=True)
+
+    def load_universe(self, broker: str, timeframe: str, start: int, end: int, pairs=None,
+                      columns=None) -> pd.DataFrame:
+        """
+        Columnar scan of many pairs over a time range → long frame with a `pair`
+        column. Only the month partitions overlapping [start, end] are touched.
+        """
+        wanted = None if pairs is None else {_pair_file(p) for p in pairs}
+        cols = None if columns is None else list(dict.fromkeys(["timestamp", *columns]))
+        frames = []
+        for month in _months(start, end):
+            for f in sorted(glob.glob(os.path.join(self._dir(broker, timeframe, month), "*.parquet"))):
+                if wanted is not None and os.path.basename(f) not in wanted:
+                    continue
+                df = pd.read_parquet(f, columns=cols)
+                df.insert(0, "pair", _file_pair(f))
+                frames.append(df)
+        if not frames:
+            return pd.DataFrame(columns=["pair", *(cols or COLUMNS)])
+        df = pd.concat(frames, ignore_index=True)
+        df = df[(df["timestamp"] >= int(start)) & (df["timestamp"] <= int(end))]
+        return df.reset_index(drop=True)
+
+    def coverage(self, broker: str, pair: str, timeframe: str):
+        """(first_ts, last_ts) archived for a pair, or None."""
+        ts = self.load(broker, pair, timeframe, columns=[])["timestamp"]
+        return (int(ts.iloc[0]), int(ts.iloc[-1])) if len(ts) else None
+
+
+# === Process-wide default archive ===
+candle_archive = CandleArchive()
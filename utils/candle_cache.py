@@ -0,0 +1,250 @@
+# =====================================================
+# utils/candle_cache.py
+# v1.2 — Incremental rolling candle cache per (broker, pair, timeframe)
+# =====================================================
+#
+# Windows are stored as utils.candle_store.CandleRing (columnar, fixed
+# capacity); they still index and iterate like lists of candle dicts.
+# With utils.candle_history enabled, cold keys warm-start from the on-disk
+# history and every refresh is appended back to it.
+import os
+import time
+import logging
+import threading
+
+from broker import get_broker
+from utils.timeframe import TIMEFRAME, parse_timeframe_minutes
+from utils.candle_store import CandleRing
+from utils.candle_history import candle_history
+from utils.indicator_registry import SIGNAL_BARS
+
+logger = logging.getLogger(__name__)
+
+# Default window = the longest indicator convergence window (see utils.indicator_registry)
+CANDLE_WINDOW = int(os.getenv("CANDLE_WINDOW", SIGNAL_BARS))
+
+
+def merge_candles(window, fresh: list, size: int):
+    """
+    Merge newly fetched bars into a cached window in place:
+      • cached bars at or after the first fresh timestamp are replaced
+        (this is how the still-forming last bar gets refreshed)
+      • the window is trimmed from the front to `size` bars
+    Returns the same object. CandleRing windows trim to their capacity.
+    """
+    if not fresh:
+        return window
+    if isinstance(window, CandleRing):
+        return window.merge(fresh)
+
+    first_ts = fresh[0]["timestamp"]
+    while window and window[-1]["timestamp"] >= first_ts:
+        window.pop()
+    window.extend(fresh)
+
+    excess = len(window) - size
+    if excess > 0:
+        del window[:excess]
+    return window
+
+
+def _last_ts(window):
+    """Timestamp of the newest bar, or None when the window can't be keyed."""
+    if isinstance(window, CandleRing):
+        return int(window.timestamps[-1]) if len(window) else None
+    if window and "timestamp" in window[-1]:
+        return window[-1]["timestamp"]
+    return None
+
+
+def _to_ring(fresh, size: int) -> CandleRing:
+    if isinstance(fresh, CandleRing):
+        # Decoded broker payloads arrive oldest → newest already
+        return CandleRing.from_arrays(fresh.timestamps, *fresh.columns(), capacity=size, dtype=fresh.dtype)
+    return CandleRing.from_candles(sorted(fresh, key=lambda c: c["timestamp"])[-size:], capacity=size)
+
+
+def _bars_since(fresh, ts: int):
+    """Bars at or after `ts`."""
+    if isinstance(fresh, CandleRing):
+        start = int(fresh.timestamps.searchsorted(ts))
+        return CandleRing.from_arrays(
+            fresh.timestamps[start:], *(col[start:] for col in fresh.columns()), dtype=fresh.dtype
+        )
+    return [c for c in fresh if c["timestamp"] >= ts]
+
+
+def _gap_fits(last_ts, timeframe: str, size: int) -> bool:
+    """True when the bars missing since `last_ts` fit in one incremental fetch of `size`."""
+    try:
+        bar_seconds = parse_timeframe_minutes(timeframe) * 60
+    except ValueError:
+        return False
+    return time.time() - last_ts < (size - 1) * bar_seconds
+
+
+def _refresh_failed(fresh, last_ts, timeframe: str) -> bool:
+    """
+    True when an incremental fetch failed: None, or empty although a new bar
+    was due (some brokers, e.g. OANDA, return [] on errors).
+    """
+    if fresh is None:
+        return True
+    if len(fresh):
+        return False
+    try:
+        bar_seconds = parse_timeframe_minutes(timeframe) * 60
+    except ValueError:
+        return True
+    return time.time() >= last_ts + bar_seconds
+
+
+class CandleCache:
+    """
+    Rolling candle windows keyed by (broker, pair, timeframe).
+    The first call loads a full window; later calls only fetch bars from the
+    last cached timestamp on (Kraken `since`, OANDA `from`, Alpaca `start`).
+    They ask for `last_ts - 1` because Kraken's `since` is exclusive, so the last
+    cached bar comes back too and merge_candles replaces it.
+    """
+
+    def __init__(self, window: int = CANDLE_WINDOW, history=candle_history):
+        self.window = window
+        self.history = history
+        self._windows = {}
+        self._lock = threading.Lock()
+        self.stats = {"full": 0, "incremental": 0, "stale": 0, "warm_start": 0}
+
+    def get(self, broker: str, pair: str, timeframe: str = TIMEFRAME):
+        """Return the cached window (not a copy) or None."""
+        return self._windows.get((broker.lower(), pair, timeframe))
+
+    def clear(self, broker: str = None):
+        with self._lock:
+            if broker is None:
+                self._windows.clear()
+            else:
+                for key in [k for k in self._windows if k[0] == broker.lower()]:
+                    del self._windows[key]
+
+    def _warm_start(self, key, size: int):
+        """Seed a cold key from on-disk history when the gap to now is fetchable in one go."""
+        if self.history is None:
+            return None
+        window = self.history.load(*key, count=size)
+        if window is None or not _gap_fits(_last_ts(window), key[2], size):
+            return None
+        with self._lock:
+            self._windows[key] = window
+            self.stats["warm_start"] += 1
+        logger.info(f"💾 {key[0].upper()} {key[1]} {key[2]}: warm start from history ({len(window)} bars)")
+        return window
+
+    def _persist(self, key, window):
+        if self.history is None:
+            return
+        try:
+            self.history.append(*key, window)
+        except OSError as e:
+            logger.warning(f"⚠️ Candle history write failed for {key[1]} ({key[0].upper()}): {e}")
+
+    def fetch(self, broker: str, pair: str, timeframe: str = TIMEFRAME, count: int = None):
+        """
+        Return the up-to-date window for a key. Callers get the cached ring
+        itself — treat it as read-only.
+        """
+        broker = broker.lower()
+        size = max(count or 0, self.window)
+        key = (broker, pair, timeframe)
+        module = get_broker(broker)
+        cached = self._windows.get(key)
+        if cached is None:
+            cached = self._warm_start(key, size)
+
+        if _last_ts(cached) is None or cached.capacity < size:
+            fresh = module.fetch_candles(pair, timeframe, size)
+            if not fresh:
+                return cached
+            if "timestamp" not in fresh[-1]:
+                return fresh  # broker without bar timestamps — nothing to key on
+            window = _to_ring(fresh, size)
+            with self._lock:
+                self._windows[key] = window
+                self.stats["full"] += 1
+            self._persist(key, window)
+            return window
+
+        last_ts = _last_ts(cached)
+        fresh = module.fetch_candles(pair, timeframe, size, since=last_ts - 1)
+        if _refresh_failed(fresh, last_ts, timeframe):
+            # Keep serving the last good window rather than dropping the pair
+            self.stats["stale"] += 1
+            logger.warning(f"⚠️ Serving cached candles for {pair} ({broker.upper()}) — refresh failed")
+            return cached
+
+        with self._lock:
+            merge_candles(cached, fresh, size)
+            self.stats["incremental"] += 1
+        self._persist(key, cached)
+        logger.debug(f"🧩 {broker.upper()} {pair} {timeframe}: +{len(fresh)} bars (window={len(cached)})")
+        return cached
+
+
+    def fetch_batch(self, broker: str, pairs, timeframe: str = TIMEFRAME, count: int = None) -> dict:
+        """
+        Refresh many pairs through the broker's multi-symbol fetch_candles_batch().
+        Cold pairs share one full-window batch; warm pairs share one incremental
+        batch starting at the oldest of their last cached timestamps.
+        Returns {pair: window or None}.
+        """
+        broker = broker.lower()
+        size = max(count or 0, self.window)
+        module = get_broker(broker)
+        cold, warm = [], []
+        for pair in pairs:
+            key = (broker, pair, timeframe)
+            cached = self._windows.get(key)
+            if cached is None:
+                cached = self._warm_start(key, size)
+            warm_ok = _last_ts(cached) is not None and cached.capacity >= size
+            (warm if warm_ok else cold).append(pair)
+
+        out = {}
+        if cold:
+            for pair, fresh in module.fetch_candles_batch(cold, timeframe, size).items():
+                if fresh:
+                    window = _to_ring(fresh, size)
+                    with self._lock:
+                        self._windows[(broker, pair, timeframe)] = window
+                    self._persist((broker, pair, timeframe), window)
+                    out[pair] = window
+                else:
+                    out[pair] = None
+            self.stats["full"] += len(cold)
+
+        if warm:
+            since = min(_last_ts(self._windows[(broker, p, timeframe)]) for p in warm)
+            fresh_by_pair = module.fetch_candles_batch(warm, timeframe, size, since=since - 1)
+            for pair in warm:
+                cached = self._windows[(broker, pair, timeframe)]
+                fresh = fresh_by_pair.get(pair)
+                last_ts = _last_ts(cached)
+                if _refresh_failed(fresh, last_ts, timeframe):
+                    self.stats["stale"] += 1
+                else:
+                    # Bars older than this pair's tail are already cached
+                    with self._lock:
+                        merge_candles(cached, _bars_since(fresh, last_ts), size)
+                    self.stats["incremental"] += 1
+                    self._persist((broker, pair, timeframe), cached)
+                out[pair] = cached
+        return out
+
+
+# === Process-wide default cache ===
+candle_cache = CandleCache()
+
+
+def get_candles(broker: str, pair: str, timeframe: str = TIMEFRAME, count: int = None):
+    """Fetch through the shared rolling cache."""
+    return candle_cache.fetch(broker, pair, timeframe, count)
@@ -0,0 +1,142 @@
+# =====================================================
+# utils/candle_decoder.py
+# v1.0 — Vectorized bulk decoders for broker candle payloads
+# =====================================================
+#
+# Each decoder turns a whole response into CandleArrays (int64 epoch seconds
+# plus float64 OHLCV) column by column: each column is one np.fromiter over
+# map(float, ...) straight into a preallocated array, and ISO-8601 times go
+# through datetime64, instead of building a dict and calling strptime per
+# candle. Malformed Kraken and generic OHLCV rows fall back to a row-by-row
+# decode that drops the bad rows, matching the old normalizers. The OANDA
+# and Alpaca decoders have no fallback: a malformed candle raises.
+
+import logging
+from typing import NamedTuple
+
+import numpy as np
+
+from utils.candle_store import CandleRing, CANDLE_DTYPE
+
+logger = logging.getLogger(__name__)
+
+
+class CandleArrays(NamedTuple):
+    timestamp: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+    def __len__(self):
+        return len(self.timestamp)
+
+    def to_ring(self, capacity: int = None, dtype=CANDLE_DTYPE) -> CandleRing:
+        return CandleRing.from_arrays(*self, capacity=capacity, dtype=dtype)
+
+    def to_dicts(self) -> list:
+        ohlcv = np.column_stack(self[1:]).tolist()
+        return [
+            {"timestamp": ts, "open": o, "high": h, "low": l, "close": c, "volume": v}
+            for ts, (o, h, l, c, v) in zip(self.timestamp.tolist(), ohlcv)
+        ]
+
+
+def _empty() -> CandleArrays:
+    f = np.empty(0, dtype=np.float64)
+    return CandleArrays(np.empty(0, dtype=np.int64), f, f, f, f, f)
+
+
+def _from_matrix(ts, ohlcv: np.ndarray) -> CandleArrays:
+    """(n,) timestamps + (n, 5) OHLCV matrix → CandleArrays of contiguous columns."""
+    if not len(ts):
+        return _empty()
+    return CandleArrays(np.asarray(ts, dtype=np.int64), *np.ascontiguousarray(ohlcv.T))
+
+
+def _column(values, n: int) -> np.ndarray:
+    """Numeric strings/numbers → float64 array of length n in one C-level pass."""
+    return np.fromiter(map(float, values), dtype=np.float64, count=n)
+
+
+def parse_iso_times(values) -> np.ndarray:
+    """RFC3339 strings ('2024-01-01T00:00:00.000000000Z' or '...Z') → int64 epoch seconds (UTC)."""
+    if not len(values):
+        return np.empty(0, dtype=np.int64)
+    return np.array([v[:19] for v in values], dtype="datetime64[s]").astype(np.int64)
+
+
+# =====================================================
+# === Kraken: result rows [time, o, h, l, c, vwap, volume, count]
+# =====================================================
+def decode_kraken(rows, count: int = None) -> CandleArrays:
+    """Decode Kraken OHLC rows; only the last `count` rows are parsed."""
+    if count:
+        rows = rows[-count:]
+    if not rows:
+        return _empty()
+    n = len(rows)
+    try:
+        ts = _column((r[0] for r in rows), n).astype(np.int64)
+        cols = [_column((r[i] for r in rows), n) for i in (1, 2, 3, 4, 6)]
+    except (ValueError, TypeError, IndexError):
+        return _decode_rows(rows, (0, 1, 2, 3, 4, 6))
+    return CandleArrays(ts, *cols)
+
+
+def decode_ohlcv_rows(rows, count: int = None) -> CandleArrays:
+    """Generic [time, o, h, l, c, volume, ...] rows (ta_engine.normalize_ohlcv layout)."""
+    if count:
+        rows = rows[-count:]
+    if not rows:
+        return _empty()
+    try:
+        m = np.array([r[:6] for r in rows], dtype=np.float64)
+    except (ValueError, TypeError):
+        return _decode_rows(rows, (0, 1, 2, 3, 4, 5))
+    return _from_matrix(m[:, 0], m[:, 1:6])
+
+
+def _decode_rows(rows, cols) -> CandleArrays:
+    """Slow path: per-row conversion, dropping rows that fail (short, None, non-numeric)."""
+    ts, ohlcv = [], []
+    for row in rows:
+        try:
+            values = [float(row[i]) for i in cols]
+        except (ValueError, TypeError, IndexError):
+            continue
+        ts.append(int(values[0]))
+        ohlcv.append(values[1:])
+    if not ts:
+        return _empty()
+    return _from_matrix(ts, np.array(ohlcv, dtype=np.float64))
+
+
+# =====================================================
+# === OANDA: {"time", "complete", "volume", "mid": {"o", "h", "l", "c"}}
+# =====================================================
+def decode_oanda(candles, include_incomplete: bool = False) -> CandleArrays:
+    """Decode OANDA mid candles, dropping the still-forming one unless asked not to."""
+    if not include_incomplete:
+        candles = [c for c in candles if c.get("complete")]
+    if not candles:
+        return _empty()
+    n = len(candles)
+    mids = [c["mid"] for c in candles]
+    return CandleArrays(
+        parse_iso_times([c["time"] for c in candles]),
+        *(_column((m[k] for m in mids), n) for k in ("o", "h", "l", "c")),
+        _column((c["volume"] for c in candles), n),
+    )
+
+
+# =====================================================
+# === Alpaca: {"t", "o", "h", "l", "c", "v"}
+# =====================================================
+def decode_alpaca(bars) -> CandleArrays:
+    """Decode Alpaca v2 bars (numbers already typed; only the times need parsing)."""
+    if not bars:
+        return _empty()
+    m = np.array([(b["o"], b["h"], b["l"], b["c"], b.get("v", 0.0)) for b in bars], dtype=np.float64)
+    return _from_matrix(parse_iso_times([b["t"] for b in bars]), m)
@@ -0,0 +1,169 @@
+# =====================================================
+# utils/candle_history.py
+# v1.0 — Append-only, memory-mapped candle history per (broker, pair, timeframe)
+# =====================================================
+#
+# One file per key: <CANDLE_HISTORY_DIR>/<broker>/<PAIR>_<TF>.bin, a flat
+# array of fixed 48-byte records (int64 ts, float64 open/high/low/close/volume)
+# in timestamp order. Startup maps the file and slices the last N records
+# straight into a CandleRing, so only the gap since the last persisted bar
+# has to be fetched.
+#
+# Writes only ever append, or rewrite the last record while that bar is
+# still forming. After a crash, open() recovers the tail: a torn partial
+# record is truncated, and so are trailing records that are zeroed or out
+# of order.
+#
+# Off by default (it writes under CANDLE_HISTORY_DIR on every refresh); set
+# CANDLE_HISTORY=true to enable it.
+
+import os
+import logging
+import threading
+
+import numpy as np
+
+from utils.candle_store import CandleRing, CANDLE_DTYPE
+
+logger = logging.getLogger(__name__)
+
+CANDLE_HISTORY = os.getenv("CANDLE_HISTORY", "false").lower() == "true"
+CANDLE_HISTORY_DIR = os.getenv("CANDLE_HISTORY_DIR", "logs/candles")
+CANDLE_HISTORY_FSYNC = os.getenv("CANDLE_HISTORY_FSYNC", "false").lower() == "true"
+
+RECORD = np.dtype([
+    ("timestamp", "<i8"),
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("volume", "<f8"),
+])
+
+
+def _first_bad_record(ts: np.ndarray) -> int:
+    """Index of the first zeroed or non-increasing timestamp (len(ts) when all are good)."""
+    bad = ts <= 0
+    bad[1:] |= ts[1:] <= ts[:-1]
+    hits = np.flatnonzero(bad)
+    return int(hits[0]) if len(hits) else len(ts)
+
+
+class CandleHistory:
+    """Per-key append-only record files with memory-mapped reads."""
+
+    def __init__(self, root: str = CANDLE_HISTORY_DIR, fsync: bool = CANDLE_HISTORY_FSYNC):
+        self.root = root
+        self.fsync = fsync
+        self._last = {}      # key → last persisted timestamp (None = empty file)
+        self._lock = threading.Lock()
+        self.stats = {"loaded": 0, "appended": 0, "rewritten": 0, "recovered": 0}
+
+    def path(self, broker: str, pair: str, timeframe: str) -> str:
+        name = f"{pair.replace('/', '_').upper()}_{timeframe}.bin"
+        return os.path.join(self.root, broker.lower(), name)
+
+    # --- Recovery ---
+    def _recover(self, path: str) -> int:
+        """Trim a torn or corrupt tail in place; returns the number of good records."""
+        size = os.path.getsize(path)
+        good = size // RECORD.itemsize
+        if good:
+            ts = np.memmap(path, dtype=RECORD, mode="r", shape=(good,))["timestamp"]
+            good = _first_bad_record(np.array(ts))
+            del ts
+        if good * RECORD.itemsize != size:
+            with open(path, "r+b") as f:
+                f.truncate(good * RECORD.itemsize)
+            self.stats["recovered"] += 1
+            logger.warning(f"🩹 Candle history {path}: recovered tail, kept {good} records "
+                           f"({size - good * RECORD.itemsize} bytes dropped)")
+        return good
+
+    def _records(self, key, path: str):
+        """Memory-mapped record array for a key (recovering it on first open), or None."""
+        if not os.path.exists(path):
+            self._last[key] = None
+            return None
+        if key not in self._last:
+            self._recover(path)
+        n = os.path.getsize(path) // RECORD.itemsize
+        if not n:
+            self._last[key] = None
+            return None
+        records = np.memmap(path, dtype=RECORD, mode="r", shape=(n,))
+        self._last[key] = int(records["timestamp"][-1])
+        return records
+
+    # --- Reads ---
+    def load(self, broker: str, pair: str, timeframe: str, count: int, dtype=CANDLE_DTYPE):
+        """Last `count` persisted bars as a CandleRing (capacity `count`), or None."""
+        key = (broker.lower(), pair, timeframe)
+        with self._lock:
+            try:
+                records = self._records(key, self.path(*key))
+            except OSError as e:
+                logger.warning(f"⚠️ Candle history unreadable for {pair} ({broker.upper()}): {e}")
+                return None
+            if records is None:
+                return None
+            tail = records[-count:]
+            ring = CandleRing.from_arrays(
+                tail["timestamp"], tail["open"], tail["high"], tail["low"], tail["close"], tail["volume"],
+                capacity=count, dtype=dtype,
+            )
+            del records, tail
+        self.stats["loaded"] += 1
+        return ring
+
+    def last_timestamp(self, broker: str, pair: str, timeframe: str):
+        key = (broker.lower(), pair, timeframe)
+        with self._lock:
+            if key not in self._last:
+                self._records(key, self.path(*key))
+            return self._last.get(key)
+
+    # --- Writes ---
+    def append(self, broker: str, pair: str, timeframe: str, window) -> int:
+        """
+        Persist bars from a CandleRing newer than the last persisted one.
+        A bar with the same timestamp as the last record (still forming)
+        overwrites it. Returns the number of records written.
+        """
+        if window is None or not len(window) or not isinstance(window, CandleRing):
+            return 0
+        key = (broker.lower(), pair, timeframe)
+        path = self.path(*key)
+        with self._lock:
+            if key not in self._last:
+                self._records(key, path)
+            last = self._last.get(key)
+
+            ts = window.timestamps
+            start = 0 if last is None else int(ts.searchsorted(last))
+            if start >= len(ts):
+                return 0
+            rows = np.empty(len(ts) - start, dtype=RECORD)
+            rows["timestamp"] = ts[start:]
+            for name, col in zip(RECORD.names[1:], window.columns()):
+                rows[name] = col[start:]
+
+            rewrite = last is not None and int(rows["timestamp"][0]) == last
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                open(path, "wb").close()
+            with open(path, "r+b") as f:
+                f.seek(-RECORD.itemsize if rewrite else 0, os.SEEK_END)
+                f.write(rows.tobytes())
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            self._last[key] = int(rows["timestamp"][-1])
+
+        self.stats["rewritten"] += int(rewrite)
+        self.stats["appended"] += len(rows) - int(rewrite)
+        return len(rows)
+
+
+# === Process-wide default history (None when CANDLE_HISTORY=false) ===
+candle_history = CandleHistory() if CANDLE_HISTORY else None
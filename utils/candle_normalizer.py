@@ -1,3 +1,6 @@
+from utils.candle_decoder import decode_kraken
+
+
 def normalize_kraken_candles(raw_candles, interval):
     """
     Normalize Kraken candles to:
@@ -13,17 +16,4 @@ def normalize_kraken_candles(raw_candles, interval):
         ...
     ]
     """
-    result = []
-    for c in raw_candles:
-        try:
-            result.append({
-                "timestamp": int(float(c[0])),
-                "open": float(c[1]),
-                "high": float(c[2]),
-                "low": float(c[3]),
-                "close": float(c[4]),
-                "volume": float(c[6])
-            })
-        except Exception:
-            continue
-    return result[-100:]
+    return decode_kraken(raw_candles).to_dicts()[-100:]
@@ -0,0 +1,203 @@
+# =====================================================
+# utils/candle_store.py
+# v1.0 — Columnar NumPy ring buffer for candles
+# =====================================================
+#
+# One CandleRing per (broker, pair, timeframe). Columns are preallocated at
+# twice the capacity and every bar is written twice (slot i and i + capacity),
+# so the newest `len` bars are always one contiguous slice: column accessors
+# (closes, highs, ...) are zero-copy views and appends stay O(1).
+#
+# For existing callers the ring also behaves like a list of candle dicts:
+# len(), ring[-1], ring[-5:], iteration and truthiness all work.
+
+import os
+
+import numpy as np
+
+CANDLE_DTYPE = np.float32 if os.getenv("CANDLE_DTYPE", "float64").lower() == "float32" else np.float64
+
+FIELDS = ("open", "high", "low", "close", "volume")
+
+
+class CandleRing:
+    """Fixed-capacity OHLCV ring with int64 timestamps and float columns."""
+
+    __slots__ = ("capacity", "dtype", "_ts", "_cols", "_last", "_len", "__weakref__")
+
+    def __init__(self, capacity: int = 100, dtype=CANDLE_DTYPE):
+        self.capacity = int(capacity)
+        self.dtype = np.dtype(dtype)
+        self._ts = np.zeros(2 * self.capacity, dtype=np.int64)
+        self._cols = np.zeros((len(FIELDS), 2 * self.capacity), dtype=self.dtype)
+        self._last = -1   # slot of the newest bar in [0, capacity)
+        self._len = 0
+
+    @classmethod
+    def from_candles(cls, candles, capacity: int = None, dtype=CANDLE_DTYPE):
+        """Build a ring from a list of candle dicts (oldest → newest)."""
+        candles = list(candles)
+        ring = cls(capacity or max(len(candles), 1), dtype)
+        for c in candles[-ring.capacity:]:
+            ring.append(c)
+        return ring
+
+    @classmethod
+    def from_arrays(cls, ts, opens, highs, lows, closes, volumes, capacity: int = None, dtype=CANDLE_DTYPE):
+        """Build a ring from column arrays (oldest → newest)."""
+        ring = cls(capacity or max(len(ts), 1), dtype)
+        ring.extend_arrays(ts, opens, highs, lows, closes, volumes)
+        return ring
+
+    # --- Writes ---
+    def append_bar(self, ts, o, h, l, c, v):
+        slot = (self._last + 1) % self.capacity
+        mirror = slot + self.capacity
+        self._ts[slot] = self._ts[mirror] = ts
+        col = self._cols
+        col[0, slot] = col[0, mirror] = o
+        col[1, slot] = col[1, mirror] = h
+        col[2, slot] = col[2, mirror] = l
+        col[3, slot] = col[3, mirror] = c
+        col[4, slot] = col[4, mirror] = v
+        self._last = slot
+        if self._len < self.capacity:
+            self._len += 1
+
+    def append(self, candle: dict):
+        self.append_bar(
+            candle["timestamp"], candle["open"], candle["high"],
+            candle["low"], candle["close"], candle.get("volume", 0.0),
+        )
+
+    def extend_arrays(self, ts, opens, highs, lows, closes, volumes):
+        """Bulk append columns; only the last `capacity` bars are kept."""
+        n = len(ts)
+        if n == 0:
+            return
+        cap = self.capacity
+        take = min(n, cap)
+        columns = [c[n - take:] for c in (ts, opens, highs, lows, closes, volumes)]
+        start = (self._last + 1) % cap
+        # At most two contiguous runs: [start, cap) and the wrap-around [0, rest)
+        first = min(take, cap - start)
+        for dst, src in ((start, slice(0, first)), (0, slice(first, take))):
+            width = src.stop - src.start
+            if not width:
+                continue
+            for base in (dst, dst + cap):
+                self._ts[base:base + width] = columns[0][src]
+                for f in range(len(FIELDS)):
+                    self._cols[f, base:base + width] = columns[f + 1][src]
+        self._last = (start + take - 1) % cap
+        self._len = min(self._len + take, cap)
+
+    def pop(self):
+        """Drop the newest bar (used to replace a still-forming bar)."""
+        if not self._len:
+            raise IndexError("pop from empty CandleRing")
+        bar = self[-1]
+        self._last = (self._last - 1) % self.capacity
+        self._len -= 1
+        return bar
+
+    def merge(self, fresh, size: int = None):
+        """
+        Same contract as candle_cache.merge_candles: bars at or after the first
+        fresh timestamp are replaced, then fresh bars are appended. The window
+        size is the ring capacity.
+        """
+        if fresh is None or not len(fresh):
+            return self
+        if isinstance(fresh, CandleRing):
+            first_ts = int(fresh.timestamps[0])
+            while self._len and self._ts[self._last] >= first_ts:
+                self.pop()
+            self.extend_arrays(fresh.timestamps, *fresh.columns())
+            return self
+        first_ts = fresh[0]["timestamp"]
+        while self._len and self._ts[self._last] >= first_ts:
+            self.pop()
+        for c in fresh:
+            self.append(c)
+        return self
+
+    # --- Zero-copy column views ---
+    def _window(self) -> slice:
+        end = self._last + self.capacity + 1
+        return slice(end - self._len, end)
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        return self._ts[self._window()]
+
+    @property
+    def opens(self) -> np.ndarray:
+        return self._cols[0, self._window()]
+
+    @property
+    def highs(self) -> np.ndarray:
+        return self._cols[1, self._window()]
+
+    @property
+    def lows(self) -> np.ndarray:
+        return self._cols[2, self._window()]
+
+    @property
+    def closes(self) -> np.ndarray:
+        return self._cols[3, self._window()]
+
+    @property
+    def volumes(self) -> np.ndarray:
+        return self._cols[4, self._window()]
+
+    def columns(self):
+        """(opens, highs, lows, closes, volumes) views."""
+        w = self._window()
+        return tuple(self._cols[i, w] for i in range(len(FIELDS)))
+
+    # --- List-of-dicts compatibility ---
+    def __len__(self):
+        return self._len
+
+    def __bool__(self):
+        return self._len > 0
+
+    def _row(self, i: int) -> dict:
+        idx = self._window().start + i
+        row = {"timestamp": int(self._ts[idx])}
+        for f, name in enumerate(FIELDS):
+            row[name] = float(self._cols[f, idx])
+        return row
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self._row(i) for i in range(*key.indices(self._len))]
+        if key < 0:
+            key += self._len
+        if not 0 <= key < self._len:
+            raise IndexError("CandleRing index out of range")
+        return self._row(key)
+
+    def __iter__(self):
+        for i in range(self._len):
+            yield self._row(i)
+
+    def to_list(self) -> list:
+        return list(self)
+
+    def __repr__(self):
+        return f"CandleRing(len={self._len}, capacity={self.capacity}, dtype={self.dtype.name})"
+
+
+def closes_of(candles):
+    """Close column for a CandleRing (zero-copy) or a list of dicts."""
+    if isinstance(candles, CandleRing):
+        return candles.closes
+    return [c.get("close", 0) for c in candles if "close" in c]
+
+
+def volumes_of(candles):
+    if isinstance(candles, CandleRing):
+        return candles.volumes
+    return [c.get("volume", 1) for c in candles if "volume" in c]
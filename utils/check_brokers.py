@@ -39,7 +39,7 @@ def audit_broker(broker_name):
 def main():
     logger.info("🔍 Running ExtremeViper Broker Audit...\n")
     brokers = [f.replace(".py", "") for f in os.listdir(BROKERS_PATH)
-               if f.endswith(".py") and f not in ("__init__.py", "get_broker.py")]
+               if f.endswith(".py") and f not in ("__init__.py", "get_broker.py", "aio.py")]
 
     all_missing = {}
     for b in brokers:
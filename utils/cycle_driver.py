@@ -0,0 +1,90 @@
+# =====================================================
+# utils/cycle_driver.py
+# v1.0 — Concurrent per-broker universe fetch for each cycle
+# =====================================================
+import time
+import asyncio
+import logging
+
+from brokers.aio import get_async_broker, ASYNC_MAX_CONCURRENCY
+from broker import get_broker
+from utils.timeframe import TIMEFRAME
+from utils.candle_cache import candle_cache
+from utils.indicator_registry import SIGNAL_BARS
+from utils.bar_builder import bar_aggregator, BAR_BUILDER
+
+logger = logging.getLogger(__name__)
+
+
+async def _guarded(pair: str, coro):
+    """Await one pair's request; a failure only drops that pair."""
+    try:
+        return pair, await coro
+    except Exception as e:
+        logger.error(f"❌ Concurrent fetch failed for {pair}: {e}")
+        return pair, None
+
+
+async def gather_candles(broker_name: str, pairs, timeframe: str = TIMEFRAME, count: int = None,
+                         max_concurrency: int = ASYNC_MAX_CONCURRENCY, cache=candle_cache) -> dict:
+    """
+    Fetch candles for every pair of a broker concurrently → {pair: candles or None}.
+    With a cache (default), each pair only pulls bars newer than its cached window.
+    `count` defaults to the indicator warm-up (cache window when cached).
+    """
+    if cache is None:
+        count = count or SIGNAL_BARS
+    broker = get_async_broker(broker_name)
+    broker.set_max_concurrency(max_concurrency)
+
+    # Brokers with a multi-symbol endpoint (Alpaca) take the whole universe in a few requests
+    if hasattr(get_broker(broker_name), "fetch_candles_batch"):
+        try:
+            if cache is not None:
+                return await broker.run(cache.fetch_batch, broker_name, list(pairs), timeframe, count)
+            return await broker.run(broker.module.fetch_candles_batch, list(pairs), timeframe, count)
+        except Exception as e:
+            logger.error(f"❌ Batch fetch failed for {broker_name.upper()}: {e}")
+            return {pair: None for pair in pairs}
+
+    if cache is not None:
+        calls = (broker.run(cache.fetch, broker_name, pair, timeframe, count) for pair in pairs)
+    else:
+        calls = (broker.fetch_candles(pair, timeframe, count) for pair in pairs)
+    results = await asyncio.gather(*(_guarded(pair, req) for pair, req in zip(pairs, calls)))
+    return dict(results)
+
+
+async def gather_prices(broker_name: str, pairs, max_concurrency: int = ASYNC_MAX_CONCURRENCY) -> dict:
+    """Fetch latest prices for every pair of a broker concurrently → {pair: price or None}."""
+    broker = get_async_broker(broker_name)
+    broker.set_max_concurrency(max_concurrency)
+    results = await asyncio.gather(*(_guarded(pair, broker.get_price(pair)) for pair in pairs))
+    return dict(results)
+
+
+def fetch_universe(broker_name: str, pairs, timeframe: str = TIMEFRAME, count: int = None,
+                   max_concurrency: int = ASYNC_MAX_CONCURRENCY,
+                   local=bar_aggregator if BAR_BUILDER else None) -> dict:
+    """
+    Blocking entry point for the cycle loops: one broker's whole universe
+    in a single concurrent burst, so cycle latency tracks the slowest pair.
+    With a local bar builder (BAR_BUILDER=true), pairs whose streamed bars
+    are live skip the REST request entirely.
+    """
+    pairs = [p for p in pairs if p]
+    if not pairs:
+        return {}
+
+    start = time.perf_counter()
+    built = local.windows(broker_name, pairs, timeframe) if local is not None else {}
+    remote = [p for p in pairs if p not in built]
+    candles = asyncio.run(gather_candles(broker_name, remote, timeframe, count, max_concurrency)) if remote else {}
+    candles.update(built)
+    elapsed = (time.perf_counter() - start) * 1000
+    ok = sum(1 for c in candles.values() if c)
+    logger.info(
+        f"⚡ {broker_name.upper()} universe fetched: {ok}/{len(pairs)} pairs in {elapsed:.0f}ms "
+        f"({len(built)} local, concurrency={max_concurrency})"
+    )
+    return candles
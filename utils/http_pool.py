@@ -0,0 +1,191 @@
+# =====================================================
+# utils/http_pool.py
+# v1.0 — Pooled keep-alive HTTP transport for all brokers
+# =====================================================
+import os
+import time
+import logging
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# === Pool sizing (per broker session) ===
+POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", 4))   # distinct hosts kept per broker
+POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", 16))          # keep-alive sockets per host
+POOL_BLOCK = os.getenv("HTTP_POOL_BLOCK", "false").lower() == "true"
+
+# === Per-endpoint timeouts: (connect, read) seconds ===
+ENDPOINT_TIMEOUTS = {
+    "default": (3.05, 10),
+    "candles": (3.05, 10),
+    "price": (3.05, 5),
+    "ping": (2, 2),
+    "balance": (3.05, 10),
+    "order": (3.05, 15),
+    "token": (3.05, 10),
+}
+
+# Lightweight endpoints hit once at startup to open keep-alive sockets
+PREWARM_URLS = {
+    "kraken": os.getenv("KRAKEN_BASE_URL", "https://api.kraken.com") + "/0/public/Time",
+    "oanda": os.getenv("OANDA_BASE_URL", "https://api-fxpractice.oanda.com/v3") + "/accounts",
+    "alpaca": os.getenv("ALPACA_BASE_URL", "https://data.alpaca.markets/v2/stocks") + "/AAPL/quotes/latest",
+    "tos": "https://api.schwabapi.com/v1/oauth/token",
+}
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+_host_stats = {}
+_stats_lock = threading.Lock()
+
+
+def get_timeout(endpoint: str = "default"):
+    """Return the (connect, read) timeout for an endpoint, honouring HTTP_TIMEOUT_<ENDPOINT> overrides."""
+    override = os.getenv(f"HTTP_TIMEOUT_{endpoint.upper()}")
+    if override:
+        try:
+            return float(override)
+        except ValueError:
+            logger.warning(f"⚠️ Invalid HTTP_TIMEOUT_{endpoint.upper()}={override}, using default.")
+    return ENDPOINT_TIMEOUTS.get(endpoint, ENDPOINT_TIMEOUTS["default"])
+
+
+class _StatsAdapter(HTTPAdapter):
+    """HTTPAdapter that records per-host connection reuse after each request."""
+
+    def __init__(self, broker: str, **kwargs):
+        self.broker = broker
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().send(request, **kwargs)
+        finally:
+            self._record(request, kwargs, (time.perf_counter() - start) * 1000)
+
+    def _pool_for(self, request, kwargs):
+        """Resolve the urllib3 pool requests used for this call (same key, same pool)."""
+        if hasattr(self, "get_connection_with_tls_context"):  # requests >= 2.32.2
+            return self.get_connection_with_tls_context(
+                request, kwargs.get("verify", True), kwargs.get("proxies"), kwargs.get("cert")
+            )
+        return self.get_connection(request.url, kwargs.get("proxies"))
+
+    def _record(self, request, kwargs, elapsed_ms: float):
+        host = urlsplit(request.url).netloc
+        try:
+            opened = self._pool_for(request, kwargs).num_connections
+        except Exception:
+            opened = 0
+
+        with _stats_lock:
+            stats = _host_stats.setdefault(host, {
+                "broker": self.broker,
+                "requests": 0,
+                "connections": 0,
+                "total_ms": 0.0,
+            })
+            stats["requests"] += 1
+            stats["total_ms"] += elapsed_ms
+            # urllib3 counts sockets per pool; keep the high-water mark across pool rebuilds
+            stats["connections"] = max(stats["connections"], opened)
+
+
+def get_session(broker: str) -> requests.Session:
+    """Return the shared keep-alive session for a broker, creating it on first use."""
+    broker = (broker or "default").lower()
+    session = _sessions.get(broker)
+    if session is not None:
+        return session
+
+    with _sessions_lock:
+        session = _sessions.get(broker)
+        if session is None:
+            session = requests.Session()
+            adapter = _StatsAdapter(
+                broker,
+                pool_connections=POOL_CONNECTIONS,
+                pool_maxsize=POOL_MAXSIZE,
+                pool_block=POOL_BLOCK,
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _sessions[broker] = session
+            logger.debug(f"🔌 HTTP pool created for {broker.upper()} (maxsize={POOL_MAXSIZE})")
+    return session
+
+
+def request(broker: str, method: str, url: str, endpoint: str = "default", **kwargs) -> requests.Response:
+    """Send a request through the broker's pooled session with the endpoint's timeout."""
+    kwargs.setdefault("timeout", get_timeout(endpoint))
+    return get_session(broker).request(method, url, **kwargs)
+
+
+def get(broker: str, url: str, endpoint: str = "default", **kwargs) -> requests.Response:
+    return request(broker, "GET", url, endpoint, **kwargs)
+
+
+def post(broker: str, url: str, endpoint: str = "default", **kwargs) -> requests.Response:
+    return request(broker, "POST", url, endpoint, **kwargs)
+
+
+def prewarm(brokers=None, headers=None) -> dict:
+    """
+    Open keep-alive connections at startup so the first cycle skips TCP+TLS handshakes.
+    Returns {broker: True/False} for each prewarmed broker.
+    """
+    brokers = brokers or list(PREWARM_URLS)
+    headers = headers or {}
+    results = {}
+    for broker in brokers:
+        broker = broker.strip().lower()
+        url = PREWARM_URLS.get(broker)
+        if not url:
+            continue
+        try:
+            # Any HTTP response (even 401/405) means the socket is open and pooled
+            get(broker, url, endpoint="ping", headers=headers.get(broker))
+            results[broker] = True
+        except Exception as e:
+            logger.warning(f"⚠️ Prewarm failed for {broker.upper()}: {e}")
+            results[broker] = False
+    logger.info(f"🔥 HTTP pools prewarmed: {results}")
+    return results
+
+
+def get_pool_stats() -> dict:
+    """
+    Per-host connection reuse stats:
+      {host: {broker, requests, connections, reused, reuse_ratio, avg_ms}}
+    """
+    with _stats_lock:
+        snapshot = {host: dict(s) for host, s in _host_stats.items()}
+
+    for stats in snapshot.values():
+        reqs = stats["requests"]
+        stats["reused"] = max(0, reqs - stats["connections"])
+        stats["reuse_ratio"] = round(stats["reused"] / reqs, 3) if reqs else 0.0
+        stats["avg_ms"] = round(stats.pop("total_ms") / reqs, 2) if reqs else 0.0
+    return snapshot
+
+
+def log_pool_stats():
+    """Log one line per host with request and reuse counts."""
+    for host, s in get_pool_stats().items():
+        logger.info(
+            f"🔌 {s['broker'].upper()} {host}: {s['requests']} req | "
+            f"{s['connections']} conn | reuse={s['reuse_ratio']:.0%} | avg={s['avg_ms']}ms"
+        )
+
+
+def close_all():
+    """Close every pooled session (used on shutdown)."""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
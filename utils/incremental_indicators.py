@@ -0,0 +1,510 @@
+# =====================================================
+# utils/incremental_indicators.py
+# v1.0 — Streaming O(1)-per-bar indicator state
+# =====================================================
+#
+# Every indicator has:
+#   update(*inputs)  → value after a new bar
+#   amend(*inputs)   → value after replacing the newest bar (a still-forming
+#                      bar that was refreshed), without touching older state
+#   value            → current output (same neutral default as the batch form)
+#   snapshot() / restore(snap) → plain-dict state for persistence or rollback
+#
+# Each one mirrors a batch function in ta_engine / score_engine:
+#   WilderRSI    ↔ ta_engine.calc_rsi            SMARSI    ↔ score_engine.calculate_rsi
+#   EMA / MACD   ↔ ta_engine.calc_macd, score_engine.calculate_macd
+#   EMASlope     ↔ ta_engine.calc_ema_slope      ConvSlope ↔ score_engine.calculate_ema_slope
+#   RangeSpike   ↔ ta_engine.calc_vol_spike      VolumeSpike ↔ score_signal's volume ratio
+# Fixed-length forms (SMA RSI, the slopes, the range and volume ratios) match
+# the batch result on the same window, up to float rounding in running sums.
+# The EMA family carries state from the first bar it ever saw instead of
+# re-seeding at each window's start, so it equals the batch value on the
+# seeding window and then follows the infinite-history EMA. That is why
+# score_indicators() leaves MACD out: score_signal takes it from the window
+# (seeded at the window start) so live scores match score_batch and the
+# backtester on the same window.
+#
+# BarIndicators drives a named set of indicators from a CandleRing. It
+# applies only the bars newer than the last one it saw and amends the tail
+# bar when it has been refreshed, so each cycle costs O(new bars) no matter
+# how long the window is.
+
+import math
+import weakref
+from collections import deque
+
+import numpy as np
+
+# Running sums are rebuilt from their buffers this often to cancel float drift
+_RESYNC_EVERY = 512
+
+
+class EMA:
+    """y = alpha * x + (1 - alpha) * y_prev, seeded with the first input."""
+
+    sources = ("close",)
+
+    def __init__(self, period: int = None, alpha: float = None):
+        self.alpha = alpha if alpha is not None else 2.0 / (period + 1)
+        self.value = 0.0
+        self._prev = 0.0
+        self.count = 0
+
+    def update(self, x: float) -> float:
+        self._prev = self.value
+        self.count += 1
+        self.value = x if self.count == 1 else self.alpha * x + (1.0 - self.alpha) * self._prev
+        return self.value
+
+    def amend(self, x: float) -> float:
+        self.value = x if self.count == 1 else self.alpha * x + (1.0 - self.alpha) * self._prev
+        return self.value
+
+    def snapshot(self) -> dict:
+        return {"alpha": self.alpha, "value": self.value, "prev": self._prev, "count": self.count}
+
+    def restore(self, snap: dict):
+        self.alpha, self.value, self._prev, self.count = snap["alpha"], snap["value"], snap["prev"], snap["count"]
+        return self
+
+
+class MACD:
+    """MACD histogram; 0.0 until `slow` bars have been seen (as in the batch forms)."""
+
+    sources = ("close",)
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.slow_period = slow
+        self.fast, self.slow, self.signal = EMA(fast), EMA(slow), EMA(signal)
+
+    @property
+    def value(self) -> float:
+        if self.fast.count < self.slow_period:
+            return 0.0
+        return (self.fast.value - self.slow.value) - self.signal.value
+
+    def update(self, x: float) -> float:
+        self.signal.update(self.fast.update(x) - self.slow.update(x))
+        return self.value
+
+    def amend(self, x: float) -> float:
+        self.signal.amend(self.fast.amend(x) - self.slow.amend(x))
+        return self.value
+
+    def snapshot(self) -> dict:
+        return {"slow_period": self.slow_period, "fast": self.fast.snapshot(),
+                "slow": self.slow.snapshot(), "signal": self.signal.snapshot()}
+
+    def restore(self, snap: dict):
+        self.slow_period = snap["slow_period"]
+        self.fast.restore(snap["fast"])
+        self.slow.restore(snap["slow"])
+        self.signal.restore(snap["signal"])
+        return self
+
+
+class WilderRSI:
+    """ta_engine.calc_rsi: Wilder averages seeded with the mean of the first `period` moves."""
+
+    sources = ("close",)
+
+    def __init__(self, period: int = 7):
+        self.period = period
+        self.count = 0            # prices seen
+        self._last = self._before_last = 0.0
+        self._seed = []           # first `period` (gain, loss) pairs
+        self._avg = self._prev_avg = None
+        self._kind = None         # how the newest move was applied: seed / complete / smooth
+
+    @property
+    def value(self) -> float:
+        if self._avg is None:
+            return 50.0
+        gain, loss = self._avg
+        return 100.0 if loss == 0 else 100.0 - 100.0 / (1.0 + gain / loss)
+
+    def _smooth(self, avg, gain, loss):
+        p = self.period
+        return ((avg[0] * (p - 1) + gain) / p, (avg[1] * (p - 1) + loss) / p)
+
+    def _apply(self, delta: float):
+        gain, loss = max(delta, 0.0), max(-delta, 0.0)
+        if self._avg is None:
+            self._seed.append((gain, loss))
+            self._kind = "seed"
+            if len(self._seed) == self.period:
+                seed = (sum(g for g, _ in self._seed) / self.period, sum(l for _, l in self._seed) / self.period)
+                self._avg = self._smooth(seed, gain, loss)  # batch loop re-applies the last seed move
+                self._kind = "complete"
+        else:
+            self._prev_avg = self._avg
+            self._avg = self._smooth(self._avg, gain, loss)
+            self._kind = "smooth"
+
+    def update(self, price: float) -> float:
+        self.count += 1
+        self._before_last, self._last = self._last, price
+        if self.count > 1:
+            self._apply(price - self._before_last)
+        return self.value
+
+    def amend(self, price: float) -> float:
+        self._last = price
+        if self.count < 2:
+            return self.value
+        # Undo the newest move, then apply the corrected one
+        if self._kind == "smooth":
+            self._avg = self._prev_avg
+        else:
+            self._seed.pop()
+            self._avg = None
+        self._apply(price - self._before_last)
+        return self.value
+
+    def snapshot(self) -> dict:
+        return {"period": self.period, "count": self.count, "last": self._last,
+                "before_last": self._before_last, "seed": list(self._seed),
+                "avg": self._avg, "prev_avg": self._prev_avg, "kind": self._kind}
+
+    def restore(self, snap: dict):
+        self.period, self.count = snap["period"], snap["count"]
+        self._last, self._before_last = snap["last"], snap["before_last"]
+        self._seed = [tuple(s) for s in snap["seed"]]
+        self._avg = tuple(snap["avg"]) if snap["avg"] is not None else None
+        self._prev_avg = tuple(snap["prev_avg"]) if snap["prev_avg"] is not None else None
+        self._kind = snap["kind"]
+        return self
+
+
+class _RollingSum:
+    """Fixed-length window sum with O(1) push/replace and periodic exact resync."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.items = deque(maxlen=size)
+        self.total = 0.0
+        self._ops = 0
+
+    def push(self, x: float):
+        if len(self.items) == self.size:
+            self.total -= self.items[0]
+        self.items.append(x)
+        self.total += x
+        self._tick()
+
+    def replace_last(self, x: float):
+        self.total += x - self.items[-1]
+        self.items[-1] = x
+        self._tick()
+
+    def _tick(self):
+        self._ops += 1
+        if self._ops >= _RESYNC_EVERY:
+            self.total, self._ops = math.fsum(self.items), 0
+
+    def snapshot(self) -> dict:
+        return {"size": self.size, "items": list(self.items)}
+
+    def restore(self, snap: dict):
+        self.size = snap["size"]
+        self.items = deque(snap["items"], maxlen=self.size)
+        self.total, self._ops = math.fsum(self.items), 0
+        return self
+
+
+class SMARSI:
+    """score_engine.calculate_rsi: simple means of the last `period` up/down moves."""
+
+    sources = ("close",)
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.count = 0
+        self._last = self._before_last = 0.0
+        self._ups, self._downs = _RollingSum(period), _RollingSum(period)
+
+    @property
+    def value(self) -> float:
+        if self.count <= self.period:
+            return 50.0
+        rs = (self._ups.total / self.period) / (self._downs.total / self.period + 1e-6)
+        return float(100 - (100 / (1 + rs)))
+
+    def update(self, price: float) -> float:
+        self.count += 1
+        self._before_last, self._last = self._last, price
+        if self.count > 1:
+            delta = price - self._before_last
+            self._ups.push(max(delta, 0.0))
+            self._downs.push(max(-delta, 0.0))
+        return self.value
+
+    def amend(self, price: float) -> float:
+        self._last = price
+        if self.count > 1:
+            delta = price - self._before_last
+            self._ups.replace_last(max(delta, 0.0))
+            self._downs.replace_last(max(-delta, 0.0))
+        return self.value
+
+    def snapshot(self) -> dict:
+        return {"period": self.period, "count": self.count, "last": self._last, "before_last": self._before_last,
+                "ups": self._ups.snapshot(), "downs": self._downs.snapshot()}
+
+    def restore(self, snap: dict):
+        self.period, self.count = snap["period"], snap["count"]
+        self._last, self._before_last = snap["last"], snap["before_last"]
+        self._ups.restore(snap["ups"])
+        self._downs.restore(snap["downs"])
+        return self
+
+
+class EMASlope:
+    """ta_engine.calc_ema_slope: relative change of the EMA over the last `period` bars."""
+
+    sources = ("close",)
+
+    def __init__(self, period: int = 3):
+        self.period = period
+        self.ema = EMA(period)
+        self._values = deque(maxlen=period)
+
+    @property
+    def value(self) -> float:
+        if self.ema.count < self.period + 1:
+            return 0.0
+        return float((self._values[-1] - self._values[0]) / self._values[0])
+
+    def update(self, x: float) -> float:
+        self._values.append(self.ema.update(x))
+        return self.value
+
+    def amend(self, x: float) -> float:
+        self._values[-1] = self.ema.amend(x)
+        return self.value
+
+    def snapshot(self) -> dict:
+        return {"period": self.period, "ema": self.ema.snapshot(), "values": list(self._values)}
+
+    def restore(self, snap: dict):
+        self.period = snap["period"]
+        self.ema.restore(snap["ema"])
+        self._values = deque(snap["values"], maxlen=self.period)
+        return self
+
+
+class ConvSlope:
+    """score_engine.calculate_ema_slope: change of an exp-weighted FIR average between the last two bars."""
+
+    sources = ("close",)
+
+    def __init__(self, period: int = 20):
+        self.period = period
+        weights = np.exp(np.linspace(-1., 0., period))
+        self._weights = weights / weights.sum()
+        self._closes = deque(maxlen=period + 1)
+        self.count = 0
+
+    @property
+    def value(self) -> float:
+        if self.count < self.period + 2:
+            return 0.0
+        x = np.fromiter(self._closes, dtype=np.float64, count=self.period + 1)
+        # np.convolve flips the kernel: newest close pairs with weights[0]
+        w = self._weights
+        return float(np.dot(w, x[:0:-1]) - np.dot(w, x[-2::-1]))
+
+    def update(self, x: float) -> float:
+        self.count += 1
+        self._closes.append(x)
+        return self.value
+
+    def amend(self, x: float) -> float:
+        self._closes[-1] = x
+        return self.value
+
+    def snapshot(self) -> dict:
+        return {"period": self.period, "count": self.count, "closes": list(self._closes)}
+
+    def restore(self, snap: dict):
+        self.__init__(snap["period"])
+        self.count = snap["count"]
+        self._closes.extend(snap["closes"])
+        return self
+
+
+class RangeSpike:
+    """ta_engine.calc_vol_spike: mean high-low range of the last `period` bars over the `period` before."""
+
+    sources = ("high", "low")
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.count = 0
+        self._recent, self._prior = _RollingSum(period), _RollingSum(period)
+        self._prior_nonzero = 0   # exact zero test for the prior window despite float drift
+
+    @property
+    def value(self) -> float:
+        if self.count <= self.period * 2 or not self._prior_nonzero:
+            return 1.0
+        return float(round((self._recent.total / self.period) / (self._prior.total / self.period), 2))
+
+    def update(self, high: float, low: float) -> float:
+        self.count += 1
+        r = high - low
+        if len(self._recent.items) == self.period:
+            moved = self._recent.items[0]
+            if len(self._prior.items) == self.period and self._prior.items[0] != 0:
+                self._prior_nonzero -= 1
+            self._prior.push(moved)
+            self._prior_nonzero += moved != 0
+        self._recent.push(r)
+        return self.value
+
+    def amend(self, high: float, low: float) -> float:
+        self._recent.replace_last(high - low)
+        return self.value
+
+    def snapshot(self) -> dict:
+        return {"period": self.period, "count": self.count,
+                "recent": self._recent.snapshot(), "prior": self._prior.snapshot()}
+
+    def restore(self, snap: dict):
+        self.period, self.count = snap["period"], snap["count"]
+        self._recent.restore(snap["recent"])
+        self._prior.restore(snap["prior"])
+        self._prior_nonzero = sum(1 for r in self._prior.items if r != 0)
+        return self
+
+
+class VolumeSpike:
+    """score_signal's ratio: latest volume over the mean of the (window - 1) volumes before it."""
+
+    sources = ("volume",)
+
+    def __init__(self, window: int = 100, threshold: float = 2.0):
+        self.window = window
+        self.threshold = threshold
+        self.count = 0
+        self.last = 0.0
+        self._previous = _RollingSum(max(window - 1, 1))
+
+    @property
+    def ratio(self) -> float:
+        if not self._previous.items:
+            return 0.0
+        total = self._previous.total
+        if total != total:
+            # A NaN volume (unreconciled local bar) poisons the running sum; rebuild it
+            total = self._previous.total = math.fsum(self._previous.items)
+        mean = (total / len(self._previous.items)) or 1
+        return self.last / mean
+
+    @property
+    def value(self) -> bool:
+        return self.count > 3 and self.ratio > self.threshold
+
+    def update(self, volume: float) -> bool:
+        if self.count:
+            self._previous.push(self.last)
+        self.count += 1
+        self.last = volume
+        return self.value
+
+    def amend(self, volume: float) -> bool:
+        self.last = volume
+        return self.value
+
+    def snapshot(self) -> dict:
+        return {"window": self.window, "threshold": self.threshold, "count": self.count,
+                "last": self.last, "previous": self._previous.snapshot()}
+
+    def restore(self, snap: dict):
+        self.window, self.threshold = snap["window"], snap["threshold"]
+        self.count, self.last = snap["count"], snap["last"]
+        self._previous.restore(snap["previous"])
+        return self
+
+
+# =====================================================
+# === Driving a set of indicators from a candle window
+# =====================================================
+class BarIndicators:
+    """Named incremental indicators fed from a CandleRing's new bars."""
+
+    def __init__(self, indicators: dict):
+        self.indicators = indicators
+        self.last_ts = None
+        self.bars = 0
+
+    def _feed(self, columns: dict, i: int, amend: bool):
+        for ind in self.indicators.values():
+            args = [float(columns[s][i]) for s in ind.sources]
+            (ind.amend if amend else ind.update)(*args)
+
+    def sync(self, window) -> dict:
+        """Apply bars newer than the last one seen (amending a refreshed tail) and return values()."""
+        n = len(window)
+        if not n:
+            return self.values()
+        ts = window.timestamps
+        start = 0 if self.last_ts is None else int(ts.searchsorted(self.last_ts))
+        if start == n and self.last_ts is not None and int(ts[-1]) < self.last_ts:
+            raise ValueError("window is older than the indicator state")
+        columns = {"close": window.closes, "high": window.highs, "low": window.lows, "volume": window.volumes}
+        for i in range(start, n):
+            t = int(ts[i])
+            self._feed(columns, i, amend=(t == self.last_ts))
+            if t != self.last_ts:
+                self.bars += 1
+            self.last_ts = t
+        return self.values()
+
+    def values(self) -> dict:
+        return {name: ind.value for name, ind in self.indicators.items()}
+
+    def snapshot(self) -> dict:
+        return {"last_ts": self.last_ts, "bars": self.bars,
+                "indicators": {name: ind.snapshot() for name, ind in self.indicators.items()}}
+
+    def restore(self, snap: dict):
+        self.last_ts, self.bars = snap["last_ts"], snap["bars"]
+        for name, state in snap["indicators"].items():
+            self.indicators[name].restore(state)
+        return self
+
+
+def score_indicators(window: int = 100) -> BarIndicators:
+    """Fixed-length indicator set behind score_engine.score_signal (MACD comes from the window)."""
+    return BarIndicators({
+        "rsi": SMARSI(14),
+        "ema_slope": ConvSlope(20),
+        "volume_spike": VolumeSpike(window),
+    })
+
+
+def ta_indicators() -> BarIndicators:
+    """Indicator set matching ta_engine's short-period defaults."""
+    return BarIndicators({
+        "rsi": WilderRSI(7),
+        "macd": MACD(6, 19, 5),
+        "ema_slope": EMASlope(3),
+        "vol_spike": RangeSpike(14),
+    })
+
+
+# One state per live CandleRing (rings are long-lived and updated in place by the candle cache)
+_states = weakref.WeakKeyDictionary()
+
+
+def indicators_for(ring, factory=score_indicators, **kwargs) -> BarIndicators:
+    """The `factory(**kwargs)` state attached to a CandleRing, created on first use and synced to it."""
+    per_ring = _states.get(ring)
+    if per_ring is None:
+        per_ring = _states[ring] = {}
+    state = per_ring.get(factory)
+    if state is None:
+        state = per_ring[factory] = factory(**kwargs)
+    state.sync(ring)
+    return state
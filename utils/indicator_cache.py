@@ -0,0 +1,101 @@
+# =====================================================
+# utils/indicator_cache.py
+# v1.0 — LRU memo for per-bar indicator results
+# =====================================================
+#
+# Indicators only change when a bar closes, so results are memoized under
+# (broker, pair, timeframe, last bar timestamp). The memo also remembers the
+# newest entry for each (broker, pair, timeframe) and when it can first be
+# superseded: the close of the bar that is forming when it is stored. That is
+# bar_ts + one bar for feeds that include the open bar (Kraken) and
+# bar_ts + two bars for closed-bar-only feeds (OANDA drops incomplete candles).
+# Until then callers can skip the candle refresh as well.
+
+import os
+import time
+import threading
+from collections import OrderedDict
+
+from utils.timeframe import parse_timeframe_minutes
+
+INDICATOR_CACHE_SIZE = int(os.getenv("INDICATOR_CACHE_SIZE", 2048))
+
+
+class IndicatorCache:
+    """Thread-safe LRU of {(broker, pair, timeframe, bar_ts): result}."""
+
+    def __init__(self, maxsize: int = INDICATOR_CACHE_SIZE):
+        self.maxsize = max(1, int(maxsize))
+        self._entries = OrderedDict()
+        self._latest = {}   # (broker, pair, timeframe) → (newest bar_ts, valid until)
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, broker: str, pair: str, timeframe: str, bar_ts: int):
+        key = (broker.lower(), pair, timeframe, int(bar_ts))
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return value
+
+    def put(self, broker: str, pair: str, timeframe: str, bar_ts: int, value, now: float = None):
+        broker, bar_ts = broker.lower(), int(bar_ts)
+        key = (broker, pair, timeframe, bar_ts)
+        until = _next_close(bar_ts, timeframe, time.time() if now is None else now)
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            series = (broker, pair, timeframe)
+            if bar_ts >= self._latest.get(series, (bar_ts, 0))[0]:
+                self._latest[series] = (bar_ts, until)
+            while len(self._entries) > self.maxsize:
+                old, _ = self._entries.popitem(last=False)
+                if self._latest.get(old[:3], (None,))[0] == old[3]:
+                    del self._latest[old[:3]]
+                self.stats["evictions"] += 1
+        return value
+
+    def get_or_compute(self, broker: str, pair: str, timeframe: str, bar_ts: int, compute, now: float = None):
+        """Memoized `compute()`; None results are not stored."""
+        value = self.get(broker, pair, timeframe, bar_ts)
+        if value is None:
+            value = compute()
+            if value is not None:
+                self.put(broker, pair, timeframe, bar_ts, value, now)
+        return value
+
+    def current(self, broker: str, pair: str, timeframe: str, now: float = None):
+        """
+        The newest result for a series until a newer bar can exist (the close
+        of the bar forming when it was stored), else None. No candle data is needed.
+        """
+        series = (broker.lower(), pair, timeframe)
+        latest = self._latest.get(series)
+        if latest is None:
+            return None
+        bar_ts, until = latest
+        if (time.time() if now is None else now) >= until:
+            return None
+        return self.get(*series, bar_ts)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._latest.clear()
+
+
+def _next_close(bar_ts: int, timeframe: str, now: float) -> float:
+    """Close of the bar forming at `now`, on the grid of bar_ts (at least bar_ts + one bar)."""
+    tf = parse_timeframe_minutes(timeframe) * 60
+    return bar_ts + (max(0, int((now - bar_ts) // tf)) + 1) * tf
+
+
+# === Process-wide default memo ===
+indicator_cache = IndicatorCache()
@@ -0,0 +1,124 @@
+# =====================================================
+# utils/indicator_kernels.py
+# v1.0 — NumPy recursive-filter kernels (EMA, Wilder, MACD)
+# =====================================================
+#
+# Every exponential smoother here is the first-order filter
+#     y[t] = alpha * x[t] + (1 - alpha) * y[t - 1]
+# evaluated in blocks of EMA_BLOCK bars. Inside a block the response to the
+# inputs is one matrix product with the lower-triangular kernel
+# L[i, j] = alpha * (1 - alpha)^(i - j); the state carried in from the
+# previous block then decays as (1 - alpha)^(i + 1). The block-entry states
+# are themselves a first-order filter over the block ends, so they are
+# solved by the same kernel. No Python loop runs per bar or per block.
+#
+# All kernels accept 1-D (bars,) or 2-D (pairs × bars) arrays and filter along
+# the last axis. Seeding matches the scalar loops they replace: the EMA
+# starts at the first value, and Wilder starts at the mean of the first
+# `period` values.
+
+import os
+from functools import lru_cache
+
+import numpy as np
+
+EMA_BLOCK = int(os.getenv("EMA_BLOCK", 128))
+
+
+@lru_cache(maxsize=64)
+def _block_kernel(alpha: float, size: int):
+    """(L.T, carry decay powers) for one block; cached per (alpha, size)."""
+    decay = 1.0 - alpha
+    lag = np.arange(size)[:, None] - np.arange(size)[None, :]
+    weights = np.where(lag >= 0, alpha * decay ** np.maximum(lag, 0), 0.0)
+    carry = decay ** np.arange(1, size + 1)
+    weights.flags.writeable = carry.flags.writeable = False
+    return np.ascontiguousarray(weights.T), carry
+
+
+def ema_filter(x, alpha: float, init=None, block: int = EMA_BLOCK) -> np.ndarray:
+    """
+    y[t] = alpha * x[t] + (1 - alpha) * y[t-1] along the last axis.
+    `init` is y[-1] (scalar or one per row); defaults to x[..., 0], so y[0] == x[0].
+    """
+    x = np.asarray(x, dtype=np.float64)
+    flat = x.ndim == 1
+    x2 = x.reshape(1, -1) if flat else x
+    rows, n = x2.shape
+    if n == 0:
+        return np.empty_like(x)
+
+    state = x2[:, 0].copy() if init is None else np.broadcast_to(np.asarray(init, dtype=np.float64), (rows,)).copy()
+    size = min(block, n)
+    blocks = -(-n // size)
+    if blocks * size != n:
+        padded = np.zeros((rows, blocks * size))
+        padded[:, :n] = x2
+        x2 = padded
+
+    weights_t, carry = _block_kernel(float(alpha), size)
+    out = x2.reshape(rows, blocks, size) @ weights_t   # zero-state response per block
+
+    # State entering each block: s[k] = end[k] + D * s[k-1], D = (1 - alpha)^size.
+    # That is the same first-order filter again (alpha' = 1 - D) over the
+    # block ends, so it recurses instead of looping per block.
+    entering = np.empty((rows, blocks))
+    entering[:, 0] = state
+    if blocks > 1:
+        gain = 1.0 - (1.0 - alpha) ** size
+        ends = ema_filter(out[:, :-1, -1] / gain, gain, init=state, block=block)
+        entering[:, 1:] = ends.reshape(rows, blocks - 1)
+    out += entering[:, :, None] * carry
+
+    out = out.reshape(rows, blocks * size)[:, :n]
+    return out[0] if flat else out
+
+
+def ema(x, period: int) -> np.ndarray:
+    """EMA with alpha = 2 / (period + 1), seeded with the first value."""
+    return ema_filter(x, 2.0 / (period + 1))
+
+
+def wilder(x, period: int) -> np.ndarray:
+    """
+    Wilder smoothing (alpha = 1 / period), seeded with the mean of the first
+    `period` values. Output i is the average after x[period - 1 + i], which
+    matches the scalar ta_engine.calc_rsi loop (that loop re-applies
+    x[period - 1] once after seeding).
+    """
+    x = np.asarray(x, dtype=np.float64)
+    seed = x[..., :period].mean(axis=-1)
+    return ema_filter(x[..., period - 1:], 1.0 / period, init=seed)
+
+
+def macd(x, fast: int, slow: int, signal: int):
+    """(macd_line, signal_line, histogram), each EMA seeded with its first value."""
+    line = ema(x, fast) - ema(x, slow)
+    sig = ema(line, signal)
+    return line, sig, line - sig
+
+
+@lru_cache(maxsize=64)
+def _macd_hist_weights(n: int, fast: int, slow: int, signal: int) -> np.ndarray:
+    """Row h with macd(x)[2][..., -1] == x @ h for length-n windows (the seeded EMAs are linear in x)."""
+    h = macd(np.eye(n), fast, slow, signal)[2][:, -1]
+    h.flags.writeable = False
+    return h
+
+
+def macd_hist_last(x, fast: int, slow: int, signal: int):
+    """Last MACD histogram value of each window (last axis) as one dot product."""
+    x = np.asarray(x, dtype=np.float64)
+    return x @ _macd_hist_weights(x.shape[-1], fast, slow, signal)
+
+
+def rsi_wilder(prices, period: int) -> np.ndarray:
+    """Wilder RSI series (one value per bar from index `period` on), 100 where losses are 0."""
+    deltas = np.diff(np.asarray(prices, dtype=np.float64), axis=-1)
+    gains = np.where(deltas > 0, deltas, 0.0)
+    losses = np.where(deltas < 0, -deltas, 0.0)
+    avg_gain = wilder(gains, period)
+    avg_loss = wilder(losses, period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    return np.where(avg_loss == 0, 100.0, rsi)
@@ -1,4 +1,5 @@
-import os, requests, time, logging
+import os, time, logging
+from utils import http_pool
 
 KRAKEN_BASE_URL = os.getenv("KRAKEN_BASE_URL", "https://api.kraken.com/0/public/Ticker")
 
@@ -10,7 +11,7 @@ def get_price(pair):
     """Fetch latest ticker price from Kraken"""
     try:
         pair_fmt = normalize_pair(pair)
-        r = requests.get(f"{KRAKEN_BASE_URL}?pair={pair_fmt}", timeout=10)
+        r = http_pool.get("kraken", f"{KRAKEN_BASE_URL}?pair={pair_fmt}", endpoint="price")
 
         if r.status_code == 429:
             logging.warning("⏳ Kraken rate limit hit, sleeping 5s...")
@@ -0,0 +1,243 @@
+# =====================================================
+# utils/monte_carlo.py
+# v1.0 — Monte Carlo odds of the daily kill conditions
+# =====================================================
+#
+# Resamples historical trade outcomes (USD per trade) into many synthetic
+# trading days at once, as (days × trades) NumPy matrices, and reports how
+# often each kill condition would fire:
+#   daily_loss_limit    pnl_logger.check_pnl_limits / pnl_guard.check_daily_pnl_limit:
+#                       day PnL ≤ -ACCOUNT_BALANCE × MAX_DAILY_DRAWDOWN_PCT
+#   daily_profit_target pnl_logger.check_pnl_limits:
+#                       day PnL ≥ ACCOUNT_BALANCE × DAILY_PROFIT_TARGET_PCT
+#   daily_drawdown      core.risk_manager.check_daily_drawdown:
+#                       1 - balance / day start balance ≥ risk_manager's own
+#                       MAX_DAILY_DRAWDOWN_PCT (hard-coded there, not from env)
+#   loss_streak         core.risk_manager.record_trade_result:
+#                       MAX_CONSECUTIVE_LOSSES losing trades in a row
+# All conditions are checked after every trade, like the live hooks.
+#   hit[c]   share of days on which c is reached at some point
+#   first[c] share of days on which c is the condition that stops the bot
+#            ("none" = the day ends without a kill)
+# plus the distribution of each day's longest losing streak.
+#
+# daily_drawdown only differs from daily_loss_limit when the day start balance
+# (--start-balance, default ACCOUNT_BALANCE) or its percentage differs: with
+# start_balance × drawdown_pct == balance × loss_pct both fire on the same
+# trade, the tie goes to daily_loss_limit and daily_drawdown never "stops bot".
+# The report flags that case.
+#
+# Resampling:
+#   bootstrap        every trade drawn independently
+#   block bootstrap  runs of `block` consecutive historical trades (circular),
+#                    which keeps clustered wins / losses together
+# Trades per day: a fixed count, or drawn from the historical per-day counts.
+#
+# Usage:
+#   python -m utils.monte_carlo --pnl-logs "logs/pnl_*.json" --days 50000 --block 5
+#   python -m utils.monte_carlo --trades backtest_trades.csv
+
+import os
+import glob
+import json
+import logging
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from core.risk_manager import MAX_CONSECUTIVE_LOSSES, MAX_DAILY_DRAWDOWN_PCT as RISK_DAILY_DRAWDOWN_PCT
+
+logger = logging.getLogger(__name__)
+
+MAX_DAILY_DRAWDOWN_PCT = float(os.getenv("MAX_DAILY_DRAWDOWN_PCT", 0.10))  # pnl_logger's daily loss limit
+DAILY_PROFIT_TARGET_PCT = float(os.getenv("DAILY_PROFIT_TARGET_PCT", 0.20))
+ACCOUNT_BALANCE = float(os.getenv("ACCOUNT_BALANCE", 1000))
+MC_DAYS = int(os.getenv("MC_DAYS", 50_000))
+MC_CHUNK_DAYS = int(os.getenv("MC_CHUNK_DAYS", 10_000))
+
+CONDITIONS = ("daily_loss_limit", "daily_profit_target", "daily_drawdown", "loss_streak")
+
+
+# =====================================================
+# Historical outcomes
+# =====================================================
+def load_pnl_logs(pattern: str = "logs/pnl_*.json"):
+    """(trade PnLs in time order, trades per day) from pnl_logger's daily files."""
+    pnls, counts = [], []
+    for path in sorted(glob.glob(pattern)):
+        try:
+            with open(path) as f:
+                trades = json.load(f).get("trades", [])
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Skipping unreadable PnL log {path}: {e}")
+            continue
+        pnls.extend(float(t.get("profit_usd", 0.0)) for t in trades)
+        counts.append(len(trades))
+    return np.asarray(pnls, dtype=np.float64), np.asarray(counts, dtype=np.int64)
+
+
+def load_backtest_trades(path: str):
+    """(trade PnLs in exit order, trades per UTC day) from a utils.backtester trade CSV."""
+    df = pd.read_csv(path).sort_values("exit_time")
+    days = (df["exit_time"] // 86400).to_numpy()
+    counts = np.unique(days, return_counts=True)[1]
+    return df["pnl"].to_numpy(dtype=np.float64), counts
+
+
+# =====================================================
+# Resampling
+# =====================================================
+def resample(pnls, days: int, trades: int, block: int = None, rng=None) -> np.ndarray:
+    """(days × trades) matrix of outcomes drawn from `pnls` (block bootstrap when block > 1)."""
+    pnls = np.asarray(pnls, dtype=np.float64)
+    rng = rng or np.random.default_rng()
+    n = len(pnls)
+    if not block or block <= 1:
+        return pnls[rng.integers(0, n, (days, trades))]
+    blocks = -(-trades // block)
+    starts = rng.integers(0, n, (days, blocks, 1))
+    idx = (starts + np.arange(block)) % n
+    return pnls[idx.reshape(days, blocks * block)[:, :trades]]
+
+
+def loss_streaks(losses: np.ndarray) -> np.ndarray:
+    """Length of the losing run ending at each trade (row-wise, resets on a non-loss)."""
+    count = np.cumsum(losses, axis=1)
+    last_reset = np.maximum.accumulate(np.where(losses, 0, count), axis=1)
+    return count - last_reset
+
+
+def _first_hit(hit: np.ndarray) -> np.ndarray:
+    """Index of the first True per row, or the row length when there is none."""
+    return np.where(hit.any(axis=1), hit.argmax(axis=1), hit.shape[1])
+
+
+def simulate_days(outcomes: np.ndarray, balance: float = ACCOUNT_BALANCE, start_balance: float = None,
+                  loss_pct: float = MAX_DAILY_DRAWDOWN_PCT, drawdown_pct: float = RISK_DAILY_DRAWDOWN_PCT,
+                  profit_pct: float = DAILY_PROFIT_TARGET_PCT, max_losses: int = MAX_CONSECUTIVE_LOSSES) -> dict:
+    """
+    Kill-condition trigger points for a (days × trades) outcome matrix (NaN =
+    no trade). Returns {"first_hit": {condition: trade index or trades},
+    "max_streak", "pnl"} per day, where pnl is the day PnL without kills.
+    """
+    start_balance = balance if start_balance is None else start_balance
+    traded = ~np.isnan(outcomes)
+    pnl = np.cumsum(np.where(traded, outcomes, 0.0), axis=1)
+    streak = loss_streaks(traded & (outcomes < 0))
+    # A day with no trades never reaches a trade-time check
+    first_hit = {
+        "daily_loss_limit": _first_hit(traded & (pnl <= -balance * loss_pct)),
+        "daily_profit_target": _first_hit(traded & (pnl >= balance * profit_pct)),
+        "daily_drawdown": _first_hit(traded & (1 - (start_balance + pnl) / start_balance >= drawdown_pct)),
+        "loss_streak": _first_hit(streak >= max_losses),
+    }
+    return {"first_hit": first_hit, "max_streak": streak.max(axis=1, initial=0), "pnl": pnl[:, -1]}
+
+
+def run(pnls, days: int = MC_DAYS, trades_per_day=None, block: int = None, seed: int = None,
+        chunk: int = MC_CHUNK_DAYS, max_losses: int = MAX_CONSECUTIVE_LOSSES, **limits) -> dict:
+    """
+    Monte Carlo over `days` synthetic days. `trades_per_day` is an int or an
+    array of historical per-day counts to draw from (default: 20). `limits`
+    go to simulate_days (balance, start_balance, loss_pct, drawdown_pct, profit_pct).
+    """
+    pnls = np.asarray(pnls, dtype=np.float64)
+    if not len(pnls):
+        raise ValueError("Monte Carlo needs at least one historical trade outcome")
+    rng = np.random.default_rng(seed)
+    counts = np.atleast_1d(np.asarray(20 if trades_per_day is None else trades_per_day, dtype=np.int64))
+    width = max(1, int(counts.max()))
+
+    hit = dict.fromkeys(CONDITIONS, 0)
+    first = dict.fromkeys(CONDITIONS + ("none",), 0)
+    streaks = np.zeros(width + 1, dtype=np.int64)
+    day_pnl = []
+    for lo in range(0, days, chunk):
+        n = min(chunk, days - lo)
+        outcomes = resample(pnls, n, width, block, rng)
+        per_day = counts[rng.integers(0, len(counts), n)] if len(counts) > 1 else np.full(n, counts[0])
+        outcomes[np.arange(width) >= per_day[:, None]] = np.nan
+        result = simulate_days(outcomes, max_losses=max_losses, **limits)
+
+        at = np.vstack([result["first_hit"][c] for c in CONDITIONS])   # conditions × days
+        for k, c in enumerate(CONDITIONS):
+            hit[c] += int((at[k] < width).sum())
+        stopper = at.argmin(axis=0)                # ties go to the earlier condition in CONDITIONS
+        stopped = at.min(axis=0) < width
+        for k, c in enumerate(CONDITIONS):
+            first[c] += int((stopped & (stopper == k)).sum())
+        first["none"] += int((~stopped).sum())
+        streaks += np.bincount(result["max_streak"], minlength=width + 1)[:width + 1]
+        day_pnl.append(result["pnl"])
+
+    day_pnl = np.concatenate(day_pnl)
+    balance = limits.get("balance", ACCOUNT_BALANCE)
+    start_balance = balance if limits.get("start_balance") is None else limits["start_balance"]
+    same = np.isclose(start_balance * limits.get("drawdown_pct", RISK_DAILY_DRAWDOWN_PCT),
+                      balance * limits.get("loss_pct", MAX_DAILY_DRAWDOWN_PCT))
+    return {
+        "days": days,
+        "trades_per_day": float(counts.mean()),
+        "block": block or 1,
+        "drawdown_is_loss_limit": bool(same),
+        "hit": {c: v / days for c, v in hit.items()},
+        "first": {c: v / days for c, v in first.items()},
+        "max_streak": {k: v / days for k, v in enumerate(streaks.tolist()) if v},
+        "streak_at_limit": float(streaks[max_losses:].sum() / days),
+        "day_pnl": {f"p{q}": float(v) for q, v in zip((5, 25, 50, 75, 95), np.percentile(day_pnl, (5, 25, 50, 75, 95)))},
+    }
+
+
+def format_report(report: dict, max_losses: int = MAX_CONSECUTIVE_LOSSES) -> str:
+    lines = [
+        f"🎲 {report['days']} synthetic days, {report['trades_per_day']:.1f} trades/day, block={report['block']}",
+        "",
+        f"  {'condition':<22}{'hit':>9}{'stops bot':>11}",
+    ]
+    for c in CONDITIONS:
+        lines.append(f"  {c:<22}{report['hit'][c]:>9.2%}{report['first'][c]:>11.2%}")
+    lines.append(f"  {'(no kill)':<22}{'':>9}{report['first']['none']:>11.2%}")
+    if report.get("drawdown_is_loss_limit"):
+        lines.append("  daily_drawdown has the same threshold as daily_loss_limit here (set --start-balance "
+                     "or --drawdown-pct to tell them apart)")
+    lines += ["", f"  Longest losing streak per day (limit {max_losses}):"]
+    for k, p in report["max_streak"].items():
+        mark = "  ◀ pause" if k >= max_losses else ""
+        lines.append(f"    {k:>3}  {p:>8.2%}{mark}")
+    lines += [f"  P(streak ≥ {max_losses}) = {report['streak_at_limit']:.2%}", "",
+              "  Day PnL (no kills): " + "  ".join(f"{k}={v:+.2f}" for k, v in report["day_pnl"].items())]
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo odds of the daily drawdown / profit / streak limits")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--pnl-logs", default="logs/pnl_*.json", help="glob of pnl_logger daily files")
+    source.add_argument("--trades", help="utils.backtester trade CSV")
+    parser.add_argument("--days", type=int, default=MC_DAYS)
+    parser.add_argument("--trades-per-day", type=int, help="fixed count (default: historical per-day counts)")
+    parser.add_argument("--block", type=int, help="block bootstrap length (default: plain bootstrap)")
+    parser.add_argument("--balance", type=float, default=ACCOUNT_BALANCE)
+    parser.add_argument("--start-balance", type=float, help="risk_manager day start balance (default: --balance)")
+    parser.add_argument("--loss-pct", type=float, default=MAX_DAILY_DRAWDOWN_PCT)
+    parser.add_argument("--drawdown-pct", type=float, default=RISK_DAILY_DRAWDOWN_PCT)
+    parser.add_argument("--profit-pct", type=float, default=DAILY_PROFIT_TARGET_PCT)
+    parser.add_argument("--max-losses", type=int, default=MAX_CONSECUTIVE_LOSSES)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    pnls, counts = load_backtest_trades(args.trades) if args.trades else load_pnl_logs(args.pnl_logs)
+    if not len(pnls):
+        parser.error("No historical trades found")
+    report = run(
+        pnls, args.days, args.trades_per_day or counts, args.block, args.seed,
+        max_losses=args.max_losses, balance=args.balance, start_balance=args.start_balance,
+        loss_pct=args.loss_pct, drawdown_pct=args.drawdown_pct, profit_pct=args.profit_pct,
+    )
+    print(format_report(report, args.max_losses))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
-import os, requests, time, logging
+import os, time, logging
+from utils import http_pool
 
 OANDA_API_TOKEN = os.getenv("OANDA_API_TOKEN")
 OANDA_ACCOUNT_ID = os.getenv("OANDA_ACCOUNT_ID")
@@ -12,7 +13,7 @@ def get_price(pair):
     try:
         pair_fmt = pair.replace("/", "_")
         url = f"{BASE_URL}/accounts/{OANDA_ACCOUNT_ID}/pricing?instruments={pair_fmt}"
-        r = requests.get(url, headers=HEADERS, timeout=10)
+        r = http_pool.get("oanda", url, endpoint="price", headers=HEADERS)
 
         if r.status_code == 429:
             logging.warning("⏳ OANDA rate limit hit, sleeping 5s...")
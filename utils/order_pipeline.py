@@ -0,0 +1,250 @@
+# =====================================================
+# utils/order_pipeline.py
+# v1.0 — Non-blocking order submission with per-broker in-flight limits
+# =====================================================
+#
+# The scan loop only enqueues decisions; it never waits on order I/O:
+#   enqueue()   → per-broker executor (ORDER_MAX_IN_FLIGHT threads, i.e. at
+#                 most that many place_order calls in flight per broker;
+#                 ORDER_MAX_IN_FLIGHT_<BROKER> overrides one broker)
+#   completion  → one event dict per order, delivered to every stage
+# Each stage (log, trade log, PnL, Telegram) has its own thread and queue, so
+# a slow Telegram call never holds up the cooldown / PnL files, and each stage
+# sees completions in the order they happened.
+#
+# A pair with an order queued or in flight is `busy`; a second order for it is
+# rejected until the first completes. A fill starts the pair's cooldown in
+# memory inside _complete, under the lock and before the pair stops being
+# busy, so there is no moment where it is neither; the trade log stage only
+# persists it to disk. Each broker's backlog is capped at ORDER_QUEUE_MAX.
+#
+# Event: {"ticket", "broker", "pair", "side", "lot_size", "order" (place_order
+#         kwargs; pair and side go positionally, as brokers name them pair or
+#         symbol), "result", "error", "queued", "started", "finished",
+#         "traded_at" (cooldown start, fills only)}
+
+import os
+import time
+import queue
+import logging
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from broker import get_broker
+from utils.trade_control_logger import trade_control, persist_trade
+from utils.pnl_logger import log_trade_result
+from utils.telegram_service import send_telegram_message
+
+logger = logging.getLogger(__name__)
+
+ORDER_MAX_IN_FLIGHT = int(os.getenv("ORDER_MAX_IN_FLIGHT", 4))
+ORDER_QUEUE_MAX = int(os.getenv("ORDER_QUEUE_MAX", 256))
+
+
+class _Stage:
+    """One completion consumer on its own thread."""
+
+    def __init__(self, name: str, fn):
+        self.name = name
+        self.fn = fn
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name=f"order-{name}", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while True:
+            event = self.queue.get()
+            try:
+                if event is None:
+                    return
+                self.fn(event)
+            except Exception as e:
+                logger.error(f"❌ Order stage '{self.name}' failed for {event['pair']}: {e}")
+            finally:
+                self.queue.task_done()
+
+
+class OrderPipeline:
+    """Queue → per-broker executors → completion events → stages."""
+
+    def __init__(self, max_in_flight: int = ORDER_MAX_IN_FLIGHT, queue_max: int = ORDER_QUEUE_MAX,
+                 resolve=get_broker, control=trade_control):
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.queue_max = queue_max
+        self.resolve = resolve          # broker name → module with place_order
+        self.control = control          # TradeControl whose cooldown a fill starts
+        self._executors = {}            # broker → ThreadPoolExecutor
+        self._backlog = {}              # broker → orders queued or in flight
+        self._active = {}               # (broker, pair) → ticket
+        self._futures = {}              # ticket → (future, event)
+        self._stages = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.stats = {"enqueued": 0, "filled": 0, "failed": 0, "rejected": 0, "cancelled": 0, "latency_ms": 0.0}
+
+    # --- Wiring ---
+    def add_stage(self, name: str, fn):
+        """Register fn(event), run on its own thread for every completion."""
+        self._stages.append(_Stage(name, fn))
+        return self
+
+    def in_flight_limit(self, broker: str) -> int:
+        return max(1, int(os.getenv(f"ORDER_MAX_IN_FLIGHT_{broker.upper()}", self.max_in_flight)))
+
+    def _executor(self, broker: str) -> ThreadPoolExecutor:
+        executor = self._executors.get(broker)
+        if executor is None:
+            limit = self.in_flight_limit(broker)
+            executor = self._executors[broker] = ThreadPoolExecutor(limit, thread_name_prefix=f"orders-{broker}")
+            logger.info(f"📮 Order lane for {broker.upper()}: {limit} in flight, backlog ≤ {self.queue_max}")
+        return executor
+
+    # --- Producer side (scan loop) ---
+    def busy(self, pair: str, broker: str) -> bool:
+        """True while an order for this pair is queued or in flight."""
+        return (broker.lower(), pair) in self._active
+
+    def enqueue(self, broker: str, pair: str, side: str, **order):
+        """
+        Hand an order to the broker's lane and return its ticket at once.
+        `order` goes to place_order (price, sl, tp, lot_size). Returns None
+        when the pair is busy or the broker's backlog is full.
+        """
+        broker = broker.lower()
+        with self._lock:
+            if (broker, pair) in self._active:
+                self.stats["rejected"] += 1
+                logger.info(f"📮 {pair} ({broker.upper()}) already has an order in flight — skipped.")
+                return None
+            if self._backlog.get(broker, 0) >= self.queue_max:
+                self.stats["rejected"] += 1
+                logger.warning(f"⚠️ {broker.upper()} order backlog full ({self.queue_max}) — {pair} dropped.")
+                return None
+            ticket = next(self._ids)
+            event = {
+                "ticket": ticket, "broker": broker, "pair": pair, "side": side,
+                "lot_size": order.get("lot_size"), "order": order,
+                "result": None, "error": None, "queued": time.time(), "started": None, "finished": None,
+                "traded_at": None,
+            }
+            self._active[(broker, pair)] = ticket
+            self._backlog[broker] = self._backlog.get(broker, 0) + 1
+            self.stats["enqueued"] += 1
+            self._futures[ticket] = (self._executor(broker).submit(self._place, event), event)
+        return ticket
+
+    # --- Executor side ---
+    def _place(self, event: dict):
+        event["started"] = time.time()
+        try:
+            result = self.resolve(event["broker"]).place_order(event["pair"], event["side"], **event["order"])
+            if result is None:
+                raise RuntimeError("broker returned no order result")
+            event["result"] = result
+        except Exception as e:
+            event["error"] = str(e)
+        self._complete(event)
+
+    def _complete(self, event: dict):
+        event["finished"] = time.time()
+        with self._lock:
+            if not event["error"] and self.control is not None:
+                # Cooldown first, then release the pair: never neither busy nor cooling down
+                event["traded_at"] = self.control.mark_trade(event["pair"], event["broker"])
+            self._active.pop((event["broker"], event["pair"]), None)
+            self._backlog[event["broker"]] -= 1
+            self._futures.pop(event["ticket"], None)
+            if event["error"] == "cancelled":
+                self.stats["cancelled"] += 1
+            elif event["error"]:
+                self.stats["failed"] += 1
+            else:
+                self.stats["filled"] += 1
+                self.stats["latency_ms"] += (event["finished"] - event["queued"]) * 1000
+        for stage in self._stages:
+            stage.queue.put(event)
+
+    # --- Control ---
+    def cancel_pending(self) -> int:
+        """Drop orders that have not reached the broker yet (e.g. on kill switch)."""
+        with self._lock:
+            queued = list(self._futures.values())
+        cancelled = 0
+        for future, event in queued:
+            if future.cancel():
+                event["error"] = "cancelled"
+                self._complete(event)
+                cancelled += 1
+        if cancelled:
+            logger.warning(f"🛑 {cancelled} queued orders cancelled")
+        return cancelled
+
+    def drain(self, timeout: float = None):
+        """Wait for in-flight orders and for every stage to process their events."""
+        with self._lock:
+            futures = [f for f, _ in self._futures.values()]
+        wait(futures, timeout=timeout)
+        for stage in self._stages:
+            stage.queue.join()
+
+    def close(self, timeout: float = None):
+        self.drain(timeout)
+        for executor in self._executors.values():
+            executor.shutdown(wait=True)
+        for stage in self._stages:
+            stage.queue.put(None)
+
+    def pending(self) -> int:
+        return sum(self._backlog.values())
+
+
+# =====================================================
+# Standard completion stages (what LIVEmain used to do inline)
+# =====================================================
+def log_stage(event: dict):
+    broker = event["broker"].upper()
+    waited = (event["finished"] - event["queued"]) * 1000
+    if event["error"]:
+        logger.error(f"💥 Order failed for {event['pair']} ({broker}): {event['error']}")
+    else:
+        logger.info(f"✅ LIVE ORDER [{broker}] #{event['ticket']} in {waited:.0f} ms: {event['result']}")
+
+
+def trade_log_stage(event: dict):
+    if not event["error"]:
+        persist_trade(event["pair"], event["broker"], event["traded_at"])
+
+
+def pnl_stage(event: dict):
+    result = event["result"]
+    if event["error"] or result.get("paper"):
+        return   # paper fills log their realized PnL on close (utils.paper_broker)
+    log_trade_result(event["pair"], event["broker"], float(result.get("profit_usd", 0.0)))
+
+
+def notify_stage(event: dict):
+    if event["error"] == "cancelled":
+        return
+    if event["error"]:
+        send_telegram_message(f"⚠️ LIVE ORDER ERROR for {event['pair']}: {event['error']}")
+    else:
+        send_telegram_message(
+            f"✅ LIVE ORDER: {event['pair']} | {event['broker'].upper()} | "
+            f"{event['side'].upper()} | Size={float(event['lot_size'] or 0):.5f}"
+        )
+
+
+STANDARD_STAGES = (("log", log_stage), ("trade_log", trade_log_stage), ("pnl", pnl_stage), ("notify", notify_stage))
+
+_pipeline = None
+
+
+def get_order_pipeline() -> OrderPipeline:
+    """Process-wide pipeline with the standard stages (started on first use)."""
+    global _pipeline
+    if _pipeline is None:
+        _pipeline = OrderPipeline()
+        for name, fn in STANDARD_STAGES:
+            _pipeline.add_stage(name, fn)
+    return _pipeline
@@ -1,4 +1,5 @@
 # utils/pairmap.py
+import os
 
 # === OANDA ===
 PAIRMAP_OANDA = {
@@ -45,3 +46,50 @@ REVERSE_ALPACA = {v: k for k, v in PAIRMAP_ALPACA.items()}
 # === Combined List
 ALL_PAIRMAPS = [PAIRMAP_OANDA, PAIRMAP_KRAKEN, PAIRMAP_ALPACA]
 ENABLED_PAIRS = sorted(list({pair for m in ALL_PAIRMAPS for pair in m.keys()}))
+
+
+def asset_class(pair: str) -> str:
+    """'crypto' for Kraken-listed pairs, 'forex' for other X/Y pairs, else 'equities'."""
+    if not pair:
+        return None
+    if pair in PAIRMAP_KRAKEN:
+        return "crypto"
+    return "forex" if "/" in pair else "equities"
+
+
+# === USD conversion of quote-currency amounts
+# Fallback USD value of one unit of a quote currency, used only when no
+# conversion quote is available; USD_RATE_<CCY> overrides (e.g. USD_RATE_JPY=0.0064).
+STATIC_USD_RATES = {"EUR": 1.08, "GBP": 1.27, "JPY": 0.0067, "CAD": 0.73, "AUD": 0.66, "NZD": 0.60, "CHF": 1.13}
+
+
+def static_usd_rate(currency: str):
+    rate = os.getenv(f"USD_RATE_{currency}")
+    return float(rate) if rate else STATIC_USD_RATES.get(currency)
+
+
+def quote_to_usd(pair: str, amount: float, price: float, mid=None):
+    """
+    (USD amount, source) for an amount in `pair`'s quote currency. `mid(pair)`
+    returns a conversion quote (QUOTE/USD or USD/QUOTE) or None. source is
+    "usd" (no conversion needed), "quote", "static" (STATIC_USD_RATES), or
+    None with a None amount when no rate is known at all.
+    """
+    if "/" not in pair:
+        return amount, "usd"            # equities are priced in USD
+    base, quote = pair.split("/", 1)
+    if quote == "USD":
+        return amount, "usd"
+    if base == "USD":
+        return amount / price, "usd"
+    if mid is not None:
+        rate = mid(f"{quote}/USD")
+        if rate:
+            return amount * rate, "quote"
+        rate = mid(f"USD/{quote}")
+        if rate:
+            return amount / rate, "quote"
+    rate = static_usd_rate(quote)
+    if rate:
+        return amount * rate, "static"
+    return None, None
@@ -0,0 +1,351 @@
+# =====================================================
+# utils/paper_broker.py
+# v1.0 — Local fill engine for paper / DRY_RUN trading
+# =====================================================
+#
+# Simulated orders are matched against the live (utils.quote_store) or a
+# replayed quote stream instead of being reported "filled" at the requested
+# price:
+#   latency   an order can only fill on quotes at least PAPER_LATENCY_MS after
+#             it was submitted
+#   spread    quotes narrower than PAPER_SPREAD_BPS (REST snapshots are mids,
+#             i.e. zero spread) are widened to it around the mid
+#   slippage  market entries and stop exits fill PAPER_SLIPPAGE_BPS worse than
+#             the touch; take-profits are limits and fill at the touch
+# Buys fill at the ask, sells at the bid. Open positions exit when the bid
+# (longs) / ask (shorts) crosses the stop or target; the stop wins if both are
+# crossed by the same quote. Gaps fill at the quote that crossed the level.
+# Levels are oriented by side like backtester.signal_arrays: signals carry
+# the 5-bar low as stop_loss and the high as take_profit whatever the side, so
+# a sell's stop is the higher of the two. A level left on the wrong side of the
+# fill price is dropped (logged) instead of closing the position at once.
+#
+# Realized PnL (converted to USD through the quote currency) goes to
+# pnl_logger.log_trade_result, so the daily loss / profit limits and the kill
+# switch see dry-run results exactly like live ones. The conversion uses the
+# last QUOTE/USD or USD/QUOTE mid seen on the same broker; without one it
+# falls back to pairmap.STATIC_USD_RATES (USD_RATE_<CCY>) with a warning, and
+# a currency with no rate at all is not logged rather than counted as USD.
+#
+# Open positions are kept per (broker, pair) as columns of one NumPy array,
+# so each quote checks every position in its pair with a few vector compares
+# (thousands of open orders cost microseconds per quote).
+
+import os
+import time
+import logging
+import itertools
+import threading
+from collections import deque
+
+import numpy as np
+
+from utils.quote_store import quote_store
+from utils.pairmap import quote_to_usd
+from utils.pnl_logger import log_trade_result
+
+logger = logging.getLogger(__name__)
+
+PAPER_TRADING = os.getenv("PAPER_TRADING", "true").lower() == "true"
+PAPER_SPREAD_BPS = float(os.getenv("PAPER_SPREAD_BPS", 1.0))
+PAPER_SLIPPAGE_BPS = float(os.getenv("PAPER_SLIPPAGE_BPS", 0.5))
+PAPER_LATENCY_MS = float(os.getenv("PAPER_LATENCY_MS", 250))
+PAPER_HISTORY = int(os.getenv("PAPER_HISTORY", 10_000))
+
+# Position columns
+_ID, _SIGN, _ENTRY, _SL, _TP, _UNITS, _OPENED = range(7)
+
+
+class _Book:
+    """Open positions of one (broker, pair): a 7 × capacity float array, first `n` columns live."""
+
+    def __init__(self, capacity: int = 16):
+        self.data = np.zeros((7, capacity))
+        self.n = 0
+
+    def add(self, row):
+        if self.n == self.data.shape[1]:
+            self.data = np.concatenate([self.data, np.zeros_like(self.data)], axis=1)
+        self.data[:, self.n] = row
+        self.n += 1
+
+    def hits(self, bid: float, ask: float):
+        """(stop, target) masks over the live positions (NaN levels never trigger)."""
+        d = self.data[:, :self.n]
+        long = d[_SIGN] > 0
+        stop = np.where(long, bid <= d[_SL], ask >= d[_SL])
+        target = np.where(long, bid >= d[_TP], ask <= d[_TP]) & ~stop
+        return stop, target
+
+    def take(self, mask) -> np.ndarray:
+        """Remove and return the masked positions (columns)."""
+        live = self.data[:, :self.n]
+        out = live[:, mask]
+        keep = live[:, ~mask]
+        self.n = keep.shape[1]
+        self.data[:, :self.n] = keep
+        return out
+
+
+class PaperBroker:
+    """Quote-driven fill engine; `clock` gives epoch seconds (a replay passes its own)."""
+
+    def __init__(self, store=quote_store, spread_bps: float = PAPER_SPREAD_BPS,
+                 slippage_bps: float = PAPER_SLIPPAGE_BPS, latency_ms: float = PAPER_LATENCY_MS,
+                 clock=time.time, on_close=None, history: int = PAPER_HISTORY):
+        self.store = store
+        self.spread = spread_bps / 1e4
+        self.slippage = slippage_bps / 1e4
+        self.latency = latency_ms / 1000
+        self.clock = clock
+        self._listeners = [on_close] if on_close else []
+        self._books = {}       # (broker, pair) → _Book
+        self._pending = {}     # (broker, pair) → [order dicts] awaiting a fill
+        self._orders = {}      # order id → pending order or open position info
+        self._mids = {}        # (broker, pair) → last mid, for USD conversion
+        self._fx_warned = set()
+        self.closed = deque(maxlen=history)
+        self.stats = {"submitted": 0, "filled": 0, "closed": 0, "stops": 0, "targets": 0, "realized_usd": 0.0}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._attached = False
+
+    # --- Lifecycle ---
+    def start(self):
+        if not self._attached:
+            self.store.add_listener(self.on_quote)
+            self._attached = True
+            logger.info(f"🧾 Paper fills on (spread ≥{self.spread * 1e4:g} bps, slippage {self.slippage * 1e4:g} bps, "
+                        f"latency {self.latency * 1000:g} ms)")
+        return self
+
+    def stop(self):
+        if self._attached:
+            self.store.remove_listener(self.on_quote)
+            self._attached = False
+
+    def on_position_close(self, callback):
+        """Register callback(trade dict) for every closed position."""
+        self._listeners.append(callback)
+
+    # --- Orders ---
+    def submit(self, broker: str, pair: str, side: str, price=None, sl=None, tp=None, lot_size=None,
+               ts: float = None) -> dict:
+        """
+        Queue a market order with optional SL / TP. Returns the order ack:
+        status "pending" until a quote at least `latency` later fills it
+        (immediately "filled" when latency is 0 and a quote is on hand).
+        """
+        broker = broker.lower()
+        side = side.lower()
+        ts = self.clock() if ts is None else ts
+        sl, tp = self._levels(side, sl, tp)
+        order = {
+            "order_id": next(self._ids),
+            "paper": True,
+            "status": "pending",
+            "broker": broker,
+            "pair": pair,
+            "side": side,
+            "requested_price": price,
+            "price": price,
+            "sl": sl,
+            "tp": tp,
+            "lot_size": float(lot_size or 0.0),
+            "submitted": ts,
+            "eligible": ts + self.latency,
+            "profit_usd": 0.0,     # realized on close, through pnl_logger
+        }
+        key = (broker, pair)
+        with self._lock:
+            self._pending.setdefault(key, []).append(order)
+            self._orders[order["order_id"]] = order
+            self.stats["submitted"] += 1
+        if not self.latency:
+            quote = self.store.get(broker, pair) if self.store is not None else None
+            if quote:
+                self.on_quote(broker, pair, quote)
+        return dict(order)
+
+    def cancel(self, order_id: int) -> bool:
+        """Drop a still-pending order."""
+        with self._lock:
+            order = self._orders.get(order_id)
+            if order is None or order["status"] != "pending":
+                return False
+            self._pending[(order["broker"], order["pair"])].remove(order)
+            order["status"] = "cancelled"
+            del self._orders[order_id]
+            return True
+
+    @staticmethod
+    def _levels(side: str, sl, tp):
+        """(stop, target) with the stop on the adverse side: below for buys, above for sells."""
+        if sl is None or tp is None:
+            return sl, tp
+        low, high = sorted((float(sl), float(tp)))
+        return (low, high) if side == "buy" else (high, low)
+
+    # --- Quote ingest ---
+    def _touch(self, bid: float, ask: float):
+        """Bid / ask widened to the minimum spread."""
+        mid = (bid + ask) / 2
+        half = max((ask - bid) / 2, mid * self.spread / 2)
+        return mid - half, mid + half
+
+    def on_quote(self, broker: str, pair: str, quote: dict):
+        """quote_store listener: fill due orders, then trigger stops / targets."""
+        broker = broker.lower()
+        key = (broker, pair)
+        bid, ask = self._touch(float(quote["bid"]), float(quote["ask"]))
+        ts = float(quote.get("ts") or self.clock())
+        closed = []
+        with self._lock:
+            self._mids[key] = (bid + ask) / 2
+            pending = self._pending.get(key)
+            if pending:
+                self._fill(key, pending, bid, ask, ts)
+            book = self._books.get(key)
+            if book is not None and book.n:
+                stop, target = book.hits(bid, ask)
+                if stop.any() or target.any():
+                    closed = self._close(key, book, stop, target, bid, ask, ts)
+        for trade in closed:
+            self._emit(trade)
+
+    def on_prices(self, broker: str, prices: dict, ts: float = None):
+        """Feed a REST snapshot ({pair: mid}); mids get the minimum spread."""
+        for pair, mid in prices.items():
+            if mid:
+                self.on_quote(broker, pair, {"bid": mid, "ask": mid, "ts": ts})
+
+    def _fill(self, key, pending: list, bid: float, ask: float, ts: float):
+        due = [o for o in pending if o["eligible"] <= ts]
+        if not due:
+            return
+        pending[:] = [o for o in pending if o["eligible"] > ts]
+        book = self._books.get(key)
+        if book is None:
+            book = self._books[key] = _Book()
+        for order in due:
+            sign = 1.0 if order["side"] == "buy" else -1.0
+            fill = ask * (1 + self.slippage) if sign > 0 else bid * (1 - self.slippage)
+            sl = np.nan if order["sl"] is None else float(order["sl"])
+            tp = np.nan if order["tp"] is None else float(order["tp"])
+            if (sl - fill) * sign >= 0:
+                logger.warning(f"⚠️ PAPER {key[1]} {order['side'].upper()} stop {sl} is not beyond the fill {fill:.5f} — ignored.")
+                sl, order["sl"] = np.nan, None
+            if (tp - fill) * sign <= 0:
+                logger.warning(f"⚠️ PAPER {key[1]} {order['side'].upper()} target {tp} is not beyond the fill {fill:.5f} — ignored.")
+                tp, order["tp"] = np.nan, None
+            book.add((order["order_id"], sign, fill, sl, tp, order["lot_size"], ts))
+            order.update(status="filled", price=fill, filled=ts)
+            self.stats["filled"] += 1
+            logger.info(f"🧾 PAPER {key[0].upper()} {order['side'].upper()} {order['lot_size']:g} {key[1]} "
+                        f"filled @ {fill:.5f} (SL={order['sl']} TP={order['tp']})")
+
+    def _close(self, key, book: _Book, stop, target, bid: float, ask: float, ts: float) -> list:
+        reasons = np.where(stop, 1, 0)[stop | target]   # 1 = stop, 0 = target (in column order)
+        rows = book.take(stop | target)
+        trades = []
+        for row, is_stop in zip(rows.T, reasons):
+            sign = row[_SIGN]
+            touch = bid if sign > 0 else ask
+            exit_price = touch * (1 - sign * self.slippage) if is_stop else touch
+            pnl = (exit_price - row[_ENTRY]) * sign * row[_UNITS]
+            trade = self._trade(key, row, exit_price, ts, "stop" if is_stop else "target", pnl)
+            trades.append(trade)
+        return trades
+
+    def _trade(self, key, row, exit_price: float, ts: float, reason: str, pnl: float) -> dict:
+        broker, pair = key
+        order_id = int(row[_ID])
+        self._orders.pop(order_id, None)
+        profit_usd = self.to_usd(broker, pair, pnl, exit_price)
+        if profit_usd is None:
+            profit_usd = float("nan")   # no USD rate: kept out of the PnL log (see _log_realized)
+        trade = {
+            "order_id": order_id, "broker": broker, "pair": pair,
+            "side": "buy" if row[_SIGN] > 0 else "sell", "lot_size": float(row[_UNITS]),
+            "entry": float(row[_ENTRY]), "exit": float(exit_price), "reason": reason,
+            "opened": float(row[_OPENED]), "closed": ts, "profit_usd": round(float(profit_usd), 2),
+        }
+        self.closed.append(trade)
+        self.stats["closed"] += 1
+        if reason in ("stop", "target"):
+            self.stats[reason + "s"] += 1
+        if profit_usd == profit_usd:
+            self.stats["realized_usd"] += profit_usd
+        return trade
+
+    def _emit(self, trade: dict):
+        logger.info(f"🧾 PAPER close {trade['pair']} {trade['side'].upper()} {trade['reason']} "
+                    f"@ {trade['exit']:.5f} → {trade['profit_usd']:+.2f} USD")
+        for callback in self._listeners:
+            try:
+                callback(trade)
+            except Exception as e:
+                logger.error(f"❌ Paper close listener failed for {trade['pair']}: {e}")
+
+    def close_all(self, broker: str = None, reason: str = "manual") -> list:
+        """Flatten open positions at the last known touch (e.g. on kill switch)."""
+        trades = []
+        with self._lock:
+            for key, book in self._books.items():
+                if (broker and key[0] != broker.lower()) or not book.n or key not in self._mids:
+                    continue
+                bid, ask = self._touch(self._mids[key], self._mids[key])
+                for row in book.take(np.ones(book.n, dtype=bool)).T:
+                    sign = row[_SIGN]
+                    exit_price = (bid if sign > 0 else ask) * (1 - sign * self.slippage)
+                    pnl = (exit_price - row[_ENTRY]) * sign * row[_UNITS]
+                    trades.append(self._trade(key, row, exit_price, self.clock(), reason, pnl))
+        for trade in trades:
+            self._emit(trade)
+        return trades
+
+    # --- Accounting ---
+    def to_usd(self, broker: str, pair: str, amount: float, price: float):
+        """Quote-currency PnL → USD (equities and X/USD are already USD); None without any rate."""
+        usd, source = quote_to_usd(pair, amount, price, lambda p: self._mids.get((broker, p)))
+        if source in ("static", None) and (broker, pair) not in self._fx_warned:
+            self._fx_warned.add((broker, pair))
+            if source == "static":
+                logger.warning(f"⚠️ No {pair.split('/')[1]} conversion quote on {broker.upper()} — "
+                               f"{pair} PnL converted at the static USD rate")
+            else:
+                logger.warning(f"⚠️ No USD rate for {pair} ({broker.upper()}) — its PnL is not logged")
+        return usd
+
+    def open_positions(self, broker: str = None) -> list:
+        with self._lock:
+            out = []
+            for (b, pair), book in self._books.items():
+                if broker and b != broker.lower():
+                    continue
+                for row in book.data[:, :book.n].T:
+                    out.append({
+                        "order_id": int(row[_ID]), "broker": b, "pair": pair,
+                        "side": "buy" if row[_SIGN] > 0 else "sell", "entry": float(row[_ENTRY]),
+                        "sl": float(row[_SL]), "tp": float(row[_TP]), "lot_size": float(row[_UNITS]),
+                        "opened": float(row[_OPENED]),
+                    })
+            return out
+
+    def open_count(self) -> int:
+        return sum(book.n for book in self._books.values())
+
+
+def _log_realized(trade: dict):
+    if trade["profit_usd"] == trade["profit_usd"]:    # NaN: no USD rate known
+        log_trade_result(trade["pair"], trade["broker"], trade["profit_usd"])
+
+
+# === Process-wide engine (the brokers' simulated place_order goes here when PAPER_TRADING=true) ===
+paper_broker = PaperBroker(on_close=_log_realized)
+
+
+def place_order(broker: str, pair: str, side: str, price=None, sl=None, tp=None, lot_size=None) -> dict:
+    """Submit to the process-wide engine, attaching it to the quote store on first use."""
+    paper_broker.start()
+    return paper_broker.submit(broker, pair, side, price, sl, tp, lot_size)
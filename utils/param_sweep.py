@@ -0,0 +1,402 @@
+# =====================================================
+# utils/param_sweep.py
+# v1.0 — Parallel parameter sweep over the backtester
+# =====================================================
+#
+# Fans utils.backtester runs out over a process pool, one task per config:
+#   min_score              fixed entry threshold, replacing the adaptive one (which
+#                          never drops below 5.1 on backtest signals, so as a mere
+#                          pre-filter every value ≤ 5.1 would give the same result)
+#   cooldown               PAIR_COOLDOWN_SECONDS
+#   max_per_hour           trade_control throttle
+#   stop_loss_pct          STOP_LOSS_PCT (fixed stop instead of the 5-bar range)
+#   take_profit_pct        TAKE_PROFIT_PCT
+#   max_hold_bars          BACKTEST_MAX_HOLD_BARS
+#   max_consecutive_losses / max_daily_drawdown_pct   core.risk_manager
+#   weight.<feature>       score_signal rule weight (rsi, macd_hist, ema_slope, volume_spike)
+#
+# Shared data: candles are copied once into a multiprocessing.shared_memory
+# matrix (one row per column, pairs laid end to end). Workers attach at start
+# (same pattern as utils.score_pool), compute the per-bar features / sides /
+# levels for their share of the pairs in place, and from then on only read.
+# A task carries just its config. Indicators are never recomputed per config:
+# weights re-score the stored features through a compiled rule table.
+#
+# Early pruning (successive rungs): every surviving config is first run on the
+# oldest SWEEP_RUNGS[0] share of the history, then on longer shares. After
+# each rung, configs are ranked in Pareto fronts on (pnl ↑, max_drawdown ↓)
+# and whole fronts are kept until SWEEP_KEEP of them survive, so dominated
+# configs stop consuming workers early. The final rung is the full history.
+# Blown configs (the backtester stopped on a wiped-out account, or drawdown
+# reached 100%) are infeasible: they are never kept by pruning and the
+# leaderboard ranks them after every feasible config, whatever their pnl.
+#
+# Results stream in as tasks finish: on_result(row) fires per completed run
+# and the Leaderboard (optionally mirrored to CSV) stays ranked.
+#
+# Usage:
+#   python -m utils.param_sweep --broker oanda --days 365 \
+#       --param min_score=4,5,6 --param cooldown=60,300 --param stop_loss_pct=0.002:0.01 --random 64
+
+import os
+import math
+import logging
+import argparse
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from utils.timeframe import TIMEFRAME
+from utils.candle_cache import CANDLE_WINDOW
+from utils.pairmap import asset_class
+from utils.scoring_rules import rule_book, compile_rules, with_weights
+from utils.backtester import (
+    Backtester, FEATURES, BACKTEST_BALANCE, BACKTEST_MAX_HOLD_BARS, _arrays, signal_arrays, rescore, load_universe,
+)
+
+logger = logging.getLogger(__name__)
+
+SWEEP_WORKERS = int(os.getenv("SWEEP_WORKERS", 0)) or os.cpu_count() or 1
+SWEEP_RUNGS = tuple(float(x) for x in os.getenv("SWEEP_RUNGS", "0.25,0.5,1.0").split(","))
+SWEEP_KEEP = float(os.getenv("SWEEP_KEEP", 0.5))
+SWEEP_START = os.getenv("SWEEP_START", "spawn")
+
+BARS = ("timestamp", "open", "high", "low", "close", "volume")
+COLUMNS = BARS + FEATURES + ("side", "stop", "target", "sl", "tp")
+BACKTEST_PARAMS = {"min_score", "max_hold_bars", "stop_loss_pct", "take_profit_pct"}
+CONTROL_PARAMS = {"cooldown", "max_per_hour"}
+RISK_PARAMS = {"max_consecutive_losses", "max_daily_drawdown_pct"}
+
+
+# =====================================================
+# Search spaces
+# =====================================================
+def _check(names):
+    for name in names:
+        if name.startswith("weight."):
+            if name[7:] not in FEATURES:
+                raise ValueError(f"Unknown scoring feature {name[7:]!r} (expected one of {', '.join(FEATURES)})")
+        elif name not in BACKTEST_PARAMS | CONTROL_PARAMS | RISK_PARAMS:
+            raise ValueError(f"Unknown sweep parameter {name!r}")
+
+
+def grid(space: dict) -> list:
+    """{name: [values]} → every combination as a config dict."""
+    _check(space)
+    names = list(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[n] for n in names))]
+
+
+def random_search(space: dict, n: int, seed: int = None) -> list:
+    """
+    `n` random configs. A list is sampled uniformly from its values, a
+    (low, high) tuple uniformly from the range (integers when both ends are ints).
+    """
+    _check(space)
+    rng = np.random.default_rng(seed)
+    configs = []
+    for _ in range(n):
+        config = {}
+        for name, values in space.items():
+            if isinstance(values, tuple):
+                low, high = values
+                if isinstance(low, int) and isinstance(high, int):
+                    config[name] = int(rng.integers(low, high + 1))
+                else:
+                    config[name] = float(rng.uniform(low, high))
+            else:
+                config[name] = values[int(rng.integers(len(values)))]
+        configs.append(config)
+    return configs
+
+
+# =====================================================
+# Pareto pruning
+# =====================================================
+def pareto_fronts(pnl, drawdown) -> np.ndarray:
+    """Front number per config (0 = not dominated) on pnl ↑ and drawdown ↓."""
+    pnl, drawdown = np.asarray(pnl, dtype=np.float64), np.asarray(drawdown, dtype=np.float64)
+    # dominates[i, j]: i is at least as good on both objectives and better on one
+    dominates = ((pnl[:, None] >= pnl) & (drawdown[:, None] <= drawdown)
+                 & ((pnl[:, None] > pnl) | (drawdown[:, None] < drawdown)))
+    front = np.full(len(pnl), -1)
+    remaining = np.ones(len(pnl), dtype=bool)
+    level = 0
+    while remaining.any():
+        current = remaining & ~(dominates[remaining].any(axis=0))
+        front[current] = level
+        remaining &= ~current
+        level += 1
+    return front
+
+
+def feasible(stats: dict) -> bool:
+    """False for a blown account: the run was stopped or lost the whole balance."""
+    return not stats.get("blown") and stats["max_drawdown"] < 1
+
+
+def prune(stats: dict, keep: float) -> list:
+    """Config ids of the best Pareto fronts holding at least `keep` of `stats` ({id: stats}).
+
+    Infeasible (blown) configs never survive; `keep` still counts every config run.
+    """
+    need = max(1, math.ceil(keep * len(stats)))
+    ids = [i for i, s in stats.items() if feasible(s)]
+    if not ids:
+        return []
+    front = pareto_fronts([stats[i]["pnl"] for i in ids], [stats[i]["max_drawdown"] for i in ids])
+    for level in range(front.max() + 1):
+        survivors = [i for i, f in zip(ids, front) if f <= level]
+        if len(survivors) >= need:
+            return survivors
+    return ids
+
+
+# =====================================================
+# Worker side (module globals live once per worker process)
+# =====================================================
+_shared = {}
+
+
+def _views(buf, total: int):
+    return np.ndarray((len(COLUMNS), total), dtype=np.float64, buffer=buf)
+
+
+def _init_worker(name: str, total: int, pairs: list, bounds: list, settings: dict):
+    # Workers share the parent's resource tracker; the parent's unlink is the only cleanup
+    shm = shared_memory.SharedMemory(name=name)
+    _shared.update(shm=shm, matrix=_views(shm.buf, total), pairs=pairs, bounds=bounds,
+                   settings=settings, scores=(None, {}))
+    logging.disable(logging.ERROR)   # per-trade risk gate messages would flood the console
+
+
+def _pair_view(p: int) -> dict:
+    lo, hi = _shared["bounds"][p], _shared["bounds"][p + 1]
+    matrix = _shared["matrix"]
+    return {col: matrix[c, lo:hi] for c, col in enumerate(COLUMNS)}
+
+
+def _fill_signals(p: int) -> int:
+    """Compute one pair's signal columns into the shared matrix."""
+    view = _pair_view(p)
+    sig = signal_arrays({k: view[k] for k in BARS}, _shared["settings"]["window"], _shared["pairs"][p])
+    for col in COLUMNS[len(BARS):]:
+        view[col][:] = sig[col]
+    return len(view["close"])
+
+
+def _scores(weights: dict) -> dict:
+    """{pair: per-bar scores} under `weights`; the last weight set is memoized per worker."""
+    key = tuple(sorted(weights.items()))
+    cached_key, cached = _shared["scores"]
+    if cached_key == key:
+        return cached
+    tables = compile_rules(with_weights(_shared["settings"]["rules"], weights))
+    window = _shared["settings"]["window"]
+    scores = {}
+    for p, pair in enumerate(_shared["pairs"]):
+        scores[pair] = rescore(_pair_view(p), window, tables[asset_class(pair)])
+    _shared["scores"] = (key, scores)
+    return scores
+
+
+def _run_config(config: dict, until: float) -> dict:
+    """Backtest one config on bars before `until` (epoch seconds); returns its stats."""
+    settings = _shared["settings"]
+    weights = {k[7:]: float(v) for k, v in config.items() if k.startswith("weight.")}
+    scores = _scores(weights)
+    sigs = {}
+    for p, pair in enumerate(_shared["pairs"]):
+        view = _pair_view(p)
+        cut = int(np.searchsorted(view["timestamp"], until))
+        if cut:
+            sigs[pair] = {**{k: v[:cut] for k, v in view.items()}, "score": scores[pair][:cut]}
+
+    kwargs = {k: config[k] for k in BACKTEST_PARAMS if k in config}
+    if "max_hold_bars" in kwargs:
+        kwargs["max_hold_bars"] = int(kwargs["max_hold_bars"])
+    if "min_score" in kwargs:
+        kwargs["threshold_fn"] = fixed_threshold(kwargs["min_score"])
+    tester = Backtester(
+        settings["broker"], settings["timeframe"], settings["window"], settings["balance"],
+        control_kwargs={k: config[k] for k in CONTROL_PARAMS if k in config},
+        risk_kwargs={k: config[k] for k in RISK_PARAMS if k in config},
+        **{"max_hold_bars": settings["max_hold_bars"], **kwargs},
+    )
+    stats = tester.run(sigs=sigs)["stats"]
+    stats.pop("exits", None)
+    return stats
+
+
+def fixed_threshold(min_score: float):
+    """threshold_fn that enters on score ≥ min_score regardless of the adaptive threshold."""
+    min_score = float(min_score)
+    return lambda signal: min_score
+
+
+# =====================================================
+# Parent side
+# =====================================================
+class Leaderboard:
+    """Results ranked as they arrive: feasible configs first, then deepest rung, then `rank_by` (drawdown breaks ties)."""
+
+    def __init__(self, rank_by: str = "pnl", path: str = None):
+        self.rank_by = rank_by
+        self.path = path
+        self.rows = {}
+
+    def add(self, config_id: int, config: dict, rung: int, stats: dict) -> dict:
+        row = {"config": config_id, "rung": rung, **config, **stats, "feasible": feasible(stats)}
+        self.rows[config_id] = row    # deeper rungs replace the shorter runs
+        if self.path:
+            self.table().to_csv(self.path, index=False)
+        return row
+
+    def table(self) -> pd.DataFrame:
+        df = pd.DataFrame(list(self.rows.values()))
+        if df.empty:
+            return df
+        return df.sort_values(["feasible", "rung", self.rank_by, "max_drawdown"],
+                              ascending=[False, False, False, True]).reset_index(drop=True)
+
+
+class ParamSweep:
+    """Backtests many configs over one shared universe on a process pool."""
+
+    def __init__(self, broker: str, universe: dict, timeframe: str = TIMEFRAME, window: int = CANDLE_WINDOW,
+                 balance: float = BACKTEST_BALANCE, max_hold_bars: int = BACKTEST_MAX_HOLD_BARS,
+                 workers: int = SWEEP_WORKERS, rules: dict = None, start_method: str = SWEEP_START):
+        bars = {pair: _arrays(c) for pair, c in universe.items()}
+        bars = {pair: b for pair, b in bars.items() if len(b["close"])}
+        if not bars:
+            raise ValueError("Parameter sweep needs at least one pair with candles")
+        self.pairs = list(bars)
+        lengths = [len(b["close"]) for b in bars.values()]
+        self.bounds = np.concatenate(([0], np.cumsum(lengths))).tolist()
+        total = self.bounds[-1]
+
+        self._shm = shared_memory.SharedMemory(create=True, size=len(COLUMNS) * total * 8)
+        matrix = _views(self._shm.buf, total)
+        for p, b in enumerate(bars.values()):
+            lo, hi = self.bounds[p], self.bounds[p + 1]
+            for c, col in enumerate(BARS):
+                matrix[c, lo:hi] = b[col]
+        stamps = matrix[0]
+        self.start = float(min(stamps[lo] for lo in self.bounds[:-1]))
+        self.end = float(max(stamps[hi - 1] for hi in self.bounds[1:])) + 1
+
+        settings = {"broker": broker.lower(), "timeframe": timeframe, "window": window, "balance": balance,
+                    "max_hold_bars": max_hold_bars, "rules": rules or rule_book.config}
+        self.workers = max(1, int(workers))
+        self._executor = ProcessPoolExecutor(
+            self.workers, mp_context=multiprocessing.get_context(start_method),
+            initializer=_init_worker, initargs=(self._shm.name, total, self.pairs, self.bounds, settings),
+        )
+        list(self._executor.map(_fill_signals, range(len(self.pairs))))
+        logger.info(f"🧪 Sweep universe ready: {len(self.pairs)} pairs, {total} bars, {self.workers} workers")
+
+    def run(self, configs: list, rungs=SWEEP_RUNGS, keep: float = SWEEP_KEEP, rank_by: str = "pnl",
+            on_result=None, path: str = None) -> pd.DataFrame:
+        """
+        Run every config through the rungs, pruning dominated ones in between.
+        on_result(row) is called for each finished backtest. Returns the
+        leaderboard (rung = how far the config got; rung len(rungs) - 1 = full history).
+        """
+        configs = list(configs)
+        _check({name for c in configs for name in c})
+        board = Leaderboard(rank_by, path)
+        alive = list(range(len(configs)))
+        rungs = sorted(set(rungs) | {1.0})
+        for rung, share in enumerate(rungs):
+            until = self.start + share * (self.end - self.start)
+            futures = {self._executor.submit(_run_config, configs[i], until): i for i in alive}
+            stats = {}
+            for fut in as_completed(futures):
+                i = futures[fut]
+                try:
+                    stats[i] = fut.result()
+                except Exception as e:
+                    logger.error(f"❌ Sweep config {i} {configs[i]} failed: {e}")
+                    continue
+                row = board.add(i, configs[i], rung, stats[i])
+                if on_result:
+                    on_result(row)
+            if rung < len(rungs) - 1:
+                alive = prune(stats, keep)
+                logger.info(f"🧪 Rung {rung} ({share:.0%} of history): {len(stats)} run, {len(alive)} kept")
+        return board.table()
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self._shm.close()
+        try:
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _parse_param(text: str):
+    """'name=a,b,c' → (name, [values]); 'name=low:high' → (name, (low, high))."""
+    name, _, spec = text.partition("=")
+    if not spec:
+        raise argparse.ArgumentTypeError(f"Expected name=values, got {text!r}")
+
+    def number(s):
+        return int(s) if s.lstrip("-").isdigit() else float(s)
+
+    if ":" in spec:
+        low, high = spec.split(":", 1)
+        return name.strip(), (number(low), number(high))
+    return name.strip(), [number(v) for v in spec.split(",")]
+
+
+def main():
+    from utils.backfill import BROKER_PAIRS
+
+    parser = argparse.ArgumentParser(description="Parallel parameter sweep over archived-candle backtests")
+    parser.add_argument("--broker", required=True, choices=sorted(BROKER_PAIRS))
+    parser.add_argument("--pairs", help="comma-separated pairs (default: every mapped pair)")
+    parser.add_argument("--timeframe", default=TIMEFRAME)
+    parser.add_argument("--days", type=float, default=365)
+    parser.add_argument("--balance", type=float, default=BACKTEST_BALANCE)
+    parser.add_argument("--param", action="append", type=_parse_param, default=[],
+                        help="name=v1,v2,... (grid / choices) or name=low:high (random range)")
+    parser.add_argument("--random", type=int, help="sample this many configs instead of the full grid")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--workers", type=int, default=SWEEP_WORKERS)
+    parser.add_argument("--keep", type=float, default=SWEEP_KEEP)
+    parser.add_argument("--rank-by", default="pnl")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--out", help="keep the ranked table in this CSV while the sweep runs")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    space = dict(args.param)
+    if args.random:
+        configs = random_search(space, args.random, args.seed)
+    else:
+        ranges = [n for n, v in space.items() if isinstance(v, tuple)]
+        if ranges:
+            parser.error(f"Ranges need --random: {', '.join(ranges)}")
+        configs = grid(space)
+
+    pairs = args.pairs.split(",") if args.pairs else list(BROKER_PAIRS[args.broker])
+    end = int(pd.Timestamp.utcnow().timestamp())
+    universe = load_universe(args.broker, pairs, args.timeframe, int(end - args.days * 86400), end)
+    with ParamSweep(args.broker, universe, args.timeframe, balance=args.balance, workers=args.workers) as sweep:
+        table = sweep.run(configs, keep=args.keep, rank_by=args.rank_by, path=args.out)
+    print(table.head(args.top).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
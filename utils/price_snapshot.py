@@ -0,0 +1,99 @@
+# =====================================================
+# utils/price_snapshot.py
+# v1.0 — One bulk price round trip per broker per cycle
+# =====================================================
+import os
+import time
+import logging
+import threading
+
+from broker import get_broker
+from utils.quote_store import quote_store
+from utils import shm_quote_book
+
+logger = logging.getLogger(__name__)
+
+PRICE_SNAPSHOT_TTL = float(os.getenv("PRICE_SNAPSHOT_TTL", 5))  # seconds
+STREAM_QUOTE_MAX_AGE = float(os.getenv("STREAM_QUOTE_MAX_AGE", 10))  # streamed quotes older than this fall back to REST
+ORDER_QUOTE_MAX_AGE = float(os.getenv("ORDER_QUOTE_MAX_AGE", 3))  # order prices older than this are refetched
+
+_snapshots = {}  # broker: {"ts": last refresh, "prices": {pair: mid}, "stamps": {pair: refresh epoch}}
+_lock = threading.Lock()
+
+
+def _as_float(price):
+    """Normalize single-price returns ({'price': x} or x) to a float."""
+    if isinstance(price, dict):
+        price = price.get("price")
+    return float(price or 0.0)
+
+
+def refresh_snapshot(broker_name: str, pairs) -> dict:
+    """Fetch a fresh {pair: mid} snapshot for a broker's universe in one request."""
+    broker_name = broker_name.lower()
+    broker = get_broker(broker_name)
+    pairs = [p for p in pairs if p]
+
+    if hasattr(broker, "get_prices"):
+        prices = broker.get_prices(pairs)
+    else:
+        prices = {p: _as_float(broker.get_price(p)) for p in pairs}
+    prices = {p: v for p, v in prices.items() if v}
+
+    now = time.time()
+    with _lock:
+        # Merge, never replace: a one-pair refresh must not drop the rest of the universe
+        snap = _snapshots.setdefault(broker_name, {"ts": now, "prices": {}, "stamps": {}})
+        snap["ts"] = now
+        snap["prices"].update(prices)
+        snap["stamps"].update(dict.fromkeys(prices, now))
+    book = shm_quote_book.get_writer(broker_name)
+    if book is not None:
+        book.write_mids(prices, now)
+    logger.info(f"💱 {broker_name.upper()} price snapshot: {len(prices)}/{len(pairs)} pairs")
+    return prices
+
+
+def get_price_snapshot(broker_name: str, pairs, max_age: float = PRICE_SNAPSHOT_TTL) -> dict:
+    """
+    Return the broker's snapshot. Fresh streamed quotes (utils.price_stream) win;
+    otherwise only the pairs not refreshed within `max_age` are fetched and
+    merged into the snapshot (it never shrinks to the requested pairs).
+    """
+    wanted = [p for p in pairs if p]
+    streamed = quote_store.mids(broker_name.lower(), wanted, min(max_age, STREAM_QUOTE_MAX_AGE))
+    if wanted and len(streamed) == len(wanted):
+        return streamed
+
+    # Another process (one writer per broker) may already have published these quotes
+    shared = shm_quote_book.read_mids(broker_name, wanted, max_age)
+    if wanted and len(shared) == len(wanted):
+        return shared
+
+    cached = _fresh(broker_name, max_age)
+    if cached is not None and all(p in cached for p in wanted):
+        return cached
+    refresh_snapshot(broker_name, [p for p in wanted if cached is None or p not in cached])
+    return _fresh(broker_name, max_age) or {}
+
+
+def _fresh(broker_name: str, max_age: float):
+    """{pair: mid} refreshed within max_age seconds, or None without any."""
+    snap = _snapshots.get(broker_name.lower())
+    if not snap:
+        return None
+    cutoff = time.time() - max_age
+    with _lock:
+        prices = {p: v for p, v in snap["prices"].items() if snap["stamps"][p] >= cutoff}
+    return prices or None
+
+
+def peek_snapshot(broker_name: str, max_age: float = PRICE_SNAPSHOT_TTL):
+    """Return the cached pairs refreshed within max_age without any network call, or None."""
+    return _fresh(broker_name, max_age)
+
+
+def get_snapshot_price(broker_name: str, pair: str, max_age: float = PRICE_SNAPSHOT_TTL):
+    """Single price from the cached snapshot (no network); None when unavailable."""
+    prices = peek_snapshot(broker_name, max_age)
+    return prices.get(pair) if prices else None
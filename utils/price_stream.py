@@ -0,0 +1,252 @@
+# =====================================================
+# utils/price_stream.py
+# v1.0 — Push-based price ingestion (OANDA stream, Kraken ticker)
+# =====================================================
+#
+# Each consumer runs in a daemon thread, writes every quote into a
+# QuoteStore and reconnects with exponential backoff when the
+# connection drops or no message/heartbeat arrives within
+# STREAM_HEARTBEAT_TIMEOUT seconds.
+
+import os
+import json
+import time
+import logging
+import threading
+from datetime import datetime, timezone
+
+from utils import http_pool
+from utils.pairmap import PAIRMAP_OANDA, REVERSE_OANDA
+from utils.quote_store import quote_store
+
+logger = logging.getLogger(__name__)
+
+OANDA_ACCOUNT_ID = os.getenv("OANDA_ACCOUNT_ID")
+OANDA_STREAM_URL = os.getenv("OANDA_STREAM_URL", "https://stream-fxpractice.oanda.com/v3")
+KRAKEN_WS_URL = os.getenv("KRAKEN_WS_URL", "wss://ws.kraken.com")
+
+STREAM_HEARTBEAT_TIMEOUT = float(os.getenv("STREAM_HEARTBEAT_TIMEOUT", 15))
+STREAM_MAX_BACKOFF = float(os.getenv("STREAM_MAX_BACKOFF", 60))
+
+
+class _StreamConsumer(threading.Thread):
+    """Reconnect loop shared by every stream consumer."""
+
+    broker = ""
+
+    def __init__(self, pairs, store=None):
+        super().__init__(daemon=True, name=f"{self.broker}-stream")
+        self.pairs = [p for p in pairs if p]
+        self.store = store if store is not None else quote_store
+        self._stop_event = threading.Event()
+        self.last_message = 0.0
+        self.last_heartbeat = 0.0
+        self.reconnects = 0
+        self.quotes = 0
+
+    def stop(self):
+        self._stop_event.set()
+
+    @property
+    def stopped(self) -> bool:
+        return self._stop_event.is_set()
+
+    def run(self):
+        backoff = 1.0
+        while not self.stopped:
+            try:
+                logger.info(f"📶 {self.broker.upper()} stream connecting ({len(self.pairs)} pairs)")
+                for message in self._messages():
+                    if self.stopped:
+                        return
+                    self.last_message = time.time()
+                    if self._handle(message):
+                        backoff = 1.0  # healthy data flow resets the backoff
+                if self.stopped:
+                    return
+                logger.warning(f"⚠️ {self.broker.upper()} stream closed by server")
+            except Exception as e:
+                logger.warning(f"⚠️ {self.broker.upper()} stream error: {e}")
+
+            self.reconnects += 1
+            logger.info(f"🔁 {self.broker.upper()} stream reconnect #{self.reconnects} in {backoff:.0f}s")
+            self._stop_event.wait(backoff)
+            backoff = min(backoff * 2, STREAM_MAX_BACKOFF)
+
+    def _messages(self):
+        """Yield decoded messages until the connection ends."""
+        raise NotImplementedError
+
+    def _handle(self, message) -> bool:
+        """Apply one message; return True when it carried a quote."""
+        raise NotImplementedError
+
+    def _http_lines(self, url, params=None, headers=None):
+        """JSON-lines over a chunked HTTP response (read timeout = heartbeat timeout)."""
+        resp = http_pool.get(
+            self.broker, url, headers=headers, params=params, stream=True,
+            timeout=(http_pool.get_timeout("ping")[0], STREAM_HEARTBEAT_TIMEOUT),
+        )
+        resp.raise_for_status()
+        try:
+            for line in resp.iter_lines():
+                if self.stopped:
+                    break
+                if line:
+                    yield json.loads(line)
+        finally:
+            resp.close()
+
+
+# =====================================================
+# === OANDA pricing stream (chunked HTTP JSON lines)
+# =====================================================
+class OandaPricingStream(_StreamConsumer):
+    broker = "oanda"
+
+    def __init__(self, pairs, store=None, url=None, account_id=None, api_key=None):
+        super().__init__(pairs, store)
+        self.account_id = account_id or OANDA_ACCOUNT_ID
+        self.url = url or f"{OANDA_STREAM_URL}/accounts/{self.account_id}/pricing/stream"
+        api_key = api_key or os.getenv("OANDA_API_KEY")
+        self.headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+
+    def _messages(self):
+        instruments = ",".join(PAIRMAP_OANDA.get(p, p.replace("/", "_")) for p in self.pairs)
+        # OANDA sends the current price of every instrument on (re)connect, which resumes the book
+        return self._http_lines(self.url, params={"instruments": instruments}, headers=self.headers)
+
+    def _handle(self, message) -> bool:
+        kind = message.get("type")
+        if kind == "HEARTBEAT":
+            self.last_heartbeat = time.time()
+            return False
+        if kind != "PRICE" or not message.get("bids") or not message.get("asks"):
+            return False
+
+        instrument = message["instrument"]
+        pair = REVERSE_OANDA.get(instrument, instrument.replace("_", "/"))
+        self.store.update(
+            "oanda", pair,
+            float(message["bids"][0]["price"]),
+            float(message["asks"][0]["price"]),
+            _parse_time(message.get("time")),
+        )
+        self.quotes += 1
+        return True
+
+
+# =====================================================
+# === Kraken ticker (websocket v1 message format)
+# =====================================================
+def _kraken_ws_name(pair: str) -> str:
+    """BTC/USD → XBT/USD (Kraken websocket naming)."""
+    base, _, quote = pair.partition("/")
+    return f"{'XBT' if base == 'BTC' else base}/{quote}"
+
+
+def _kraken_canonical(ws_name: str) -> str:
+    base, _, quote = ws_name.partition("/")
+    return f"{'BTC' if base == 'XBT' else base}/{quote}"
+
+
+class KrakenTickerStream(_StreamConsumer):
+    """
+    Consumes Kraken ticker messages: [channelID, {"a": [...], "b": [...]}, "ticker", "XBT/USD"].
+    wss:// URLs need the optional `websocket-client` package; http(s):// URLs read the
+    same messages as JSON lines (used by utils.stream_replay).
+    """
+    broker = "kraken"
+
+    def __init__(self, pairs, store=None, url=None):
+        super().__init__(pairs, store)
+        self.url = url or KRAKEN_WS_URL
+
+    def _messages(self):
+        if self.url.startswith("http"):
+            return self._http_lines(self.url, params={"pair": ",".join(_kraken_ws_name(p) for p in self.pairs)})
+        return self._ws_messages()
+
+    def _ws_messages(self):
+        try:
+            import websocket  # websocket-client, optional
+        except ImportError:
+            logger.error("❌ Kraken websocket stream needs `pip install websocket-client`")
+            self.stop()
+            return
+
+        ws = websocket.create_connection(self.url, timeout=STREAM_HEARTBEAT_TIMEOUT)
+        try:
+            ws.send(json.dumps({
+                "event": "subscribe",
+                "pair": [_kraken_ws_name(p) for p in self.pairs],
+                "subscription": {"name": "ticker"},
+            }))
+            while not self.stopped:
+                raw = ws.recv()
+                if not raw:
+                    break
+                yield json.loads(raw)
+        finally:
+            ws.close()
+
+    def _handle(self, message) -> bool:
+        if isinstance(message, dict):
+            if message.get("event") == "heartbeat":
+                self.last_heartbeat = time.time()
+            elif message.get("event") == "subscriptionStatus" and message.get("status") == "error":
+                logger.error(f"❌ Kraken subscription error: {message.get('errorMessage')}")
+            return False
+
+        if not isinstance(message, list) or len(message) < 4 or message[-2] != "ticker":
+            return False
+        data = message[1]
+        self.store.update(
+            "kraken", _kraken_canonical(message[-1]),
+            float(data["b"][0]),
+            float(data["a"][0]),
+        )
+        self.quotes += 1
+        return True
+
+
+def _parse_time(value):
+    """OANDA RFC3339 (nanosecond) or unix string → epoch float; None if absent."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    head, _, frac = value.rstrip("Z").partition(".")
+    ts = datetime.strptime(head, "%Y-%m-%dT%H:%M:%S").replace(tzinfo=timezone.utc).timestamp()
+    return ts + (float(f"0.{frac}") if frac else 0.0)
+
+
+STREAM_CLASSES = {
+    "oanda": OandaPricingStream,
+    "kraken": KrakenTickerStream,
+}
+
+_running = {}
+
+
+def start_price_stream(broker: str, pairs, store=None, **kwargs):
+    """Start (or return the running) stream consumer for a broker; None if unsupported."""
+    broker = broker.lower()
+    cls = STREAM_CLASSES.get(broker)
+    if cls is None:
+        logger.info(f"ℹ️ No price stream for {broker.upper()} — REST snapshots only.")
+        return None
+    consumer = _running.get(broker)
+    if consumer and consumer.is_alive():
+        return consumer
+    consumer = _running[broker] = cls(pairs, store, **kwargs)
+    consumer.start()
+    return consumer
+
+
+def stop_price_streams():
+    for consumer in _running.values():
+        consumer.stop()
+    _running.clear()
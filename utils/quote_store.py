@@ -0,0 +1,74 @@
+# =====================================================
+# utils/quote_store.py
+# v1.0 — In-process latest-quote store fed by price streams
+# =====================================================
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class QuoteStore:
+    """
+    Latest bid/ask per (broker, pair). Writers are the stream consumers;
+    readers (cycle loops, router, order checks) never block on the network.
+    """
+
+    def __init__(self):
+        self._quotes = {}
+        self._lock = threading.Lock()
+        self._listeners = []
+        self.ingested = 0
+
+    def update(self, broker: str, pair: str, bid: float, ask: float, ts: float = None):
+        """Store a quote and notify listeners."""
+        quote = {
+            "bid": float(bid),
+            "ask": float(ask),
+            "mid": (float(bid) + float(ask)) / 2,
+            "ts": float(ts) if ts else time.time(),
+        }
+        with self._lock:
+            self._quotes[(broker, pair)] = quote
+            self.ingested += 1
+        for listener in self._listeners:
+            try:
+                listener(broker, pair, quote)
+            except Exception as e:
+                logger.error(f"❌ Quote listener failed for {pair}: {e}")
+
+    def get(self, broker: str, pair: str, max_age: float = None):
+        """Return the latest quote dict or None (also None when older than max_age seconds)."""
+        quote = self._quotes.get((broker, pair))
+        if quote and max_age is not None and time.time() - quote["ts"] > max_age:
+            return None
+        return quote
+
+    def get_mid(self, broker: str, pair: str, max_age: float = None):
+        quote = self.get(broker, pair, max_age)
+        return quote["mid"] if quote else None
+
+    def mids(self, broker: str, pairs, max_age: float = None) -> dict:
+        """{pair: mid} for every pair with a fresh enough quote."""
+        out = {}
+        for pair in pairs:
+            mid = self.get_mid(broker, pair, max_age)
+            if mid:
+                out[pair] = mid
+        return out
+
+    def add_listener(self, callback):
+        """Register callback(broker, pair, quote) for every update."""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def __len__(self):
+        return len(self._quotes)
+
+
+# === Process-wide default store ===
+quote_store = QuoteStore()
@@ -0,0 +1,207 @@
+# =====================================================
+# utils/resampler.py
+# v1.0 — Higher timeframes built locally from base-timeframe candles
+# =====================================================
+#
+# One fetch stream per pair (TIMEFRAME, through utils.candle_cache); M15/H1/H4/D
+# windows are aggregated from it instead of being fetched:
+#     open = first, high = max, low = min, close = last, volume = sum
+#
+# Buckets are aligned to each broker's session anchor in its exchange time
+# zone (OANDA: 17:00 New York, so H4 runs 17/21/01/05/09/13 NY; Kraken: 00:00
+# UTC; Alpaca: 00:00 New York), DST included. Updates are incremental: each
+# update re-aggregates only the forming bucket plus the base bars that closed
+# since the last call.
+#
+# Cold starts seed from utils.candle_history when it is enabled, so a long
+# higher-timeframe window is available without any extra API request.
+
+import os
+import logging
+import threading
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from utils.timeframe import TIMEFRAME, parse_timeframe_minutes
+from utils.candle_store import CandleRing
+from utils.candle_cache import candle_cache
+from utils.candle_history import candle_history
+from utils.indicator_registry import SIGNAL_BARS
+
+logger = logging.getLogger(__name__)
+
+RESAMPLE_WINDOW = int(os.getenv("RESAMPLE_WINDOW", SIGNAL_BARS))
+
+# (time zone, session start in minutes after local midnight)
+SESSION_ANCHORS = {
+    "oanda": ("America/New_York", 17 * 60),
+    "kraken": ("UTC", 0),
+    "alpaca": ("America/New_York", 0),
+}
+
+
+def _utc_offsets(ts: np.ndarray, tz: str) -> np.ndarray:
+    """UTC offset in seconds for each timestamp (one zone lookup per distinct hour)."""
+    if tz == "UTC" or not len(ts):
+        return np.zeros(len(ts), dtype=np.int64)
+    zone = ZoneInfo(tz)
+    hours, inverse = np.unique(ts // 3600, return_inverse=True)
+    offsets = np.array([
+        int(datetime.fromtimestamp(int(h) * 3600, timezone.utc).astimezone(zone).utcoffset().total_seconds())
+        for h in hours
+    ], dtype=np.int64)
+    return offsets[inverse]
+
+
+def bucket_starts(ts, timeframe: str, broker: str = None) -> np.ndarray:
+    """Start timestamp (UTC seconds) of the `timeframe` bucket holding each bar."""
+    ts = np.asarray(ts, dtype=np.int64)
+    width = parse_timeframe_minutes(timeframe) * 60
+    tz, anchor = SESSION_ANCHORS.get((broker or "").lower(), ("UTC", 0))
+    offsets = _utc_offsets(ts, tz)
+    local = ts + offsets - anchor * 60
+    start = (local - local % width) + anchor * 60   # local wall-clock seconds
+    # Convert with the offset in force at the bucket start, not at the bar (DST days)
+    return start - _utc_offsets(start - offsets, tz)
+
+
+def resample_arrays(ts, opens, highs, lows, closes, volumes, timeframe: str, broker: str = None):
+    """Aggregate base columns (oldest → newest) into `timeframe` columns."""
+    ts = np.asarray(ts, dtype=np.int64)
+    if not len(ts):
+        empty = np.empty(0)
+        return np.empty(0, dtype=np.int64), empty, empty, empty, empty, empty
+    buckets = bucket_starts(ts, timeframe, broker)
+    first = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    last = np.r_[first[1:], len(ts)] - 1
+    return (
+        buckets[first],
+        np.asarray(opens)[first],
+        np.maximum.reduceat(np.asarray(highs), first),
+        np.minimum.reduceat(np.asarray(lows), first),
+        np.asarray(closes)[last],
+        np.add.reduceat(np.asarray(volumes), first),
+    )
+
+
+class Resampler:
+    """
+    Rolling `timeframe` window for one (broker, pair), fed with base windows.
+    The newest bar is the forming bucket until its last base bar has closed.
+    """
+
+    def __init__(self, broker: str, base_tf: str, timeframe: str, capacity: int = RESAMPLE_WINDOW):
+        self.broker = broker.lower()
+        self.base_tf = base_tf
+        self.timeframe = timeframe
+        self.base_seconds = parse_timeframe_minutes(base_tf) * 60
+        self.seconds = parse_timeframe_minutes(timeframe) * 60
+        if self.seconds < self.base_seconds or self.seconds % self.base_seconds:
+            raise ValueError(f"Cannot resample {base_tf} into {timeframe}")
+        self.window = CandleRing(capacity)
+        self._base_last = None   # newest base bar already aggregated
+
+    @property
+    def forming(self) -> bool:
+        """True while the newest bucket still waits for base bars."""
+        if not self.window:
+            return False
+        return self._base_last + self.base_seconds < int(self.window.timestamps[-1]) + self.seconds
+
+    def update(self, base) -> CandleRing:
+        """Fold a base window (CandleRing or candle dicts) into the higher-timeframe window."""
+        if base is None or not len(base):
+            return self.window
+        if not isinstance(base, CandleRing):
+            base = CandleRing.from_candles(base)
+        ts = base.timestamps
+        cold = not self.window
+        carry = None
+
+        if cold:
+            start = 0
+        else:
+            newest = int(self.window.timestamps[-1])
+            if int(ts[-1]) < self._base_last:
+                return self.window
+            if int(ts[0]) <= newest:
+                # Re-aggregate from the open of the newest (possibly forming) bucket
+                start = int(np.searchsorted(ts, newest))
+            else:
+                # Base window starts inside the newest bucket: fold only unseen bars into it
+                start = int(np.searchsorted(ts, self._base_last, side="right"))
+                carry = self.window[-1]
+            if start == len(ts):
+                return self.window
+
+        cols = resample_arrays(ts[start:], *(c[start:] for c in base.columns()), self.timeframe, self.broker)
+        if cold and len(cols[0]) > 1 and int(ts[0]) != int(cols[0][0]):
+            cols = tuple(c[1:] for c in cols)   # head bucket only partly in the base window
+        if carry is not None and int(cols[0][0]) == carry["timestamp"]:
+            cols = tuple(np.array(c) for c in cols)
+            cols[1][0] = carry["open"]
+            cols[2][0] = max(cols[2][0], carry["high"])
+            cols[3][0] = min(cols[3][0], carry["low"])
+            cols[5][0] += carry["volume"]
+        if len(cols[0]):
+            self.window.merge(CandleRing.from_arrays(*cols))
+        self._base_last = int(ts[-1])
+        return self.window
+
+
+class ResampleCache:
+    """Resamplers keyed by (broker, pair, base_tf, timeframe), fed from the shared candle cache."""
+
+    def __init__(self, cache=candle_cache, history=candle_history, window: int = RESAMPLE_WINDOW):
+        self.cache = cache
+        self.history = history
+        self.window = window
+        self._resamplers = {}
+        self._lock = threading.Lock()
+
+    def _seed(self, resampler: Resampler, pair: str, count: int):
+        """Cold start: aggregate persisted base bars so the window starts full."""
+        if self.history is None:
+            return
+        ratio = resampler.seconds // resampler.base_seconds
+        base = self.history.load(resampler.broker, pair, resampler.base_tf, count=ratio * count)
+        if base is not None and len(base):
+            resampler.update(base)
+
+    def get(self, broker: str, pair: str, timeframe: str, base_tf: str = TIMEFRAME,
+            count: int = None, refresh: bool = False):
+        """
+        `timeframe` window for a pair built from its `base_tf` stream. By default
+        only the base window already cached this cycle is used; `refresh=True`
+        refreshes the base window through the candle cache first.
+        """
+        broker = broker.lower()
+        size = max(count or 0, self.window)
+        key = (broker, pair, base_tf, timeframe)
+        with self._lock:
+            resampler = self._resamplers.get(key)
+            if resampler is None or resampler.window.capacity < size:
+                resampler = self._resamplers[key] = Resampler(broker, base_tf, timeframe, size)
+                self._seed(resampler, pair, size)
+                logger.debug(f"🕯️ {broker.upper()} {pair}: {base_tf} → {timeframe} resampler ({len(resampler.window)} bars)")
+
+        base = self.cache.fetch(broker, pair, base_tf) if refresh else self.cache.get(broker, pair, base_tf)
+        if base is None:
+            base = self.cache.fetch(broker, pair, base_tf)
+        with self._lock:
+            return resampler.update(base)
+
+    def clear(self):
+        with self._lock:
+            self._resamplers.clear()
+
+
+# === Process-wide default resampler set ===
+resample_cache = ResampleCache()
+
+
+def get_resampled(broker: str, pair: str, timeframe: str, base_tf: str = TIMEFRAME, count: int = None):
+    """Higher-timeframe window from the shared base candle stream (no extra API call when cached)."""
+    return resample_cache.get(broker, pair, timeframe, base_tf, count)
@@ -2,6 +2,13 @@ import numpy as np
 import logging
 import os
 
+from utils.candle_store import CandleRing, closes_of, volumes_of
+from utils.indicator_kernels import ema, macd, macd_hist_last
+from utils.incremental_indicators import indicators_for, score_indicators
+from utils.indicator_registry import lookback
+from utils.scoring_rules import rule_book
+from utils.pairmap import asset_class
+
 logger = logging.getLogger(__name__)
 
 # === Global threshold for system import ===
@@ -29,24 +36,15 @@ def calculate_rsi(closes, period=14):
 
 def exponential_moving_average(data, period):
     if len(data) < period:
-        return [float(data[-1])] if len(data) else [0.0]
-    ema = [float(data[0])]
-    k = 2 / (period + 1)
-    for price in data[1:]:
-        ema.append(price * k + ema[-1] * (1 - k))
-    return ema
+        return np.array([float(data[-1])] if len(data) else [0.0])
+    return ema(data, period)
 
 
 def calculate_macd(closes, fast=12, slow=26, signal=9):
     if len(closes) < slow:
         return 0.0
-    ema_fast = exponential_moving_average(closes, fast)
-    ema_slow = exponential_moving_average(closes, slow)
-    macd_line = np.array(ema_fast[-len(ema_slow):]) - np.array(ema_slow)
-    signal_line = exponential_moving_average(macd_line, signal)
-    if not len(signal_line):
-        return 0.0
-    return float(macd_line[-1] - signal_line[-1])
+    _, _, hist = macd(closes, fast, slow, signal)
+    return float(hist[-1])
 
 
 def calculate_ema_slope(closes, period=20):
@@ -66,6 +64,7 @@ def score_signal(signal: dict) -> float:
     Multi-factor signal scorer:
       • RSI, MACD, EMA slope, Volume spike
       • Returns 0–10 confidence score
+    Weights and thresholds come from utils.scoring_rules (per asset class of signal["pair"]).
     """
 
     # --- Extract or compute indicators ---
@@ -75,17 +74,35 @@ def score_signal(signal: dict) -> float:
     ema_slope = signal.get("ema_slope")
     vol_spike_flag = signal.get("volume_spike")
 
-    if candles:
-        closes = [c.get("close", 0) for c in candles if "close" in c]
-        volumes = [c.get("volume", 1) for c in candles if "volume" in c]
-
-        if len(closes) >= 30:
+    if isinstance(candles, CandleRing) and candles:
+        # Live cache windows: incremental state for the fixed-length indicators
+        # (only new bars are applied). MACD is recursive, so it is seeded at the
+        # window start like score_batch / the backtester, not carried from the
+        # first bar the ring ever saw.
+        state = indicators_for(candles, score_indicators, window=candles.capacity).values()
+        bars = len(candles)
+        if bars >= lookback("score_rsi"):
+            rsi = state["rsi"]
+        if bars >= lookback("score_macd"):
+            macd_hist = calculate_macd(candles.closes)
+        if bars >= lookback("score_ema_slope"):
+            ema_slope = state["ema_slope"]
+        vol_spike_flag = state["volume_spike"]
+
+    elif candles:
+        closes = closes_of(candles)
+        volumes = volumes_of(candles)
+
+        # Each indicator switches on once the window covers its lookback
+        if len(closes) >= lookback("score_rsi"):
             rsi = calculate_rsi(closes)
+        if len(closes) >= lookback("score_macd"):
             macd_hist = calculate_macd(closes)
+        if len(closes) >= lookback("score_ema_slope"):
             ema_slope = calculate_ema_slope(closes)
 
         # Volume spike detection with safe denominator
-        if len(volumes) > 3:
+        if len(volumes) >= lookback("score_volume_spike"):
             avg_prev = np.mean(volumes[:-1]) or 1  # avoid div/0
             vol_spike = volumes[-1] / avg_prev
             vol_spike_flag = vol_spike > 2.0
@@ -98,36 +115,131 @@ def score_signal(signal: dict) -> float:
     ema_slope = float(ema_slope or 0.0)
     vol_spike_flag = bool(vol_spike_flag)
 
-    score = 0.0
+    # === RSI / MACD / EMA / volume points + midrange bonus (compiled rule table) ===
+    score = rule_book.evaluate(
+        {"rsi": rsi, "macd_hist": macd_hist, "ema_slope": ema_slope, "volume_spike": vol_spike_flag},
+        asset_class(signal.get("pair")),
+    )
 
-    # === RSI Weight ===
-    if rsi < 30 or rsi > 70:
-        score += 2
-    elif rsi < 40 or rsi > 60:
-        score += 1
-
-    # === MACD Momentum ===
-    if abs(macd_hist) > 0.002:
-        score += 2
-    elif abs(macd_hist) > 0.001:
-        score += 1
+    final_score = float(score)
+    logger.info(f"🧠 Scored signal: {final_score}/10 (⚖️ {'Strong' if final_score >= MIN_SCORE_THRESHOLD else 'Moderate'})")
 
-    # === EMA Trend Strength ===
-    if abs(ema_slope) > 0.1:
-        score += 2
-    elif abs(ema_slope) > 0.05:
-        score += 1
+    return final_score
 
-    # === Volume Spike Bonus ===
-    if vol_spike_flag:
-        score += 1
 
-    # === Volatility bonus ===
-    if 3 < score < 6:
-        score += 0.5  # gentle bias midrange signals
 
-    final_score = round(float(score), 2)
-    logger.info(f"🧠 Scored signal: {final_score}/10 (⚖️ {'Strong' if final_score >= MIN_SCORE_THRESHOLD else 'Moderate'})")
+# =====================================================
+# === BATCH SCORING (pairs × bars) ===
+# =====================================================
+def batch_features(closes, volumes=None) -> dict:
+    """
+    Rule-table features (rsi, macd_hist, ema_slope, volume_spike) of every row
+    of a (pairs × bars) window matrix, exactly as score_signal derives them.
+    """
+    closes = np.atleast_2d(np.asarray(closes, dtype=np.float64))
+    rows, bars = closes.shape
+    rsi = np.full(rows, 50.0)
+    macd_hist = np.zeros(rows)
+    ema_slope = np.zeros(rows)
+
+    # RSI (14): simple means of the last 14 up / down moves
+    if bars >= lookback("score_rsi"):
+        period = 14
+        deltas = np.diff(closes[:, -(period + 1):], axis=1)
+        ma_up = np.clip(deltas, 0, None).mean(axis=1)
+        ma_down = (-np.clip(deltas, None, 0)).mean(axis=1)
+        rsi = 100 - (100 / (1 + ma_up / (ma_down + 1e-6)))
+
+    # MACD (12, 26, 9): last histogram value of every row as one matrix-vector product
+    if bars >= lookback("score_macd"):
+        macd_hist = macd_hist_last(closes, 12, 26, 9)
+
+    # EMA slope (20): difference of the last two exp-weighted FIR averages
+    if bars >= lookback("score_ema_slope"):
+        period = 20
+        weights = np.exp(np.linspace(-1., 0., period))
+        weights = (weights / weights.sum())[::-1]
+        ema_slope = closes[:, -period:] @ weights - closes[:, -period - 1:-1] @ weights
+
+    vol_flag = np.zeros(rows, dtype=bool)
+    if volumes is not None:
+        volumes = np.atleast_2d(np.asarray(volumes, dtype=np.float64))
+        if volumes.shape[1] >= lookback("score_volume_spike"):
+            avg_prev = volumes[:, :-1].mean(axis=1)
+            avg_prev = np.where(avg_prev == 0, 1.0, avg_prev)
+            vol_flag = volumes[:, -1] / avg_prev > 2.0
+
+    # score_signal treats a falsy indicator (exactly 0) as missing
+    rsi = np.where(rsi == 0, 50.0, rsi)
+
+    return {"rsi": rsi, "macd_hist": macd_hist, "ema_slope": ema_slope, "volume_spike": vol_flag}
+
+
+def score_batch(closes, volumes=None, asset_class: str = None) -> np.ndarray:
+    """
+    Score many windows at once. `closes` / `volumes` are (pairs × bars) arrays
+    of equal-length windows, oldest → newest, all of one asset class. Returns a
+    score vector identical to score_signal({"candles": window, "pair": ...}) on
+    each row given as a list of candles.
+    """
+    return rule_book.evaluate(batch_features(closes, volumes), asset_class)
 
-    return final_score
 
+def score_windows(windows: dict, scorer=None) -> dict:
+    """
+    {pair: candles} → {pair: score} with one score_batch call per window length
+    (normally one call for the whole universe). Empty windows are skipped;
+    windows whose candles lack volumes fall back to score_signal.
+    `scorer` replaces score_batch (e.g. a utils.score_pool.ScorePool). Windows
+    are grouped by (length, asset class) so each group uses one rule table.
+    """
+    scorer = scorer or score_batch
+    groups, scores = {}, {}
+    for pair, candles in windows.items():
+        if candles is None or not len(candles):
+            continue
+        closes = np.asarray(closes_of(candles), dtype=np.float64)
+        volumes = np.asarray(volumes_of(candles), dtype=np.float64)
+        if len(volumes) != len(closes) or len(closes) != len(candles):
+            scores[pair] = score_signal({"candles": list(candles), "pair": pair})
+            continue
+        groups.setdefault((len(closes), asset_class(pair)), []).append((pair, closes, volumes))
+
+    for (_, cls), rows in groups.items():
+        batch = scorer(np.vstack([r[1] for r in rows]), np.vstack([r[2] for r in rows]), cls)
+        scores.update(zip((r[0] for r in rows), batch.tolist()))
+
+    if scores:
+        strong = sum(1 for s in scores.values() if s >= MIN_SCORE_THRESHOLD)
+        logger.info(f"🧠 Scored {len(scores)} windows in {len(groups)} batch(es) — {strong} ≥ {MIN_SCORE_THRESHOLD}")
+    return scores
+
+
+def series_features(closes, volumes=None, window: int = 100, chunk: int = 50_000) -> dict:
+    """
+    batch_features of every full `window` of one long series: entry k belongs
+    to the window ending at bar window - 1 + k. Windows are zero-copy sliding
+    views processed in chunks.
+    """
+    closes = np.asarray(closes, dtype=np.float64)
+    volumes = np.ones_like(closes) if volumes is None else np.asarray(volumes, dtype=np.float64)
+    if len(closes) < window:
+        return {}
+    c_win = np.lib.stride_tricks.sliding_window_view(closes, window)
+    v_win = np.lib.stride_tricks.sliding_window_view(volumes, window)
+    parts = [batch_features(c_win[lo:lo + chunk], v_win[lo:lo + chunk]) for lo in range(0, len(c_win), chunk)]
+    return {name: np.concatenate([p[name] for p in parts]) for name in parts[0]}
+
+
+def score_series(closes, volumes=None, window: int = 100, asset_class: str = None,
+                 chunk: int = 50_000) -> np.ndarray:
+    """
+    Score of every bar of one long series, each from the `window` bars ending
+    at it (what the live loop would have scored at that bar's close). Bars
+    before the first full window score 0.
+    """
+    out = np.zeros(len(closes))
+    features = series_features(closes, volumes, window, chunk)
+    if features:
+        out[window - 1:] = rule_book.evaluate(features, asset_class)
+    return out
@@ -0,0 +1,149 @@
+# =====================================================
+# utils/score_pool.py
+# v1.0 — Process-pool scoring over a shared-memory candle matrix
+# =====================================================
+#
+# For universes too large for one core, score_batch runs in worker processes.
+# The parent copies the (pairs × bars) close and volume matrices into one
+# multiprocessing.shared_memory segment:
+#   closes  : float64[pairs, bars]
+#   volumes : float64[pairs, bars]
+#   scores  : float64[pairs]
+# Each task carries only the segment name, the shape and a row range. Workers
+# map the segment, score their rows in place and write into `scores`, so no
+# candle data is ever pickled. The segment is reused while it is big enough.
+# Each worker keeps its own utils.scoring_rules rule book, which follows the
+# rule file on disk just like the parent's.
+#
+# Enabled with SCORE_WORKERS > 1. Batches smaller than SCORE_POOL_MIN_ROWS are
+# scored inline, because the task round trip costs more than the math.
+
+import os
+import itertools
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from utils.score_engine import score_batch
+
+logger = logging.getLogger(__name__)
+
+SCORE_WORKERS = int(os.getenv("SCORE_WORKERS", 0))
+SCORE_POOL_MIN_ROWS = int(os.getenv("SCORE_POOL_MIN_ROWS", 256))
+SCORE_POOL_START = os.getenv("SCORE_POOL_START", "spawn")
+
+_names = itertools.count()
+
+
+def _views(buf, rows: int, bars: int):
+    """(closes, volumes, scores) arrays laid over a segment buffer."""
+    plane = rows * bars * 8
+    closes = np.ndarray((rows, bars), dtype=np.float64, buffer=buf, offset=0)
+    volumes = np.ndarray((rows, bars), dtype=np.float64, buffer=buf, offset=plane)
+    scores = np.ndarray((rows,), dtype=np.float64, buffer=buf, offset=2 * plane)
+    return closes, volumes, scores
+
+
+# --- Worker side (module globals live once per worker process) ---
+_attached = {}
+
+
+def _attach(name: str):
+    shm = _attached.get(name)
+    if shm is None:
+        for old in _attached.values():
+            old.close()
+        _attached.clear()
+        # Workers share the parent's resource tracker, so attaching here does not
+        # add a second owner: the parent's unlink is the only cleanup
+        shm = _attached[name] = shared_memory.SharedMemory(name=name)
+    return shm
+
+
+def _score_rows(name: str, rows: int, bars: int, lo: int, hi: int, asset_class: str = None) -> int:
+    closes, volumes, scores = _views(_attach(name).buf, rows, bars)
+    scores[lo:hi] = score_batch(closes[lo:hi], volumes[lo:hi], asset_class)
+    return hi - lo
+
+
+class ScorePool:
+    """score_batch sharded by rows across `workers` processes."""
+
+    def __init__(self, workers: int = SCORE_WORKERS or os.cpu_count() or 1,
+                 min_rows: int = SCORE_POOL_MIN_ROWS, start_method: str = SCORE_POOL_START):
+        self.workers = max(1, int(workers))
+        self.min_rows = min_rows
+        self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context(start_method))
+        self._shm = None
+
+    def _segment(self, size: int):
+        if self._shm is None or self._shm.size < size:
+            self._release()
+            name = f"extremeviper_scores_{os.getpid()}_{next(_names)}"
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        return self._shm
+
+    def warm_up(self):
+        """Start every worker process now instead of on the first batch."""
+        list(self._executor.map(abs, range(self.workers)))
+        return self
+
+    def score(self, closes, volumes=None, asset_class: str = None) -> np.ndarray:
+        """Same contract as score_engine.score_batch."""
+        closes = np.atleast_2d(np.asarray(closes, dtype=np.float64))
+        rows, bars = closes.shape
+        if volumes is None:
+            volumes = np.ones_like(closes)   # flat volume → never a spike, like score_batch
+        if rows < self.min_rows or self.workers == 1:
+            return score_batch(closes, volumes, asset_class)
+
+        shm = self._segment(max(1, (2 * rows * bars + rows) * 8))
+        c_view, v_view, s_view = _views(shm.buf, rows, bars)
+        c_view[:] = closes
+        v_view[:] = volumes
+        bounds = np.linspace(0, rows, self.workers + 1).astype(int)
+        futures = [
+            self._executor.submit(_score_rows, shm.name, rows, bars, int(lo), int(hi), asset_class)
+            for lo, hi in zip(bounds[:-1], bounds[1:]) if hi > lo
+        ]
+        for fut in futures:
+            fut.result()
+        return s_view.copy()
+
+    __call__ = score
+
+    def _release(self):
+        if self._shm is not None:
+            self._shm.close()
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+            self._shm = None
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self._release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_pool = None
+
+
+def get_score_pool():
+    """Process-wide pool when SCORE_WORKERS > 1, else None (score inline)."""
+    global _pool
+    if SCORE_WORKERS <= 1:
+        return None
+    if _pool is None:
+        _pool = ScorePool(SCORE_WORKERS)
+        logger.info(f"🧮 Score pool started ({SCORE_WORKERS} workers, ≥{SCORE_POOL_MIN_ROWS} pairs per pool batch)")
+    return _pool
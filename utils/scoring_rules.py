@@ -0,0 +1,176 @@
+# =====================================================
+# utils/scoring_rules.py
+# v1.0 — Declarative scoring rule table, compiled to threshold arrays
+# =====================================================
+#
+# Each rule scores one feature by how far it sits from a center:
+#     d = |feature - center|
+#     points = points[k - 1] where k = number of thresholds strictly below d
+# So RSI {center 50, thresholds [10, 20], points [1, 2]} is the old
+# "<30 or >70 → 2, <40 or >60 → 1". A rule compiles to a sorted threshold array
+# plus a points lookup table (weights already applied); one np.searchsorted per
+# rule scores a scalar or a whole (pairs,) vector through the same code.
+#
+# Table (JSON at SCORING_RULES_PATH; built-in DEFAULT_RULES when absent):
+#   {
+#     "rules":   {feature: {"center": c, "thresholds": [...], "points": [...]}},
+#     "bonus":   {"above": 3, "below": 6, "points": 0.5},
+#     "classes": {"crypto": {"weights": {feature: w}, "rules": {feature: {...}}}}
+#   }
+# Asset classes (forex / crypto / equities, see pairmap.asset_class) start
+# from the base rules and override weights, rules or the bonus.
+#
+# The file is checked for changes at most every SCORING_RULES_CHECK_SECONDS;
+# a new table is compiled off to the side and swapped in with one assignment,
+# so a running bot picks up edits without a restart. A table that fails to
+# load or compile is logged and the previous one stays active.
+
+import os
+import json
+import time
+import logging
+import threading
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SCORING_RULES_PATH = os.getenv("SCORING_RULES_PATH", "control/scoring_rules.json")
+SCORING_RULES_CHECK_SECONDS = float(os.getenv("SCORING_RULES_CHECK_SECONDS", 5))
+
+ASSET_CLASSES = ("forex", "crypto", "equities")
+
+# Same weights and thresholds score_signal used to hard-code
+DEFAULT_RULES = {
+    "rules": {
+        "rsi": {"center": 50.0, "thresholds": [10.0, 20.0], "points": [1.0, 2.0]},
+        "macd_hist": {"center": 0.0, "thresholds": [0.001, 0.002], "points": [1.0, 2.0]},
+        "ema_slope": {"center": 0.0, "thresholds": [0.05, 0.1], "points": [1.0, 2.0]},
+        "volume_spike": {"center": 0.0, "thresholds": [0.5], "points": [1.0]},
+    },
+    "bonus": {"above": 3.0, "below": 6.0, "points": 0.5},
+    "classes": {name: {} for name in ASSET_CLASSES},
+}
+
+
+class CompiledRule:
+    __slots__ = ("feature", "center", "thresholds", "table")
+
+    def __init__(self, feature: str, spec: dict, weight: float = 1.0):
+        thresholds = np.asarray(spec["thresholds"], dtype=np.float64)
+        points = np.asarray(spec["points"], dtype=np.float64)
+        if thresholds.ndim != 1 or thresholds.shape != points.shape:
+            raise ValueError(f"Rule {feature!r}: thresholds and points must be equal-length lists")
+        if np.any(np.diff(thresholds) <= 0):
+            raise ValueError(f"Rule {feature!r}: thresholds must be strictly increasing")
+        self.feature = feature
+        self.center = float(spec.get("center", 0.0))
+        self.thresholds = thresholds
+        self.table = np.concatenate(([0.0], points)) * float(weight)
+
+    def points(self, value) -> np.ndarray:
+        distance = np.abs(np.asarray(value, dtype=np.float64) - self.center)
+        return self.table[np.searchsorted(self.thresholds, distance, side="left")]
+
+
+class CompiledTable:
+    """One asset class: compiled rules plus the midrange bonus."""
+
+    __slots__ = ("name", "rules", "bonus")
+
+    def __init__(self, name: str, rules: dict, weights: dict, bonus: dict):
+        self.name = name
+        self.rules = tuple(CompiledRule(f, spec, weights.get(f, 1.0)) for f, spec in rules.items())
+        self.bonus = (float(bonus.get("above", 0.0)), float(bonus.get("below", 0.0)), float(bonus.get("points", 0.0)))
+
+    def evaluate(self, features: dict) -> np.ndarray:
+        """Score scalars or equal-length arrays; missing features count 0 points."""
+        score = 0.0
+        for rule in self.rules:
+            value = features.get(rule.feature)
+            if value is not None:
+                score = score + rule.points(value)
+        above, below, bonus = self.bonus
+        score = np.asarray(score, dtype=np.float64)
+        score = np.where((score > above) & (score < below), score + bonus, score)
+        return np.round(score, 2)
+
+
+def with_weights(config: dict, weights: dict) -> dict:
+    """Copy of a rule-table dict with `weights` ({feature: w}) applied to every asset class."""
+    classes = {name: dict(spec or {}) for name, spec in config.get("classes", {}).items()}
+    for name in set(ASSET_CLASSES) | set(classes):
+        spec = classes.setdefault(name, {})
+        spec["weights"] = {**spec.get("weights", {}), **weights}
+    return {**config, "classes": classes}
+
+
+def compile_rules(config: dict) -> dict:
+    """Rule-table dict → {asset class: CompiledTable}; "default" is the unweighted base table."""
+    base_rules = dict(config.get("rules", {}))
+    if not base_rules:
+        raise ValueError("Scoring rule table has no rules")
+    base_bonus = dict(config.get("bonus", {}))
+    classes = dict(config.get("classes", {}))
+    tables = {"default": CompiledTable("default", base_rules, {}, base_bonus)}
+    for name in set(ASSET_CLASSES) | set(classes):
+        override = classes.get(name) or {}
+        rules = {**base_rules, **override.get("rules", {})}
+        bonus = {**base_bonus, **override.get("bonus", {})}
+        tables[name] = CompiledTable(name, rules, override.get("weights", {}), bonus)
+    return tables
+
+
+class RuleBook:
+    """Active compiled tables with mtime-based hot reload."""
+
+    def __init__(self, path: str = SCORING_RULES_PATH, check_seconds: float = SCORING_RULES_CHECK_SECONDS):
+        self.path = path
+        self.check_seconds = check_seconds
+        self._tables = compile_rules(DEFAULT_RULES)
+        self.config = DEFAULT_RULES      # dict behind the active tables
+        self._mtime = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self.reload()
+
+    def load(self, config: dict):
+        """Swap in a new table (dict) at runtime; raises if it does not compile."""
+        self._tables = compile_rules(config)
+        self.config = config
+        logger.info(f"📐 Scoring rules swapped ({len(self._tables) - 1} asset classes)")
+
+    def reload(self) -> bool:
+        """Re-read the rule file if it changed; True when a new table went live."""
+        with self._lock:
+            self._checked = time.monotonic()
+            try:
+                mtime = os.path.getmtime(self.path) if self.path else None
+            except OSError:
+                mtime = None
+            if mtime == self._mtime:
+                return False
+            self._mtime = mtime
+            if mtime is None:
+                self._tables, self.config = compile_rules(DEFAULT_RULES), DEFAULT_RULES
+                return True
+            try:
+                with open(self.path) as f:
+                    self.load(json.load(f))
+                return True
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                logger.error(f"❌ Scoring rules in {self.path} rejected, keeping the active table: {e}")
+                return False
+
+    def table(self, asset_class: str = None) -> CompiledTable:
+        if time.monotonic() - self._checked >= self.check_seconds:
+            self.reload()
+        tables = self._tables
+        return tables.get(asset_class or "default", tables["default"])
+
+    def evaluate(self, features: dict, asset_class: str = None) -> np.ndarray:
+        return self.table(asset_class).evaluate(features)
+
+
+# === Process-wide rule book ===
+rule_book = RuleBook()
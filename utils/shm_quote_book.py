@@ -0,0 +1,233 @@
+# =====================================================
+# utils/shm_quote_book.py
+# v1.0 — Shared-memory latest-quote book (one writer per broker)
+# =====================================================
+#
+# Layout of segment "extremeviper_quotes_<broker>":
+#   header   : int64[3]            → magic, slot count, writer PID
+#   versions : uint64[slots]       → seqlock counter per slot (odd = write in progress)
+#   data     : float64[slots, 4]   → bid, ask, mid, ts (epoch seconds)
+# Slots come from SLOT_MAP, a fixed pair→index map built from utils.pairmap,
+# so every process agrees on the layout without any handshake.
+# Readers never lock: they retry while a slot's version is odd or changed.
+# A writer only takes over an existing segment when its recorded writer PID
+# is gone (a crashed run); while that process lives, create() refuses and the
+# second process just reads its book.
+
+import os
+import time
+import logging
+from multiprocessing import shared_memory, resource_tracker
+
+import numpy as np
+
+from utils.pairmap import ENABLED_PAIRS
+from utils.quote_store import quote_store
+
+logger = logging.getLogger(__name__)
+
+SHARED_QUOTE_BOOK = os.getenv("SHARED_QUOTE_BOOK", "false").lower() == "true"
+QUOTE_BOOK_PREFIX = os.getenv("QUOTE_BOOK_PREFIX", "extremeviper_quotes")
+
+SLOT_MAP = {pair: i for i, pair in enumerate(ENABLED_PAIRS)}
+_MAGIC = 0x5649504552  # "VIPER"
+_FIELDS = 4  # bid, ask, mid, ts
+_MAX_SPINS = 64
+_HEADER = 3 * 8
+
+
+def _segment_name(broker: str) -> str:
+    return f"{QUOTE_BOOK_PREFIX}_{broker.lower()}"
+
+
+def _segment_size(slots: int) -> int:
+    return _HEADER + slots * 8 + slots * _FIELDS * 8
+
+
+def _pid_alive(pid: int) -> bool:
+    """True when another live process has this PID (our own PID means a stale segment)."""
+    if pid <= 0 or pid == os.getpid():
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True   # exists, owned by another user
+    return True
+
+
+class WriterActiveError(RuntimeError):
+    """The broker's segment still belongs to a running writer."""
+
+
+class QuoteBook:
+    """Fixed-layout quote book over multiprocessing.shared_memory."""
+
+    def __init__(self, shm, broker: str, owner: bool):
+        self.shm = shm
+        self.broker = broker
+        self.owner = owner
+        header = np.ndarray((3,), dtype=np.int64, buffer=shm.buf, offset=0)
+        if owner:
+            header[:] = (_MAGIC, len(SLOT_MAP), os.getpid())
+        elif header[0] != _MAGIC or header[1] != len(SLOT_MAP):
+            raise ValueError(f"Quote book layout mismatch for {broker} (slots={header[1]})")
+        self.slots = int(header[1])
+        self.writer_pid = int(header[2])
+        self.versions = np.ndarray((self.slots,), dtype=np.uint64, buffer=shm.buf, offset=_HEADER)
+        self.data = np.ndarray((self.slots, _FIELDS), dtype=np.float64, buffer=shm.buf,
+                               offset=_HEADER + self.slots * 8)
+
+    # --- Lifecycle ---
+    @classmethod
+    def create(cls, broker: str):
+        """
+        Create the broker's segment as its single writer, or take over one left
+        by a crashed writer. Raises WriterActiveError while its writer still runs.
+        """
+        name = _segment_name(broker)
+        size = _segment_size(len(SLOT_MAP))
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            shm = shared_memory.SharedMemory(name=name)
+            header = np.ndarray((3,), dtype=np.int64, buffer=shm.buf) if shm.size >= _HEADER else None
+            pid = int(header[2]) if header is not None and header[0] == _MAGIC else 0
+            del header
+            if _pid_alive(pid):
+                shm.close()
+                raise WriterActiveError(f"{name} is written by running process {pid}")
+            # Left over from a crashed writer: reuse it in place
+            if shm.size < size:
+                shm.close()
+                shm.unlink()
+                shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        book = cls(shm, broker.lower(), owner=True)
+        book.versions[:] = 0
+        book.data[:] = 0.0
+        logger.info(f"📒 Shared quote book {name} ready ({book.slots} slots)")
+        return book
+
+    @classmethod
+    def attach(cls, broker: str):
+        """Attach read-only to another process's book; raises FileNotFoundError if absent."""
+        shm = shared_memory.SharedMemory(name=_segment_name(broker))
+        try:
+            # Readers must not unlink the writer's segment when they exit
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+        return cls(shm, broker.lower(), owner=False)
+
+    def close(self):
+        self.versions = self.data = None
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+    # --- Writer ---
+    def write(self, pair: str, bid: float, ask: float, ts: float = None) -> bool:
+        slot = SLOT_MAP.get(pair)
+        if slot is None:
+            return False
+        v = self.versions[slot]
+        self.versions[slot] = v + 1          # odd: readers back off
+        self.data[slot] = (bid, ask, (bid + ask) / 2, ts or time.time())
+        self.versions[slot] = v + 2          # even: consistent again
+        return True
+
+    def write_mids(self, prices: dict, ts: float = None) -> int:
+        """Publish a {pair: mid} snapshot (bid = ask = mid)."""
+        ts = ts or time.time()
+        return sum(self.write(pair, mid, mid, ts) for pair, mid in prices.items())
+
+    def listener(self, broker, pair, quote):
+        """QuoteStore listener: mirror this broker's streamed quotes into the book."""
+        if broker == self.broker:
+            self.write(pair, quote["bid"], quote["ask"], quote["ts"])
+
+    # --- Readers ---
+    def read(self, pair: str, max_age: float = None):
+        """Consistent {bid, ask, mid, ts} for a pair, or None if empty/stale/unknown."""
+        slot = SLOT_MAP.get(pair)
+        if slot is None:
+            return None
+        for _ in range(_MAX_SPINS):
+            v1 = self.versions[slot]
+            if v1 & 1:
+                continue
+            bid, ask, mid, ts = self.data[slot].tolist()
+            if self.versions[slot] == v1:
+                break
+        else:
+            return None
+        if v1 == 0 or (max_age is not None and time.time() - ts > max_age):
+            return None
+        return {"bid": bid, "ask": ask, "mid": mid, "ts": ts}
+
+    def age(self, pair: str) -> float:
+        """Seconds since the pair was last written (inf if never)."""
+        slot = SLOT_MAP.get(pair)
+        if slot is None or self.versions[slot] == 0:
+            return float("inf")
+        return time.time() - float(self.data[slot, 3])
+
+    def is_stale(self, pair: str, max_age: float) -> bool:
+        return self.age(pair) > max_age
+
+    def stale_pairs(self, max_age: float) -> list:
+        """All written pairs older than max_age — one vectorized pass over the ts column."""
+        written = self.versions > 0
+        stale = written & (time.time() - self.data[:, 3] > max_age)
+        return [pair for pair, slot in SLOT_MAP.items() if stale[slot]]
+
+    def mids(self, pairs, max_age: float = None) -> dict:
+        out = {}
+        for pair in pairs:
+            quote = self.read(pair, max_age)
+            if quote:
+                out[pair] = quote["mid"]
+        return out
+
+
+# =====================================================
+# === Process-level helpers
+# =====================================================
+_writers = {}
+_readers = {}
+
+
+def get_writer(broker: str):
+    """This process's writer book for a broker (None unless SHARED_QUOTE_BOOK=true)."""
+    if not SHARED_QUOTE_BOOK:
+        return None
+    broker = broker.lower()
+    if broker not in _writers:
+        try:
+            _writers[broker] = QuoteBook.create(broker)
+            quote_store.add_listener(_writers[broker].listener)  # mirror streamed quotes
+        except WriterActiveError as e:
+            logger.info(f"📒 {e} — reading its {broker.upper()} book instead of writing")
+            _writers[broker] = None
+        except Exception as e:
+            logger.warning(f"⚠️ Shared quote book unavailable for {broker.upper()}: {e}")
+            _writers[broker] = None
+    return _writers[broker]
+
+
+def read_mids(broker: str, pairs, max_age: float) -> dict:
+    """Fresh mids from any process's book for a broker; {} when none is published."""
+    if not SHARED_QUOTE_BOOK:
+        return {}
+    broker = broker.lower()
+    book = _writers.get(broker) or _readers.get(broker)
+    if book is None:
+        try:
+            book = _readers[broker] = QuoteBook.attach(broker)
+        except (FileNotFoundError, ValueError):
+            return {}
+    return book.mids(pairs, max_age)
@@ -1,71 +1,125 @@
 import logging
-from brokers import kraken, oanda
 from utils.score_engine import score_signal
-from utils.broker_selector import get_smart_broker  # ✅ correct import
+from utils.ta_engine import calc_rsi, calc_macd, calc_ema_slope, calc_vol_spike
+from utils.indicator_cache import indicator_cache
 from utils.pairmap import ENABLED_PAIRS
 from brokers.kraken import normalize_timeframe  # ✅ Use this to safely convert
+from utils.timeframe import TIMEFRAME
+from utils.candle_cache import get_candles
+from utils.candle_store import CandleRing
+from utils.indicator_registry import SIGNAL_BARS
 
 logger = logging.getLogger(__name__)
 
 
-def fetch_signal(pair: str, broker: str, timeframe="M5", count=100):
+def fetch_signal(pair: str, broker: str, timeframe="M5", count=None):
+    """
+    Score one pair for the parallel loop. Results are memoized per closed bar:
+    while the newest bar is still open the memo is returned without touching
+    the candle cache, and a refresh that brings no new bar is a memo hit.
+    """
     try:
-        candles = None
+        cached = indicator_cache.current(broker, pair, timeframe)
+        if cached is not None:
+            return cached
 
-        # ✅ Use broker-specific candle fetching logic
-        if broker.lower() == "kraken":
-            candles = kraken.fetch_candles(pair, timeframe, count)
-        elif broker.lower() == "oanda":
-            candles = oanda.fetch_candles(pair, timeframe, count)
-        else:
-            logger.warning(f"⚠️ Unsupported broker: {broker}")
+        candles = get_candles(broker, pair, timeframe, count)
+        if not candles or len(candles) < 2:
+            logger.warning(f"⚠️ Insufficient or missing candles for {pair}")
             return None
+        _note_short_history(pair, candles, count)
+
+        bar_ts = candles[-1].get("timestamp")
+        if bar_ts is None:
+            return _score_candles(pair, broker, candles)
+        return indicator_cache.get_or_compute(
+            broker, pair, timeframe, bar_ts, lambda: _score_candles(pair, broker, candles)
+        )
+
+    except Exception as e:
+        logger.error(f"❌ Signal fetch failed for {pair}: {e}")
+        return None
+
+
+def _score_candles(pair: str, broker: str, candles):
+    signal = _generate_signal_from_candles(candles)
+    if not signal:
+        return None
+    return {
+        "pair": pair,
+        "broker": broker,
+        "signal": signal,
+        "score": score_signal({**signal, "candles": candles}),
+    }
+
 
-        if not candles or len(candles) < count:
+def fetch_live_signal(pair: str, broker: str, timeframe=TIMEFRAME, count=None, candles=None):
+    """
+    Build a scoreable signal for the cycle loops.
+    Pass `candles` when they were already fetched (e.g. by utils.cycle_driver);
+    otherwise they come from the rolling candle cache.
+    """
+    try:
+        if candles is None:
+            candles = get_candles(broker, pair, timeframe, count)
+
+        if not candles or len(candles) < 2:
             logger.warning(f"⚠️ Insufficient or missing candles for {pair}")
             return None
+        _note_short_history(pair, candles, count)
 
         signal = _generate_signal_from_candles(candles)
-        broker = get_smart_broker(pair)
-
-        score = score_signal(signal)
+        if not signal:
+            return None
 
-        return {
+        signal.update({
             "pair": pair,
             "broker": broker,
-            "signal": signal,
-            "score": score
-        }
+            "candles": candles,
+            "stop_loss": signal.get("sl"),
+            "take_profit": signal.get("tp"),
+        })
+        return signal
 
     except Exception as e:
-        logger.error(f"❌ Signal fetch failed for {pair}: {e}")
+        logger.error(f"❌ Live signal fetch failed for {pair}: {e}")
         return None
 
 
+def _note_short_history(pair: str, candles, count=None):
+    """Short windows are still scored; indicators without enough bars stay neutral."""
+    wanted = max(count or 0, SIGNAL_BARS)
+    if len(candles) < wanted:
+        logger.info(f"ℹ️ {pair}: {len(candles)}/{wanted} bars — scoring with the indicators that are warm")
+
+
 def _generate_signal_from_candles(candles):
     """
     Extract signal indicators from recent candle data.
     Assumes candles are sorted oldest → newest.
     """
     try:
-        closes = [c["close"] for c in candles]
-        highs = [c["high"] for c in candles]
-        lows = [c["low"] for c in candles]
-        volumes = [c["volume"] for c in candles]
+        if isinstance(candles, CandleRing):
+            # Column views straight off the ring — no per-candle allocation
+            closes, highs, lows = candles.closes, candles.highs, candles.lows
+        else:
+            closes = [c["close"] for c in candles]
+            highs = [c["high"] for c in candles]
+            lows = [c["low"] for c in candles]
 
         # Most recent candle
-        latest = candles[-1]
-        previous = candles[-2]
+        latest_close = float(closes[-1])
+        previous_close = float(closes[-2])
 
         signal = {
-            "price": latest["close"],
-            "side": "buy" if latest["close"] > previous["close"] else "sell",
+            "price": latest_close,
+            "side": "buy" if latest_close > previous_close else "sell",
             "rsi": _calculate_rsi(closes),
             "macd": _calculate_macd(closes),
             "ema_slope": _calculate_ema_slope(closes),
-            "vol_spike": _calculate_vol_spike(volumes),
-            "sl": min(lows[-5:]),
-            "tp": max(highs[-5:]),
+            "vol_spike": _calculate_vol_spike(highs, lows),
+            "sl": float(min(lows[-5:])),
+            "tp": float(max(highs[-5:])),
         }
 
         return signal
@@ -75,8 +129,8 @@ def _generate_signal_from_candles(candles):
         return {}
 
 
-# === Stub indicator logic ===
-def _calculate_rsi(closes): return 50
-def _calculate_macd(closes): return 0
-def _calculate_ema_slope(closes): return 0
-def _calculate_vol_spike(volumes): return 1
+# === Indicators (ta_engine short-period set) ===
+def _calculate_rsi(closes): return calc_rsi(closes)
+def _calculate_macd(closes): return calc_macd(closes)
+def _calculate_ema_slope(closes): return calc_ema_slope(closes)
+def _calculate_vol_spike(highs, lows): return calc_vol_spike(highs, lows)
@@ -0,0 +1,239 @@
+# =====================================================
+# utils/stream_replay.py
+# v1.0 — Local stand-in stream server replaying recorded quotes
+# =====================================================
+#
+# Serves recorded (or synthetic) quotes over HTTP in the wire formats the
+# consumers in utils.price_stream understand:
+#   GET /v3/accounts/<id>/pricing/stream   → OANDA PRICE / HEARTBEAT JSON lines
+#   GET /kraken/ticker                     → Kraken websocket ticker messages
+# Quotes are replayed at a configurable rate (0 = as fast as possible),
+# so ingestion throughput can be benchmarked offline.
+#
+# Recording format: one JSON object per line {"broker", "pair", "bid", "ask", "ts"}.
+
+import json
+import time
+import random
+import logging
+import threading
+from datetime import datetime, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from utils.pairmap import PAIRMAP_OANDA, PAIRMAP_KRAKEN
+from utils.quote_store import QuoteStore
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT_INTERVAL = 5.0
+
+
+# =====================================================
+# === Recording / loading
+# =====================================================
+def load_recording(path: str) -> list:
+    """Load a JSON-lines quote recording."""
+    quotes = []
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                quotes.append(json.loads(line))
+    return quotes
+
+
+class QuoteRecorder:
+    """QuoteStore listener that appends every quote to a JSON-lines file."""
+
+    def __init__(self, path: str):
+        self._file = open(path, "a")
+        self._lock = threading.Lock()
+
+    def __call__(self, broker, pair, quote):
+        line = json.dumps({"broker": broker, "pair": pair, "bid": quote["bid"], "ask": quote["ask"], "ts": quote["ts"]})
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def synthetic_quotes(pairs, n: int, seed: int = 7, start_ts: float = None) -> list:
+    """Random-walk quotes for benchmarking when no recording is at hand."""
+    rng = random.Random(seed)
+    mids = {p: 100.0 + i for i, p in enumerate(pairs)}
+    ts = start_ts or time.time()
+    out = []
+    for i in range(n):
+        pair = pairs[i % len(pairs)]
+        mids[pair] *= 1 + rng.gauss(0, 1e-4)
+        spread = mids[pair] * 1e-4
+        out.append({"pair": pair, "bid": mids[pair] - spread / 2, "ask": mids[pair] + spread / 2, "ts": ts + i * 1e-3})
+    return out
+
+
+# =====================================================
+# === Wire formats
+# =====================================================
+def _rfc3339(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+def _oanda_message(q: dict) -> dict:
+    return {
+        "type": "PRICE",
+        "instrument": PAIRMAP_OANDA.get(q["pair"], q["pair"].replace("/", "_")),
+        "time": _rfc3339(q["ts"]),
+        "bids": [{"price": f"{q['bid']:.5f}", "liquidity": 1000000}],
+        "asks": [{"price": f"{q['ask']:.5f}", "liquidity": 1000000}],
+        "tradeable": True,
+    }
+
+
+def _kraken_message(q: dict):
+    base, _, quote = q["pair"].partition("/")
+    ws_name = f"{'XBT' if base == 'BTC' else base}/{quote}"
+    return [
+        340, {"a": [f"{q['ask']:.5f}", 1, "1.0"], "b": [f"{q['bid']:.5f}", 1, "1.0"]},
+        "ticker", ws_name,
+    ]
+
+
+# =====================================================
+# === Server
+# =====================================================
+class StreamReplayServer:
+    """
+    Replays `quotes` to every connected client at `rate` quotes/sec.
+    `loop=True` restarts the recording when it runs out.
+    """
+
+    def __init__(self, quotes, rate: float = 0, host: str = "127.0.0.1", port: int = 0,
+                 loop: bool = False, heartbeat: float = HEARTBEAT_INTERVAL):
+        self.quotes = list(quotes)
+        self.rate = float(rate)
+        self.loop = loop
+        self.heartbeat = heartbeat
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def oanda_url(self, account_id: str = "replay") -> str:
+        return f"{self.url}/v3/accounts/{account_id}/pricing/stream"
+
+    def kraken_url(self) -> str:
+        return f"{self.url}/kraken/ticker"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True, name="stream-replay")
+        self._thread.start()
+        logger.info(f"🎞️ Stream replay server on {self.url} ({len(self.quotes)} quotes @ {self.rate or 'max'}/s)")
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.startswith("/kraken/ticker"):
+                    fmt = _kraken_message
+                elif "/pricing/stream" in self.path:
+                    fmt = _oanda_message
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/octet-stream")
+                self.end_headers()
+                try:
+                    server._replay(self.wfile, fmt, fmt is _oanda_message)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def _replay(self, wfile, fmt, oanda_heartbeats: bool):
+        interval = 1.0 / self.rate if self.rate > 0 else 0.0
+        start = time.perf_counter()
+        last_beat = time.time()
+        sent = 0
+        batch = []
+        while True:
+            for q in self.quotes:
+                batch.append(json.dumps(fmt(q)))
+                sent += 1
+                if interval:
+                    # Pace against the wall clock so the rate holds under load
+                    delay = start + sent * interval - time.perf_counter()
+                    if delay > 0:
+                        wfile.write(("\n".join(batch) + "\n").encode())
+                        wfile.flush()
+                        batch.clear()
+                        time.sleep(delay)
+                elif len(batch) >= 256:
+                    wfile.write(("\n".join(batch) + "\n").encode())
+                    batch.clear()
+
+                if self.heartbeat and time.time() - last_beat >= self.heartbeat:
+                    last_beat = time.time()
+                    beat = {"type": "HEARTBEAT", "time": _rfc3339(last_beat)} if oanda_heartbeats else {"event": "heartbeat"}
+                    batch.append(json.dumps(beat))
+            if not self.loop:
+                break
+        if batch:
+            wfile.write(("\n".join(batch) + "\n").encode())
+        wfile.flush()
+
+
+# =====================================================
+# === Offline ingestion benchmark
+# =====================================================
+def benchmark_ingest(broker: str = "oanda", quotes=None, rate: float = 0, n_quotes: int = 50000) -> dict:
+    """
+    Replay quotes through the local server into a fresh QuoteStore using the real
+    stream consumer and report ingested quotes/sec.
+    """
+    from utils.price_stream import OandaPricingStream, KrakenTickerStream
+
+    pairs = list(PAIRMAP_OANDA if broker == "oanda" else PAIRMAP_KRAKEN)
+    quotes = quotes or synthetic_quotes(pairs, n_quotes)
+    server = StreamReplayServer(quotes, rate=rate).start()
+    store = QuoteStore()
+    done = threading.Event()
+    target = len(quotes)
+    store.add_listener(lambda *_: done.set() if store.ingested >= target else None)
+
+    if broker == "oanda":
+        consumer = OandaPricingStream(pairs, store, url=server.oanda_url())
+    else:
+        consumer = KrakenTickerStream(pairs, store, url=server.kraken_url())
+
+    start = time.perf_counter()
+    consumer.start()
+    done.wait(timeout=max(60.0, target / rate * 2 if rate else 60.0))
+    elapsed = time.perf_counter() - start
+    consumer.stop()
+    server.stop()
+
+    result = {
+        "broker": broker,
+        "quotes": store.ingested,
+        "seconds": round(elapsed, 3),
+        "quotes_per_sec": round(store.ingested / elapsed, 1) if elapsed else 0.0,
+        "target_rate": rate or "max",
+    }
+    logger.info(f"📈 Stream ingest benchmark: {result}")
+    return result
@@ -3,7 +3,7 @@ import os
 
 def parse_timeframe(raw: str) -> str:
     raw = str(raw).strip().upper()
-    if raw.startswith("M") or raw.startswith("H"):
+    if raw.startswith(("M", "H", "D")):
         return raw
     return f"M{raw}"
 
@@ -13,6 +13,8 @@ def parse_timeframe_minutes(raw: str) -> int:
         return int(raw[1:])
     elif raw.startswith("H"):
         return int(raw[1:]) * 60
+    elif raw.startswith("D"):
+        return int(raw[1:] or 1) * 1440
     return int(raw)
 
 # Global constants
@@ -1,7 +1,7 @@
 import os
 import logging
-import requests
 import json
+from utils import http_pool
 from urllib.parse import urlencode
 
 logger = logging.getLogger(__name__)
@@ -26,7 +26,7 @@ def get_access_token():
             payload["client_secret"] = CLIENT_SECRET
 
         headers = {"Content-Type": "application/x-www-form-urlencoded"}
-        resp = requests.post(TOKEN_URL, data=payload, headers=headers)
+        resp = http_pool.post("tos", TOKEN_URL, endpoint="token", data=payload, headers=headers)
         resp.raise_for_status()
         token = resp.json()["access_token"]
         return token
@@ -43,7 +43,7 @@ def check_connection():
             return False
 
         headers = {"Authorization": f"Bearer {token}"}
-        resp = requests.get(f"{API_BASE_URL}/userprincipals", headers=headers)
+        resp = http_pool.get("tos", f"{API_BASE_URL}/userprincipals", endpoint="ping", headers=headers)
         return resp.status_code == 200
 
     except Exception as e:
@@ -60,7 +60,7 @@ def get_balance():
         ACCOUNT_ID = os.getenv("TOS_ACCOUNT_ID")
         headers = {"Authorization": f"Bearer {token}"}
         url = f"{API_BASE_URL}/accounts/{ACCOUNT_ID}?fields=positions"
-        resp = requests.get(url, headers=headers)
+        resp = http_pool.get("tos", url, endpoint="balance", headers=headers)
         resp.raise_for_status()
         data = resp.json()
         balance = float(data[0]["securitiesAccount"]["currentBalances"]["liquidationValue"])
@@ -101,7 +101,7 @@ def place_order(symbol, qty, side, sl=None, tp=None, score=None):
         }
 
         url = f"{API_BASE_URL}/accounts/{ACCOUNT_ID}/orders"
-        resp = requests.post(url, headers=headers, json=order)
+        resp = http_pool.post("tos", url, endpoint="order", headers=headers, json=order)
 
         if not resp.ok:
             logger.error(f"💥 TOS Order Error: {resp.status_code} {resp.text}")
@@ -3,7 +3,6 @@ import json
 import time
 import logging
 from pathlib import Path
-from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
@@ -18,90 +17,135 @@ MAX_TRADES_PER_HOUR = int(os.getenv("MAX_TRADES_PER_HOUR", 25))
 MIN_SCORE = float(os.getenv("MIN_SCORE_THRESHOLD", 7.0))
 COOLDOWN = int(os.getenv("PAIR_COOLDOWN_SECONDS", 60))
 
-# Internal in-memory cache
-_cache = {}
-_throttle = {}  # broker: [timestamps]
-
 
 # =====================================================
-# 🔁 JSON Helpers
+# ⏱️ Cooldown + Duplicate Detection + Throttle
 # =====================================================
-def _load_log():
-    if LOG_PATH.exists():
+class TradeControl:
+    """
+    Per-pair cooldown, same-minute duplicate check and per-broker trades/hour
+    throttle. `clock` supplies epoch seconds (the backtester passes its
+    virtual clock); `log_path=None` keeps the state in memory only.
+    """
+
+    def __init__(self, cooldown: int = COOLDOWN, max_per_hour: int = MAX_TRADES_PER_HOUR,
+                 clock=time.time, log_path=LOG_PATH):
+        self.cooldown = cooldown
+        self.max_per_hour = max_per_hour
+        self.clock = clock
+        self.log_path = log_path
+        self.last_trade = {}   # "broker:pair" → epoch of last trade
+        self.throttle = {}     # broker → [epochs]
+
+    @staticmethod
+    def _key(pair: str, broker: str = "") -> str:
+        return f"{broker}:{pair}" if broker else pair
+
+    def _load_log(self):
+        if self.log_path is None or not self.log_path.exists():
+            return {}
         try:
-            with open(LOG_PATH, "r") as f:
+            with open(self.log_path, "r") as f:
                 return json.load(f)
         except Exception:
             return {}
-    return {}
 
-def _save_log(data):
-    with open(LOG_PATH, "w") as f:
-        json.dump(data, f, indent=2)
+    def _save_log(self, data):
+        if self.log_path is not None:
+            with open(self.log_path, "w") as f:
+                json.dump(data, f, indent=2)
+
+    def is_in_cooldown(self, pair: str, broker: str = "") -> bool:
+        """Return True if pair is still in cooldown window."""
+        last = self.last_trade.get(self._key(pair, broker), 0)
+        return self.clock() - last < self.cooldown
+
+    def is_duplicate(self, pair: str, broker: str = "") -> bool:
+        """Return True if same pair+broker traded in same minute."""
+        last_ts = self.last_trade.get(self._key(pair, broker), 0)
+        if not last_ts:
+            return False
+        return int(self.clock() // 60) == int(last_ts // 60)
+
+    def update_trade_log(self, pair: str, broker: str = ""):
+        """Log current trade time for cooldown + duplicate tracking."""
+        self.persist_trade(pair, broker, self.mark_trade(pair, broker))
+
+    def mark_trade(self, pair: str, broker: str = "") -> float:
+        """Start the cooldown in memory only (cheap; safe to call under a caller's lock)."""
+        now = self.clock()
+        self.last_trade[self._key(pair, broker)] = now
+        return now
+
+    def persist_trade(self, pair: str, broker: str = "", ts: float = None):
+        """Write a trade time (already marked in memory) to the cooldown log."""
+        if self.log_path is not None:
+            key = self._key(pair, broker)
+            data = self._load_log()
+            data[key] = self.last_trade.get(key, 0) if ts is None else ts
+            self._save_log(data)
+            logger.info(f"⏱️ Cooldown started for {key} ({self.cooldown}s)")
+
+    def can_trade(self, broker: str) -> bool:
+        """Return False if broker exceeded trades/hour limit."""
+        now = self.clock()
+        one_hour_ago = now - 3600
+        recent = [t for t in self.throttle.get(broker, []) if t > one_hour_ago]
+        self.throttle[broker] = recent
+        if len(recent) >= self.max_per_hour:
+            logger.warning(f"[Throttle] Max {self.max_per_hour}/hour reached.")
+            return False
+        recent.append(now)
+        return True
+
+    def init_cache(self):
+        """Load cooldown + throttle history into memory."""
+        self.last_trade.update(self._load_log())
+        logger.info(f"📒 Loaded {len(self.last_trade)} trade cooldown records.")
+
+
+# Live state (wall clock, persisted to LOG_PATH)
+trade_control = TradeControl()
+_cache = trade_control.last_trade
+_throttle = trade_control.throttle
 
 
 # =====================================================
-# ⏱️ Cooldown + Duplicate Detection
+# 🔁 Module-level API (live loops)
 # =====================================================
+def _load_log():
+    return trade_control._load_log()
+
+def _save_log(data):
+    trade_control._save_log(data)
+
 def is_in_cooldown(pair: str, broker: str = "") -> bool:
     """Return True if pair is still in cooldown window."""
-    key = f"{broker}:{pair}" if broker else pair
-    now = time.time()
-    last = _cache.get(key, 0)
-    return now - last < COOLDOWN
+    return trade_control.is_in_cooldown(pair, broker)
 
 def is_duplicate(pair: str, broker: str = "") -> bool:
     """Return True if same pair+broker traded in same minute."""
-    key = f"{broker}:{pair}" if broker else pair
-    last_ts = _cache.get(key, 0)
-    if not last_ts:
-        return False
-
-    now = datetime.utcnow().replace(second=0, microsecond=0)
-    last = datetime.utcfromtimestamp(last_ts).replace(second=0, microsecond=0)
-    return now == last
+    return trade_control.is_duplicate(pair, broker)
 
 def update_trade_log(pair: str, broker: str = ""):
     """Log current trade time for cooldown + duplicate tracking."""
-    key = f"{broker}:{pair}" if broker else pair
-    now = time.time()
-    _cache[key] = now
-    data = _load_log()
-    data[key] = now
-    _save_log(data)
-    logger.info(f"⏱️ Cooldown started for {key} ({COOLDOWN}s)")
+    trade_control.update_trade_log(pair, broker)
 
+def mark_trade(pair: str, broker: str = "") -> float:
+    """Start the cooldown in memory only; persist_trade writes it to disk."""
+    return trade_control.mark_trade(pair, broker)
+
+def persist_trade(pair: str, broker: str = "", ts: float = None):
+    """Write a trade time (already marked in memory) to the cooldown log."""
+    trade_control.persist_trade(pair, broker, ts)
 
-# =====================================================
-# 🧠 Throttle: Limit total trades/hour
-# =====================================================
 def can_trade(broker: str) -> bool:
     """Return False if broker exceeded trades/hour limit."""
-    now = time.time()
-    one_hour_ago = now - 3600
-
-    if broker not in _throttle:
-        _throttle[broker] = []
-
-    # Purge old timestamps
-    _throttle[broker] = [t for t in _throttle[broker] if t > one_hour_ago]
+    return trade_control.can_trade(broker)
 
-    if len(_throttle[broker]) >= MAX_TRADES_PER_HOUR:
-        logger.warning(f"[Throttle] Max {MAX_TRADES_PER_HOUR}/hour reached.")
-        return False
-
-    _throttle[broker].append(now)
-    return True
-
-
-# =====================================================
-# 📒 Persistent Cache Init
-# =====================================================
 def init_cache():
     """Load cooldown + throttle history into memory."""
-    data = _load_log()
-    _cache.update(data)
-    logger.info(f"📒 Loaded {len(_cache)} trade cooldown records.")
+    trade_control.init_cache()
 
 
 # =====================================================